@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Shared by every module that spreads work over processes (distance_matrix,
+# reachability, scenario, spanning_forest, k_shortest_paths): each worker
+# gets the read-only state (usually the compiled graph) once, when it starts,
+# instead of once per task.
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+# `local` when the work runs in this process, else what the worker was
+# started with
+def worker_state(local=None):
+    return _worker_state if local is None else local
+
+
+# (pool, workers): a process pool whose workers each receive `state` once,
+# or (None, 1) when workers <= 1 and the work should stay in this process.
+# workers=None means one per CPU.
+def worker_pool(workers, state):
+    if workers is not None and workers <= 1:
+        return None, 1
+    workers = workers or os.cpu_count()
+    return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(state,)), workers
+
+
+# one shortest-path tree per source answers all of that source's targets
+def _route_groups(groups, compiled=None):
+    compiled = worker_state(compiled)
+    results = []
+    for start, targets in groups:
+        tree = compiled.shortest_path_tree(start, targets)
+        for target in targets:
+            cost, path = compiled.tree_route(tree, start, target)
+            results.append((start, target, cost, path))
+    return results
+
+
+def _group_by_source(pairs):
+    groups = {}
+    for start, target in pairs:
+        groups.setdefault(start, []).append(target)
+    return list(groups.items())
+
+
+# F2: yields (start, target, cost, path) for every pair, in completion order.
+# Pairs are grouped by source so each source runs a single Dijkstra; with
+# workers > 1 the groups are spread over a process pool that receives the
+# compiled graph once per worker.
+def route_many(graph, pairs, workers=1, batch_size=64):
+    compiled = graph.compile()
+    groups = _group_by_source(pairs)
+    batches = [groups[i:i + batch_size] for i in range(0, len(groups), batch_size)]
+
+    pool, workers = worker_pool(workers, compiled)
+    if pool is None:
+        for batch in batches:
+            yield from _route_groups(batch, compiled)
+        return
+
+    with pool:
+        # keep a bounded number of batches in flight so results stream back
+        # without queueing the whole workload up front
+        pending = set()
+        next_batch = 0
+        while next_batch < len(batches) or pending:
+            while next_batch < len(batches) and len(pending) < workers * 2:
+                pending.add(pool.submit(_route_groups, batches[next_batch]))
+                next_batch += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
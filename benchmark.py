@@ -0,0 +1,911 @@
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import compiled_graph
+import instrumentation
+from data_structure import CustomArray, CustomHashMap, CustomMinHeap, IndexedMinHeap
+from graph import Graph
+from min_cost_flow import MinCostFlow
+from network_generator import generate
+from streaming_loader import edge_record, node_record
+
+
+# drone_testdata_2.json copied `copies` times, in the same schema; copy k
+# renames every id to "<id>#k", is shifted 100 units along x, and random
+# corridors link neighbouring copies together.
+def scaled_testdata_json(copies, seed=0, path="drone_testdata_2.json"):
+    with open(path, "r") as f:
+        data = json.load(f)
+    rng = random.Random(seed)
+    ids = [n["id"] for n in data["nodes"]]
+    nodes = []
+    edges = []
+
+    for k in range(copies):
+        for n in data["nodes"]:
+            nodes.append({**n, "id": f"{n['id']}#{k}", "x": n["x"] + 100 * k})
+        for e in data["edges"]:
+            edges.append({**e, "from": f"{e['from']}#{k}", "to": f"{e['to']}#{k}"})
+        if k > 0:
+            for _ in range(len(ids) // 4):
+                edges.append({
+                    "from": f"{rng.choice(ids)}#{k - 1}",
+                    "to": f"{rng.choice(ids)}#{k}",
+                    "energy": rng.randint(5, 20),
+                    "capacity": rng.randint(1, 3),
+                    "bidirectional": True,
+                })
+    return {"nodes": nodes, "edges": edges}
+
+
+def scaled_testdata(copies, seed=0, path="drone_testdata_2.json"):
+    data = scaled_testdata_json(copies, seed, path)
+    graph = Graph()
+    for n in data["nodes"]:
+        graph.add_node(*node_record(n))
+    for e in data["edges"]:
+        graph.add_edge(*edge_record(e))
+    return graph
+
+
+def bench_hash_map(sizes=(10**3, 10**4, 10**5, 10**6)):
+    print("CustomHashMap insert/search throughput")
+    for n in sizes:
+        keys = [f"D{i}" for i in range(n)]
+        hash_map = CustomHashMap()
+
+        start = time.perf_counter()
+        for i, key in enumerate(keys):
+            hash_map.insert(key, i)
+        insert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            hash_map.search(key)
+        search_time = time.perf_counter() - start
+
+        print(f"{n:>9} keys | insert {n / insert_time:>12,.0f} ops/s"
+              f" | search {n / search_time:>12,.0f} ops/s"
+              f" | buckets {hash_map.bucket_count}")
+
+
+# Dijkstra as it was before the indexed heap: duplicate pushes, stale pops.
+def _lazy_dijkstra(compiled, start, target):
+    s = compiled.node_index(start)
+    t = compiled.node_index(target)
+    dist = [None] * compiled.size
+    visited = bytearray(compiled.size)
+    dist[s] = 0
+    pq = CustomMinHeap()
+    pq.push(0, s)
+    peak = 1
+    while not pq.is_empty():
+        cost, u = pq.pop()
+        if visited[u]:
+            continue
+        visited[u] = 1
+        if u == t:
+            return cost, peak
+        for i in range(compiled.offsets[u], compiled.offsets[u + 1]):
+            if compiled.restricted[i]:
+                continue
+            v = compiled.targets[i]
+            new_cost = cost + compiled.energy[i]
+            if dist[v] is None or new_cost < dist[v]:
+                dist[v] = new_cost
+                pq.push(new_cost, v)
+                peak = max(peak, len(pq.data))
+    return float("inf"), peak
+
+
+class _CountingIndexedMinHeap(IndexedMinHeap):
+    peak = 0
+    pops = 0
+
+    @classmethod
+    def reset(cls):
+        cls.peak = 0
+        cls.pops = 0
+
+    def push(self, priority, key):
+        IndexedMinHeap.push(self, priority, key)
+        _CountingIndexedMinHeap.peak = max(_CountingIndexedMinHeap.peak, len(self.keys))
+
+    def pop(self):
+        _CountingIndexedMinHeap.pops += 1
+        return IndexedMinHeap.pop(self)
+
+
+def _counted(fn, *args):
+    compiled_graph.IndexedMinHeap = _CountingIndexedMinHeap
+    _CountingIndexedMinHeap.reset()
+    try:
+        return fn(*args)
+    finally:
+        compiled_graph.IndexedMinHeap = IndexedMinHeap
+
+
+def bench_indexed_heap(copies=(1, 10, 100, 500), queries=20):
+    print("Dijkstra: lazy CustomMinHeap vs IndexedMinHeap (drone_testdata_2 scaled)")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        rng = random.Random(k)
+        pairs = [(f"HUB#{rng.randrange(k)}", f"D{rng.randint(1, 25)}#{rng.randrange(k)}")
+                 for _ in range(queries)]
+
+        start = time.perf_counter()
+        lazy_peak = 0
+        lazy_costs = []
+        for s, t in pairs:
+            cost, peak = _lazy_dijkstra(compiled, s, t)
+            lazy_costs.append(cost)
+            lazy_peak = max(lazy_peak, peak)
+        lazy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        costs = _counted(lambda: [compiled.dijkstra(s, t)[0] for s, t in pairs])
+        indexed_time = time.perf_counter() - start
+        assert costs == lazy_costs
+
+        print(f"{compiled.size:>7} nodes {compiled.edge_count:>8} edges"
+              f" | lazy {lazy_time * 1000 / queries:>8.2f} ms/query peak heap {lazy_peak:>7}"
+              f" | indexed {indexed_time * 1000 / queries:>8.2f} ms/query"
+              f" peak heap {_CountingIndexedMinHeap.peak:>7}")
+
+
+def bench_routing(copies=(1, 10, 100, 500), queries=20):
+    print("Point-to-point routing: Dijkstra vs A* vs bidirectional (drone_testdata_2 scaled)")
+    for k in copies:
+        compiled = scaled_testdata(k).compile()
+        rng = random.Random(k)
+        pairs = [(f"HUB#{rng.randrange(k)}", f"D{rng.randint(1, 25)}#{rng.randrange(k)}")
+                 for _ in range(queries)]
+
+        line = f"{compiled.size:>7} nodes"
+        expected = None
+        for name, algorithm in (("dijkstra", compiled.dijkstra),
+                                ("astar", compiled.astar),
+                                ("bidirectional", compiled.bidirectional_dijkstra)):
+            start = time.perf_counter()
+            costs = _counted(lambda: [algorithm(s, t)[0] for s, t in pairs])
+            elapsed = time.perf_counter() - start
+            if expected is None:
+                expected = costs
+            assert costs == expected
+            line += (f" | {name} {elapsed * 1000 / queries:>7.2f} ms"
+                     f" settled {_CountingIndexedMinHeap.pops // queries:>6}")
+        print(line)
+
+
+def bench_contraction_hierarchy(copies=(1, 10, 100), queries=300):
+    print("Contraction hierarchy: preprocessing and query time vs Dijkstra")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+
+        start = time.perf_counter()
+        hierarchy = graph.contraction_hierarchy()
+        build_time = time.perf_counter() - start
+
+        rng = random.Random(k)
+        pairs = [(rng.choice(compiled.ids), rng.choice(compiled.ids)) for _ in range(queries)]
+
+        start = time.perf_counter()
+        costs = [hierarchy.query(s, t)[0] for s, t in pairs]
+        query_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [compiled.dijkstra(s, t)[0] for s, t in pairs]
+        dijkstra_time = time.perf_counter() - start
+        assert costs == expected
+
+        print(f"{compiled.size:>7} nodes | build {build_time:>7.2f} s"
+              f" shortcuts {len(hierarchy.middle):>7}"
+              f" | query {query_time * 1000 / queries:>7.3f} ms"
+              f" | dijkstra {dijkstra_time * 1000 / queries:>7.3f} ms")
+
+
+def bench_max_flow(copies=(1, 10, 100, 500)):
+    print("Delivery capacity (Dinic) and min cut, HUB#0 to every delivery node")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        deliveries = [compiled.ids[i] for i in range(compiled.node_count)
+                      if compiled.types[i] == "delivery"]
+
+        start = time.perf_counter()
+        max_flow, residual = graph.calculate_delivery_capacity("HUB#0", deliveries)
+        flow_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cut = graph._extract_min_cut(residual, "HUB#0")
+        cut_time = time.perf_counter() - start
+
+        print(f"{compiled.size:>7} nodes {compiled.edge_count:>8} edges | max flow {max_flow:>5}"
+              f" in {flow_time * 1000:>8.1f} ms | min cut {len(cut):>4} edges"
+              f" in {cut_time * 1000:>8.1f} ms")
+
+
+def bench_incremental_flow(copies=(10, 100, 500), toggles=50):
+    print("No-fly-zone toggles: DeliveryFlow repair vs full calculate_delivery_capacity")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        deliveries = [compiled.ids[i] for i in range(compiled.node_count)
+                      if compiled.types[i] == "delivery"]
+        corridors = [(compiled.ids[compiled.sources[i]], compiled.ids[compiled.targets[i]])
+                     for i in range(compiled.edge_count)]
+        rng = random.Random(k)
+        changes = [(*rng.choice(corridors), rng.random() < 0.6) for _ in range(toggles)]
+
+        flow = graph.delivery_flow("HUB#0", deliveries)
+        flow.max_flow()
+        incremental = []
+        start = time.perf_counter()
+        for u, v, restricted in changes:
+            graph.set_restricted(u, v, restricted)
+            incremental.append(flow.max_flow())
+        incremental_time = time.perf_counter() - start
+        flow.close()
+
+        for u, v, _ in changes:
+            graph.set_restricted(u, v, False)
+        full = []
+        start = time.perf_counter()
+        for u, v, restricted in changes:
+            graph.set_restricted(u, v, restricted)
+            full.append(graph.calculate_delivery_capacity("HUB#0", deliveries)[0])
+        full_time = time.perf_counter() - start
+        assert incremental == full
+
+        print(f"{compiled.size:>7} nodes | incremental {incremental_time * 1000 / toggles:>8.2f} ms/toggle"
+              f" | full {full_time * 1000 / toggles:>8.2f} ms/toggle")
+
+
+def bench_batch_routing(copies=(10, 100), pairs_count=5000, workers=(1, 4)):
+    print("Batch routing: one dijkstra per pair vs route_many grouped by source")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        rng = random.Random(k)
+        hubs = [f"HUB#{i}" for i in range(k)]
+        pairs = [(rng.choice(hubs), rng.choice(compiled.ids)) for _ in range(pairs_count)]
+
+        start = time.perf_counter()
+        expected = {(s, t): graph.dijkstra(s, t)[0] for s, t in pairs}
+        line = f"{compiled.size:>7} nodes {pairs_count} pairs | single {time.perf_counter() - start:>7.2f} s"
+
+        for n in workers:
+            start = time.perf_counter()
+            for s, t, cost, _ in graph.route_many(pairs, workers=n):
+                assert expected[(s, t)] == cost
+            line += f" | route_many x{n} {time.perf_counter() - start:>7.2f} s"
+        print(line)
+
+
+def bench_distance_matrix(copies=(1, 10, 30), workers=(1, 4)):
+    print("Hub x delivery energy matrix: one dijkstra per pair vs distance_matrix"
+          " (Floyd-Warshall up to 1000 nodes, Dijkstra rows), then lookups from the saved mmap file")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        hubs = [compiled.ids[i] for i in range(compiled.node_count) if compiled.types[i] == "hub"]
+        deliveries = [compiled.ids[i] for i in range(compiled.node_count) if compiled.types[i] == "delivery"]
+
+        start = time.perf_counter()
+        expected = [[graph.dijkstra(h, d)[0] for d in deliveries] for h in hubs]
+        line = (f"{compiled.size:>7} nodes {len(hubs):>4}x{len(deliveries):<5}"
+                f" | per pair {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+        runs = [("floyd_warshall", 1)] if compiled.size <= 1000 else []
+        runs += [("dijkstra", n) for n in workers]
+        for method, n in runs:
+            start = time.perf_counter()
+            matrix = graph.distance_matrix(hubs, deliveries, method=method, workers=n)
+            elapsed = time.perf_counter() - start
+            assert [[matrix.lookup(h, d) for d in deliveries] for h in hubs] == expected
+            label = "floyd" if method == "floyd_warshall" else f"rows x{n}"
+            line += f" | {label} {elapsed * 1000:>8.1f} ms"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "matrix.npy")
+            matrix.save(path)
+            mapped = type(matrix).load(path, mmap=True)
+            start = time.perf_counter()
+            for h in hubs:
+                for d in deliveries:
+                    mapped.lookup(h, d)
+            lookups = time.perf_counter() - start
+            del mapped
+        line += f" | mmap lookups {lookups * 1e6 / (len(hubs) * len(deliveries)):>5.2f} us each"
+        print(line)
+
+
+def bench_streaming_load(copies=(100, 1000)):
+    print("Loading: load_json vs load_json_stream (time, tracemalloc peak)")
+    for k in copies:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "network.json")
+            with open(path, "w") as f:
+                json.dump(scaled_testdata_json(k), f, indent=2)
+            size = os.path.getsize(path)
+
+            line = f"{k * 41:>7} nodes {size / 2**20:>7.1f} MiB"
+            for name in ("load_json", "load_json_stream"):
+                graph = Graph()
+                tracemalloc.start()
+                start = time.perf_counter()
+                getattr(graph, name)(path)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                line += f" | {name} {elapsed:>6.2f} s peak {peak / 2**20:>7.1f} MiB"
+            print(line)
+
+
+def bench_binary_snapshot(copies=(10, 100, 1000)):
+    print("Cold start: load_json vs load_binary, then one dijkstra query")
+    for k in copies:
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = os.path.join(tmp, "network.json")
+            binary_path = os.path.join(tmp, "network.bin")
+            with open(json_path, "w") as f:
+                json.dump(scaled_testdata_json(k), f, indent=2)
+            source = Graph()
+            source.load_json(json_path)
+            source.save_binary(binary_path)
+            # a big live graph would slow the timed loads down through gc
+            del source
+            gc.collect()
+            target = f"D1#{k - 1}"
+
+            line = f"{k * 41:>7} nodes"
+            for name, load in (("load_json", lambda g: g.load_json(json_path)),
+                               ("load_binary", lambda g: g.load_binary(binary_path))):
+                graph = Graph()
+                start = time.perf_counter()
+                load(graph)
+                loaded = time.perf_counter() - start
+                graph.dijkstra("HUB#0", target)
+                routed = time.perf_counter() - start
+                line += f" | {name} {loaded * 1000:>9.1f} ms, first route {routed * 1000:>9.1f} ms"
+                del graph
+                gc.collect()
+            print(line)
+
+
+def bench_memory(copies=(100, 1000)):
+    print("Memory held by a loaded Graph (tracemalloc)")
+    for k in copies:
+        data = scaled_testdata_json(k)
+        gc.collect()
+        tracemalloc.start()
+        graph = Graph()
+        for n in data["nodes"]:
+            graph.add_node(*node_record(n))
+        for e in data["edges"]:
+            graph.add_edge(*edge_record(e))
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        edges = sum(len(out) for _, out in graph.adj.items())
+        print(f"{graph.node_count:>7} nodes {edges:>8} edges | {current / 2**20:>7.1f} MiB"
+              f" | {current / edges:>6.0f} bytes per edge")
+        del graph
+        gc.collect()
+
+
+# Baseline for route_with_battery: every (node, charge) pair with an integer
+# charge 0..battery_capacity becomes a state of an explicit expanded graph,
+# which is then searched with plain Dijkstra.
+def _expanded_battery_route(compiled, start, target, battery_capacity):
+    levels = battery_capacity + 1
+    adj = [[] for _ in range(compiled.size * levels)]
+    for u in range(compiled.size):
+        for i in range(compiled.offsets[u], compiled.offsets[u + 1]):
+            if compiled.restricted[i]:
+                continue
+            v = compiled.targets[i]
+            w = compiled.energy[i]
+            for q in range(w, levels):
+                left = q - w
+                if compiled.types[v] == "charging":
+                    left = battery_capacity
+                adj[u * levels + q].append((v * levels + left, w))
+
+    s = compiled.node_index(start) * levels + battery_capacity
+    t = compiled.node_index(target)
+    pq = IndexedMinHeap(len(adj))
+    dist = [None] * len(adj)
+    dist[s] = 0
+    pq.push(0, s)
+    while not pq.is_empty():
+        cost, state = pq.pop()
+        if state // levels == t:
+            return cost, len(adj)
+        for nxt, w in adj[state]:
+            new_cost = cost + w
+            if dist[nxt] is None:
+                dist[nxt] = new_cost
+                pq.push(new_cost, nxt)
+            elif new_cost < dist[nxt] and pq.contains(nxt):
+                dist[nxt] = new_cost
+                pq.decrease_key(nxt, new_cost)
+    return float("inf"), len(adj)
+
+
+def bench_battery_routing(copies=(1, 10, 100), battery_capacity=40, queries=20):
+    print(f"Battery-constrained routing (capacity {battery_capacity}):"
+          " label search vs expanded state graph")
+    rng = random.Random(3)
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        ids = compiled.ids[:compiled.node_count]
+        pairs = [(rng.choice(ids), rng.choice(ids)) for _ in range(queries)]
+
+        start = time.perf_counter()
+        labelled = [graph.route_with_battery(s, t, battery_capacity)[0] for s, t in pairs]
+        label_time = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        expanded = []
+        for s, t in pairs:
+            cost, states = _expanded_battery_route(compiled, s, t, battery_capacity)
+            expanded.append(cost)
+        expanded_time = (time.perf_counter() - start) / queries
+
+        assert labelled == expanded
+        print(f"{compiled.node_count:>7} nodes {states:>9} states | labels {label_time * 1000:>8.2f} ms"
+              f" | expanded {expanded_time * 1000:>9.2f} ms | x{expanded_time / label_time:>6.1f}")
+
+
+# the placement loop before incremental distances: one full multi-source
+# Dijkstra and corridor scan per station
+def _rescan_placement(graph, k, R):
+    charging = CustomArray()
+    for node_id, node in graph.nodes.items():
+        if node.type == "charging":
+            charging.append(node_id)
+    for _ in range(k):
+        dist = graph.multi_source_dijkstra(charging)
+        uncovered = graph.find_uncovered_corridors(dist, R)
+        candidate = None
+        max_dist = -1
+        if len(uncovered) > 0:
+            for (u, v) in uncovered:
+                if dist.search(u) > max_dist:
+                    max_dist = dist.search(u)
+                    candidate = u
+                if dist.search(v) > max_dist:
+                    max_dist = dist.search(v)
+                    candidate = v
+        else:
+            for node_id, _ in graph.nodes.items():
+                d = dist.search(node_id)
+                if d > max_dist:
+                    max_dist = d
+                    candidate = node_id
+        if candidate is None:
+            break
+        charging.append(candidate)
+    return charging
+
+
+def bench_charging_placement(copies=(10, 100), k=50, R=30):
+    print(f"Charging station placement, k={k}, R={R}")
+    for c in copies:
+        graph = scaled_testdata(c)
+        graph.compile()
+
+        start = time.perf_counter()
+        old = list(_rescan_placement(graph, k, R))
+        line = f"{graph.node_count:>7} nodes | rescan {time.perf_counter() - start:>7.2f} s"
+
+        start = time.perf_counter()
+        new = list(graph.optimize_charging_station_placement(k, R))
+        line += f" | incremental {time.perf_counter() - start:>6.2f} s"
+        assert old == new
+
+        for objective in ("coverage", "k_median", "k_center"):
+            start = time.perf_counter()
+            graph.place_charging_stations(k, objective, R=R)
+            line += f" | {objective} {time.perf_counter() - start:>6.2f} s"
+        print(line)
+
+
+def bench_reachability(copies=(10, 100, 1000), scenarios=8):
+    print("Hub x delivery reachability: one DFS per hub vs bitset pass")
+    rng = random.Random(5)
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        hubs = [compiled.ids[i] for i in range(compiled.node_count) if compiled.types[i] == "hub"]
+        deliveries = [i for i in range(compiled.node_count) if compiled.types[i] == "delivery"]
+
+        start = time.perf_counter()
+        per_hub = []
+        for hub in hubs:
+            visited = compiled.reachable(hub)
+            per_hub.append([compiled.ids[j] for j in deliveries if not visited[j]])
+        dfs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix = graph.reachability_matrix()
+        bitset = time.perf_counter() - start
+        assert per_hub == [matrix.unreachable(hub) for hub in hubs]
+
+        corridors = [(compiled.ids[compiled.sources[i]], compiled.ids[compiled.targets[i]])
+                     for i in range(compiled.edge_count)]
+        closures = [rng.sample(corridors, len(corridors) // 20) for _ in range(scenarios)]
+        start = time.perf_counter()
+        graph.reachability_scenarios(closures)
+        per_scenario = (time.perf_counter() - start) / scenarios
+
+        print(f"{compiled.node_count:>7} nodes {len(hubs):>5} hubs | per-hub DFS {dfs * 1000:>9.1f} ms"
+              f" | bitset {bitset * 1000:>8.1f} ms | x{dfs / bitset:>6.1f}"
+              f" | {per_scenario * 1000:>8.1f} ms per scenario")
+
+
+def _scenario_task(view):
+    return view.dijkstra("HUB#0", "D1#9")[0], view.check_delivery_reachability("HUB#0")
+
+
+def bench_scenarios(copies=10, count=1000, workers=(1, 2)):
+    print(f"{count} no-fly-zone scenarios: set_restricted + undo vs overlay views")
+    rng = random.Random(9)
+    graph = scaled_testdata(copies)
+    compiled = graph.compile()
+    corridors = [(compiled.ids[compiled.sources[i]], compiled.ids[compiled.targets[i]])
+                 for i in range(compiled.edge_count) if not compiled.restricted[i]]
+    scenarios = [rng.sample(corridors, 20) for _ in range(count)]
+
+    start = time.perf_counter()
+    mutated = []
+    for closed in scenarios:
+        for u, v in closed:
+            graph.set_restricted(u, v, True)
+        mutated.append((graph.dijkstra("HUB#0", "D1#9")[0], graph.check_delivery_reachability("HUB#0")))
+        for u, v in closed:
+            graph.set_restricted(u, v, False)
+    line = f"{compiled.node_count:>7} nodes | mutate+undo {time.perf_counter() - start:>6.2f} s"
+
+    for w in workers:
+        start = time.perf_counter()
+        results = graph.run_scenarios(scenarios, _scenario_task, workers=w)
+        line += f" | views, {w} worker(s) {time.perf_counter() - start:>6.2f} s"
+        assert results == mutated
+    print(line)
+
+
+# n nodes with a bidirectional corridor between each pair with probability p
+def dense_graph(n, p, seed=0):
+    rng = random.Random(seed)
+    graph = Graph()
+    graph.add_nodes([(f"N{i}", "relay", None, None) for i in range(n)])
+    graph.add_edges([(f"N{i}", f"N{j}", rng.randint(1, 100), 1, True)
+                     for i in range(n) for j in range(i + 1, n) if rng.random() < p])
+    return graph
+
+
+def bench_spanning_forest(sizes=((300, 0.5), (1000, 0.2), (2000, 0.1))):
+    print("Spanning tree on dense graphs: prim vs kruskal vs boruvka")
+    for n, p in sizes:
+        graph = dense_graph(n, p)
+        compiled = graph.compile()
+
+        start = time.perf_counter()
+        _, prim_total = graph.prim("N0")
+        line = f"{n:>6} nodes {compiled.edge_count:>8} edges | prim {time.perf_counter() - start:>6.2f} s"
+
+        for method in ("kruskal", "boruvka"):
+            start = time.perf_counter()
+            _, total, components = graph.minimum_spanning_forest(method)
+            line += f" | {method} {time.perf_counter() - start:>6.2f} s"
+            assert total == prim_total and len(components) == 1
+        print(line)
+
+
+def bench_dynamic_sssp(copies=(10, 100, 1000), updates=200):
+    print("Hub distances under set_restricted toggles: full recompute vs dynamic tree repair")
+    rng = random.Random(11)
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        hubs = [compiled.ids[i] for i in range(compiled.node_count) if compiled.types[i] == "hub"]
+        corridors = [(compiled.ids[compiled.sources[i]], compiled.ids[compiled.targets[i]])
+                     for i in range(compiled.edge_count) if not compiled.restricted[i]]
+        toggles = [rng.choice(corridors) for _ in range(updates)]
+
+        start = time.perf_counter()
+        full = []
+        for n, (u, v) in enumerate(toggles):
+            graph.set_restricted(u, v, n % 2 == 0)
+            full.append(graph.compile().multi_source_dijkstra(hubs))
+        full_time = (time.perf_counter() - start) / updates
+        for u, v in toggles:
+            graph.set_restricted(u, v, False)
+
+        tree = graph.dynamic_shortest_paths(hubs)
+        touched = 0
+        start = time.perf_counter()
+        for n, (u, v) in enumerate(toggles):
+            graph.set_restricted(u, v, n % 2 == 0)
+            touched += tree.touched
+        dynamic_time = (time.perf_counter() - start) / updates
+        tree.close()
+
+        assert [tree.distance(node_id) for node_id in compiled.ids] == full[-1]
+        print(f"{compiled.node_count:>7} nodes | recompute {full_time * 1000:>8.2f} ms"
+              f" | repair {dynamic_time * 1000:>6.3f} ms, {touched / updates:>6.1f} nodes touched")
+
+
+# set_restricted before the (u, v) index: a scan of u's adjacency list and of
+# its compiled row
+def _scan_restrict(graph, u, v, restricted):
+    for e in graph.adj.search(u):
+        if e.v == v:
+            e._restricted = restricted
+    compiled = graph._compiled
+    ui = compiled.index.search(u)
+    vi = compiled.index.search(v)
+    for i in range(compiled.offsets[ui], compiled.offsets[ui + 1]):
+        if compiled.targets[i] == vi:
+            compiled.restricted[i] = 1 if restricted else 0
+
+
+def bench_corridor_updates(sizes=(10**3, 10**4, 10**5), toggles=5000, removals=20):
+    print("No-fly-zone toggles on scale-free networks: adjacency scan vs (u, v) index,"
+          " random corridors and corridors out of the 10 busiest nodes; then remove_edge"
+          " followed by compile(): rebuilding the snapshot vs tombstoning the slots")
+    rng = random.Random(5)
+    for n in sizes:
+        data = generate("scale_free", n, m=3)
+        graph = Graph()
+        for node in data["nodes"]:
+            graph.add_node(*node_record(node))
+        for e in data["edges"]:
+            graph.add_edge(*edge_record(e))
+        graph.compile()
+        corridors = [(e.u, e.v) for _, edges in graph.adj.items() for e in edges]
+        busiest = sorted(graph.adj.items(), key=lambda item: len(item[1]), reverse=True)[:10]
+        busy = [(e.u, e.v) for _, edges in busiest for e in edges]
+
+        # the snapshot builds its (u, v) → slot index on the first update
+        start = time.perf_counter()
+        graph.set_restricted(*corridors[0], False)
+        graph.compile().corridor_slots(*corridors[0])
+        line = f"{n:>7} nodes | slot index {(time.perf_counter() - start) * 1000:>6.1f} ms"
+        for label, pool in (("random", corridors), ("busy", busy)):
+            feed = [rng.choice(pool) for _ in range(toggles)]
+            start = time.perf_counter()
+            for i, (u, v) in enumerate(feed):
+                _scan_restrict(graph, u, v, i % 2 == 0)
+            scan_time = time.perf_counter() - start
+            for u, v in feed:
+                _scan_restrict(graph, u, v, False)
+
+            start = time.perf_counter()
+            for i, (u, v) in enumerate(feed):
+                graph.set_restricted(u, v, i % 2 == 0)
+            index_time = time.perf_counter() - start
+            graph.set_restricted_many(feed, False)
+            line += (f" | {label}: scan {toggles / scan_time:>7.0f}/s,"
+                     f" index {toggles / index_time:>7.0f}/s")
+
+        victims = rng.sample(corridors, removals)
+        start = time.perf_counter()
+        for u, v in victims[:removals // 2]:
+            graph.remove_edge(u, v)
+            graph._drop_derived()
+            graph.compile()
+        rebuild_time = (time.perf_counter() - start) / (removals // 2)
+        graph.compile().corridor_slots(*victims[-1])
+        start = time.perf_counter()
+        for u, v in victims[removals // 2:]:
+            graph.remove_edge(u, v)
+            graph.compile()
+        tombstone_time = (time.perf_counter() - start) / (removals - removals // 2)
+        line += (f" | remove: rebuild {rebuild_time * 1000:>7.2f} ms,"
+                 f" tombstone {tombstone_time * 1000:>6.3f} ms")
+        print(line)
+
+
+# Yen's algorithm without shared work: every spur is a full Dijkstra on the
+# graph with the root's nodes and the banned corridors masked out
+def _masked_yen(compiled, start, target, k):
+    restricted = compiled.restricted
+    first = compiled.dijkstra(start, target)
+    if not first[1]:
+        return []
+    found = [first]
+    candidates = []
+    while len(found) < k:
+        path = found[-1][1]
+        for j in range(len(path) - 1):
+            root = path[:j + 1]
+            masked = []
+            for node_id in root[:-1]:
+                u = compiled.node_index(node_id)
+                masked.extend(range(compiled.offsets[u], compiled.offsets[u + 1]))
+            for _, p in found:
+                if p[:j + 1] == root:
+                    masked.extend(compiled.corridor_slots(p[j], p[j + 1]))
+            saved = [restricted[i] for i in masked]
+            for i in masked:
+                restricted[i] = 1
+            cost, spur = compiled.dijkstra(path[j], target)
+            for i, value in zip(masked, saved):
+                restricted[i] = value
+            if spur:
+                root_cost = sum(compiled.energy[compiled.corridor_slots(a, b)[0]]
+                                for a, b in zip(root, root[1:]))
+                route = (root_cost + cost, root[:-1] + spur)
+                if route not in candidates and route not in found:
+                    candidates.append(route)
+        if not candidates:
+            break
+        candidates.sort(key=lambda route: (route[0], len(route[1])))
+        found.append(candidates.pop(0))
+    return found
+
+
+def bench_k_shortest_paths(copies=(10, 100), k=10, queries=5, workers=(1, 2)):
+    print(f"k = {k} alternative routes: Yen with masked Dijkstra spurs vs shared reverse tree")
+    for n in copies:
+        graph = scaled_testdata(n)
+        compiled = graph.compile()
+        rng = random.Random(n)
+        pairs = [(f"HUB#{rng.randrange(n)}", f"D{rng.randint(1, 25)}#{rng.randrange(n)}")
+                 for _ in range(queries)]
+
+        start = time.perf_counter()
+        masked = [_masked_yen(compiled, s, t, k) for s, t in pairs]
+        masked_time = (time.perf_counter() - start) / queries
+
+        line = f"{compiled.node_count:>7} nodes | masked {masked_time * 1000:>9.1f} ms"
+        for w in workers:
+            start = time.perf_counter()
+            shared = [graph.k_shortest_paths(s, t, k, workers=w) for s, t in pairs]
+            shared_time = (time.perf_counter() - start) / queries
+            assert [[cost for cost, _ in routes] for routes in shared] == \
+                [[cost for cost, _ in routes] for routes in masked]
+            line += f" | shared, {w} worker{'s' if w > 1 else ''} {shared_time * 1000:>8.1f} ms"
+        print(line)
+
+
+# successive shortest paths as usually written: Bellman-Ford over the
+# residual arcs for every augmenting path, no potentials
+def _bellman_ford_ssp(solver):
+    s, t = solver.source, solver.sink
+    to, cap, cost, arcs, arc_offsets = solver.to, solver.cap, solver.cost, solver.arcs, solver.arc_offsets
+    energy = 0
+    while True:
+        dist = [None] * solver.size
+        prev = [-1] * solver.size
+        dist[s] = 0
+        queue = [s]
+        queued = bytearray(solver.size)
+        qi = 0
+        while qi < len(queue):
+            u = queue[qi]
+            qi += 1
+            queued[u] = 0
+            for j in range(arc_offsets[u], arc_offsets[u + 1]):
+                a = arcs[j]
+                v = to[a]
+                if cap[a] > 0 and (dist[v] is None or dist[u] + cost[a] < dist[v]):
+                    dist[v] = dist[u] + cost[a]
+                    prev[v] = a
+                    if not queued[v]:
+                        queued[v] = 1
+                        queue.append(v)
+        if dist[t] is None:
+            return solver.flow, energy
+        pushed = solver._augment_path(s, t, prev, None)
+        solver.flow += pushed
+        energy += pushed * dist[t]
+
+
+def bench_min_cost_flow(sizes=(10**3, 10**4), areas=50):
+    print(f"Min-cost max-flow from every hub into {areas} delivery points:"
+          " Bellman-Ford per path vs Dijkstra with potentials")
+    for kind in ("grid", "geometric"):
+        for n in sizes:
+            data = generate(kind, n)
+            graph = Graph()
+            for node in data["nodes"]:
+                graph.add_node(*node_record(node))
+            for e in data["edges"]:
+                graph.add_edge(*edge_record(e))
+            compiled = graph.compile()
+            hubs = [node["id"] for node in data["nodes"] if node["type"] == "hub"]
+            delivery = [node["id"] for node in data["nodes"] if node["type"] == "delivery"]
+            area = random.Random(n).sample(delivery, areas)
+
+            start = time.perf_counter()
+            expected = _bellman_ford_ssp(MinCostFlow(compiled, hubs, area))
+            bellman_time = time.perf_counter() - start
+
+            with instrumentation.collect() as stats:
+                start = time.perf_counter()
+                flow, energy, flows = graph.min_cost_delivery_flow(area, hubs)
+                solver_time = time.perf_counter() - start
+            assert (flow, energy) == expected
+            print(f"{kind:>10} {n:>6} nodes, {compiled.edge_count:>6} corridors | flow {flow:>4}, energy {energy:>7}"
+                  f" | Bellman-Ford {bellman_time * 1000:>9.1f} ms"
+                  f" | potentials {solver_time * 1000:>8.1f} ms, {stats.augmenting_paths} paths")
+
+
+def bench_instrumentation(copies=(10, 100, 1000), queries=50):
+    print("Instrumentation: dijkstra queries and one max flow, counters off vs on")
+    for k in copies:
+        graph = scaled_testdata(k)
+        compiled = graph.compile()
+        rng = random.Random(k)
+        pairs = [(f"HUB#{rng.randrange(k)}", f"D{rng.randint(1, 25)}#{rng.randrange(k)}")
+                 for _ in range(queries)]
+        deliveries = [compiled.ids[i] for i in range(compiled.node_count)
+                      if compiled.types[i] == "delivery"]
+
+        def work():
+            for s, t in pairs:
+                graph.dijkstra(s, t)
+            graph.calculate_delivery_capacity("HUB#0", deliveries)
+
+        def best_of(runs=3):
+            best = float("inf")
+            for _ in range(runs):
+                start = time.perf_counter()
+                work()
+                best = min(best, time.perf_counter() - start)
+            return best
+
+        off = best_of()
+        calls = []
+        graph.enable_instrumentation(calls.append)
+        on = best_of()
+        graph.disable_instrumentation()
+
+        routes = calls[-queries - 1:-1]
+        flow = calls[-1]
+        print(f"{compiled.node_count:>7} nodes | off {off * 1000:>8.1f} ms | on {on * 1000:>8.1f} ms"
+              f" | per route: settled {sum(s.nodes_settled for s in routes) // queries:>6},"
+              f" relaxed {sum(s.edges_relaxed for s in routes) // queries:>6}"
+              f" | flow: {flow.augmenting_paths} paths, {flow.bfs_passes} BFS passes")
+
+
+BENCHMARKS = {
+    "hash_map": bench_hash_map,
+    "indexed_heap": bench_indexed_heap,
+    "routing": bench_routing,
+    "contraction_hierarchy": bench_contraction_hierarchy,
+    "max_flow": bench_max_flow,
+    "incremental_flow": bench_incremental_flow,
+    "batch_routing": bench_batch_routing,
+    "distance_matrix": bench_distance_matrix,
+    "streaming_load": bench_streaming_load,
+    "binary_snapshot": bench_binary_snapshot,
+    "memory": bench_memory,
+    "battery_routing": bench_battery_routing,
+    "charging_placement": bench_charging_placement,
+    "reachability": bench_reachability,
+    "scenarios": bench_scenarios,
+    "spanning_forest": bench_spanning_forest,
+    "dynamic_sssp": bench_dynamic_sssp,
+    "instrumentation": bench_instrumentation,
+    "corridor_updates": bench_corridor_updates,
+    "k_shortest_paths": bench_k_shortest_paths,
+    "min_cost_flow": bench_min_cost_flow,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or list(BENCHMARKS):
+        BENCHMARKS[name]()
+        print("======================================================")
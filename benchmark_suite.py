@@ -0,0 +1,196 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import instrumentation
+from compiled_graph import CompiledGraph
+from graph import Graph
+from network_generator import KINDS, generate, write
+
+# Regression suite for F1–F6 on generated networks (network_generator.py).
+# Every operation is timed on its own, repeated while the runs add up to less
+# than 0.2 s (at most five times) and reported as the fastest run. It then
+# runs once more with the instrumentation counters on (nodes settled, heap
+# and hash-map work...; see instrumentation.py) and, with memory tracing on,
+# under tracemalloc for its peak, so neither slows the timed runs. Results go
+# to a JSON file and are compared with a baseline file of the same shape:
+#   python benchmark_suite.py                       run, compare if a baseline exists
+#   python benchmark_suite.py --save-baseline       run, store as the new baseline
+#   python benchmark_suite.py --sizes 100 1000000   other sizes (10^6 takes minutes)
+# The counts and counters of a seeded run are exact, so one that differs from
+# the baseline means an algorithm's result or work changed, not just its speed.
+
+
+# fn's result with its best time, traced peak and counters; again repeats fn
+# when fn itself caches (graph.compile)
+def _measure(fn, trace_memory, again=None):
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+
+    total, runs = elapsed, 1
+    while total < 0.2 and runs < 5:
+        gc.collect()
+        start = time.perf_counter()
+        (again or fn)()
+        run = time.perf_counter() - start
+        elapsed = min(elapsed, run)
+        total += run
+        runs += 1
+
+    peak = None
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    with instrumentation.collect() as stats:
+        (again or fn)()
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    work = stats.as_dict()
+    del work["name"], work["seconds"]
+    return result, elapsed, peak, work
+
+
+def _finite(value):
+    return None if value == float("inf") else value
+
+
+# one record per operation on one generated network
+def run_case(kind, n, seed=0, k=10, R=30, trace_memory=True):
+    data = generate(kind, n, seed)
+    hub = next(node["id"] for node in data["nodes"] if node["type"] == "hub")
+    delivery = [node["id"] for node in data["nodes"] if node["type"] == "delivery"]
+    target = delivery[-1] if delivery else hub
+    edge_records = len(data["edges"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"{kind}_{n}.json")
+        write(data, path)
+        del data
+
+        def load():
+            graph = Graph()
+            graph.load_json(path)
+            return graph
+
+        graph, elapsed, peak, work = _measure(load, trace_memory)
+    timings = [("load_json", elapsed, peak, work, {"nodes": graph.node_count, "edges": edge_records})]
+
+    compiled, elapsed, peak, work = _measure(graph.compile, trace_memory, lambda: CompiledGraph(graph))
+    timings.append(("compile", elapsed, peak, work, {"slots": compiled.edge_count}))
+
+    message, elapsed, peak, work = _measure(lambda: graph.check_delivery_reachability(hub), trace_memory)
+    unreachable = 0 if message.startswith("All") else len(message.split(": ", 1)[1].split(", "))
+    timings.append(("check_delivery_reachability", elapsed, peak, work, {"unreachable": unreachable}))
+
+    (cost, path), elapsed, peak, work = _measure(lambda: graph.dijkstra(hub, target), trace_memory)
+    timings.append(("dijkstra", elapsed, peak, work, {"cost": _finite(cost), "hops": max(len(path) - 1, 0)}))
+
+    (flow, residual), elapsed, peak, work = _measure(
+        lambda: graph.calculate_delivery_capacity(hub, delivery), trace_memory)
+    timings.append(("calculate_delivery_capacity", elapsed, peak, work, {"flow": flow}))
+
+    cut, elapsed, peak, work = _measure(lambda: graph._extract_min_cut(residual, hub), trace_memory)
+    timings.append(("_extract_min_cut", elapsed, peak, work, {"cut_edges": len(cut)}))
+
+    stations, elapsed, peak, work = _measure(
+        lambda: graph.optimize_charging_station_placement(k, R), trace_memory)
+    timings.append(("optimize_charging_station_placement", elapsed, peak, work, {"stations": len(stations)}))
+
+    (mst, total), elapsed, peak, work = _measure(lambda: graph.prim(hub), trace_memory)
+    timings.append(("prim", elapsed, peak, work, {"tree_edges": sum(1 for _ in mst.iter()), "cost": total}))
+
+    return [{"kind": kind, "nodes": n, "operation": name, "seconds": round(elapsed, 6),
+             "peak_bytes": peak, "counts": counts, "work": work}
+            for name, elapsed, peak, work, counts in timings]
+
+
+def run_suite(kinds=KINDS, sizes=(10**2, 10**3, 10**4, 10**5), seed=0, trace_memory=True):
+    results = []
+    for kind in kinds:
+        for n in sizes:
+            for record in run_case(kind, n, seed, trace_memory=trace_memory):
+                results.append(record)
+                print(f"{kind:>10} {n:>8} | {record['operation']:<36} {record['seconds'] * 1000:>10.1f} ms"
+                      + (f" | peak {record['peak_bytes'] / 2**20:>8.1f} MiB" if record["peak_bytes"] is not None else ""))
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+# Lines describing every operation that got slower or heavier than the
+# baseline by more than tolerance (and, for time, by more than min_seconds,
+# which keeps sub-millisecond noise out), or whose counts differ.
+def compare(report, baseline, tolerance=0.25, min_seconds=0.005):
+    previous = {(r["kind"], r["nodes"], r["operation"]): r for r in baseline["results"]}
+    problems = []
+    for r in report["results"]:
+        key = (r["kind"], r["nodes"], r["operation"])
+        base = previous.get(key)
+        if base is None:
+            continue
+        label = f"{r['kind']} {r['nodes']} {r['operation']}"
+        if (r["seconds"] > base["seconds"] * (1 + tolerance)
+                and r["seconds"] - base["seconds"] > min_seconds):
+            problems.append(f"{label}: {base['seconds'] * 1000:.1f} ms -> {r['seconds'] * 1000:.1f} ms")
+        if (r["peak_bytes"] is not None and base["peak_bytes"] is not None
+                and r["peak_bytes"] > base["peak_bytes"] * (1 + tolerance)):
+            problems.append(f"{label}: peak {base['peak_bytes'] / 2**20:.1f} MiB"
+                            f" -> {r['peak_bytes'] / 2**20:.1f} MiB")
+        if r["counts"] != base["counts"]:
+            problems.append(f"{label}: counts {base['counts']} -> {r['counts']}")
+        if "work" in base and r["work"] != base["work"]:
+            changed = {key: (base["work"].get(key), value) for key, value in r["work"].items()
+                       if base["work"].get(key) != value}
+            problems.append(f"{label}: work {changed}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="F1–F6 benchmark suite on generated networks")
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10**2, 10**3, 10**4, 10**5])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--no-memory", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.kinds, args.sizes, args.seed, not args.no_memory)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    problems = compare(report, baseline, args.tolerance)
+    for line in problems:
+        print("REGRESSION " + line)
+    if not problems:
+        print(f"no regressions against {args.baseline}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from compiled_graph import CompiledGraph
+from data_structure import CustomHashMap
+
+# File layout, all offsets in bytes:
+#   0   magic b"DRNG", format version (u16), byte order (u16, 1 = little),
+#       header length (u32), CRC-32 of everything after these 16 bytes (u32)
+#   16  JSON header: counts, the node type table, the heuristic ratio and
+#       name → [typecode, offset, length] for every column
+#   ..  the columns, each starting on an 8-byte boundary
+# Columns are written in native byte order and read back as memoryviews, so a
+# file loaded with mmap is used in place instead of being parsed.
+MAGIC = b"DRNG"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct("<4sHHII")
+_LITTLE = 1 if sys.byteorder == "little" else 0
+
+
+# smallest typecode that holds the column exactly: ints stay ints
+def _typecode(values):
+    for value in values:
+        if not isinstance(value, int) or isinstance(value, bool) or not -2**63 <= value < 2**63:
+            return "d"
+    return "q"
+
+
+def _pad(n):
+    return (8 - n % 8) % 8
+
+
+def save(graph, filepath):
+    # rows must match graph.adj, which removed corridors have already left
+    compiled = graph.compile(compact=True)
+    ids = compiled.ids
+    for node_id in ids:
+        if not isinstance(node_id, str):
+            raise TypeError(f"binary snapshots need string node ids, got {node_id!r}")
+
+    blob = bytearray()
+    id_offsets = [0]
+    for node_id in ids:
+        blob += node_id.encode("utf-8")
+        id_offsets.append(len(blob))
+
+    # interned node types: one small table plus an index per node
+    types = []
+    type_index = CustomHashMap()
+    type_column = []
+    for node_type in compiled.types:
+        t = type_index.search(node_type)
+        if t is None:
+            t = len(types)
+            types.append(node_type)
+            type_index.insert(node_type, t)
+        type_column.append(t)
+
+    has_xy = bytearray(1 if x is not None and y is not None else 0
+                       for x, y in zip(compiled.x, compiled.y))
+    xs = [x if has else 0 for x, has in zip(compiled.x, has_xy)]
+    ys = [y if has else 0 for y, has in zip(compiled.y, has_xy)]
+
+    # same row order as the compiled snapshot
+    bidirectional = bytearray()
+    for i in range(compiled.node_count):
+        for e in graph.adj.search(ids[i]) or []:
+            bidirectional.append(1 if e.bidirectional else 0)
+
+    columns = [
+        ("id_offsets", "q", id_offsets),
+        ("id_blob", "B", blob),
+        ("types", "i", type_column),
+        ("x", _typecode(xs), xs),
+        ("y", _typecode(ys), ys),
+        ("has_xy", "B", has_xy),
+        ("offsets", "q", compiled.offsets),
+        ("targets", "i", compiled.targets),
+        ("energy", _typecode(compiled.energy), compiled.energy),
+        ("capacity", _typecode(compiled.capacity), compiled.capacity),
+        ("bidirectional", "B", bidirectional),
+        ("restricted", "B", compiled.restricted),
+        ("sources", "i", compiled.sources),
+        ("rev_offsets", "q", compiled.rev_offsets),
+        ("rev_edges", "i", compiled.rev_edges),
+    ]
+
+    layout = {}
+    chunks = []
+    position = 0
+    for name, typecode, values in columns:
+        data = array(typecode, values).tobytes()
+        layout[name] = [typecode, position, len(values)]
+        chunks.append(data + bytes(_pad(len(data))))
+        position += len(data) + _pad(len(data))
+
+    header = json.dumps({
+        "node_count": compiled.node_count,
+        "size": compiled.size,
+        "edge_count": compiled.edge_count,
+        "types": types,
+        "energy_per_distance": compiled.energy_per_distance,
+        "columns": layout,
+    }).encode("utf-8")
+    header += b" " * _pad(_PREFIX.size + len(header))
+
+    body = header + b"".join(chunks)
+    _replace(filepath, _PREFIX.pack(MAGIC, FORMAT_VERSION, _LITTLE, len(header), zlib.crc32(body)), body)
+
+
+# Writes a new file next to filepath and renames it over the old one. Graphs
+# that loaded the old file with mmap keep their mapping of it, where
+# rewriting it in place would change or shrink the pages under them.
+def _replace(filepath, *parts):
+    temp = f"{filepath}.{os.getpid()}.tmp"
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for part in parts:
+                f.write(part)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, filepath)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+# Returns (compiled snapshot, bidirectional column). Only the id table is
+# decoded up front; the per-edge columns stay views into the file.
+def load(filepath, use_mmap=True, verify=True):
+    with open(filepath, "rb") as f:
+        if use_mmap:
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            buffer = memoryview(f.read())
+
+    if len(buffer) < _PREFIX.size:
+        raise ValueError(f"{filepath}: not a graph snapshot")
+    magic, version, little, header_length, checksum = _PREFIX.unpack(buffer[:_PREFIX.size])
+    if magic != MAGIC:
+        raise ValueError(f"{filepath}: not a graph snapshot")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{filepath}: snapshot format {version}, expected {FORMAT_VERSION}")
+    if little != _LITTLE:
+        raise ValueError(f"{filepath}: snapshot was written with the other byte order")
+    if verify and zlib.crc32(buffer[_PREFIX.size:]) != checksum:
+        raise ValueError(f"{filepath}: checksum mismatch, the snapshot is corrupt")
+
+    start = _PREFIX.size + header_length
+    header = json.loads(bytes(buffer[_PREFIX.size:start]))
+
+    def column(name):
+        typecode, offset, length = header["columns"][name]
+        size = array(typecode).itemsize
+        return buffer[start + offset:start + offset + length * size].cast(typecode)
+
+    blob = bytes(column("id_blob"))
+    id_offsets = column("id_offsets")
+    types = header["types"]
+    has_xy = column("has_xy")
+    xs, ys = column("x"), column("y")
+
+    compiled = CompiledGraph.__new__(CompiledGraph)
+    compiled.ids = [blob[id_offsets[i]:id_offsets[i + 1]].decode("utf-8")
+                    for i in range(header["size"])]
+    compiled.types = [types[t] for t in column("types")]
+    compiled.x = [x if has else None for x, has in zip(xs, has_xy)]
+    compiled.y = [y if has else None for y, has in zip(ys, has_xy)]
+    # sized up front so interning never rehashes
+    compiled.index = CustomHashMap(int(header["size"] / 0.7) + 1)
+    for i, node_id in enumerate(compiled.ids):
+        compiled.index.insert(node_id, i)
+    compiled.node_count = header["node_count"]
+    compiled.size = header["size"]
+    compiled.edge_count = header["edge_count"]
+
+    compiled.offsets = column("offsets")
+    compiled.targets = column("targets")
+    compiled.energy = column("energy")
+    compiled.capacity = column("capacity")
+    # set_restricted patches this column, so it gets its own copy
+    compiled.restricted = bytearray(column("restricted"))
+    compiled.sources = column("sources")
+    compiled.rev_offsets = column("rev_offsets")
+    compiled.rev_edges = column("rev_edges")
+    compiled.energy_per_distance = header["energy_per_distance"]
+    compiled._signature = None
+    return compiled, column("bidirectional")
@@ -0,0 +1,251 @@
+import instrumentation
+from data_structure import CustomArray, CustomMinHeap, IndexedMinHeap
+
+INF = float("inf")
+
+
+class StationDistances:
+    # Energy distance from the nearest station to every node of a compiled
+    # snapshot, kept current as stations are added. A new station only changes
+    # the nodes it is strictly closer to, so only that region is searched.
+    def __init__(self, compiled, stations=()):
+        self.compiled = compiled
+        self.dist = compiled.multi_source_dijkstra(stations)
+        self._heap = IndexedMinHeap(compiled.size)
+        self._tentative = [INF] * compiled.size
+
+    # (index, new distance) for every node a station at index c would bring
+    # closer, leaving out nodes farther than limit from c. The search stops at
+    # nodes c does not improve: whatever lies behind them is already at least
+    # as close to its current station.
+    def improvements(self, c, limit=INF):
+        compiled = self.compiled
+        offsets, targets = compiled.offsets, compiled.targets
+        energy, restricted = compiled.energy, compiled.restricted
+        dist, tentative, pq = self.dist, self._tentative, self._heap
+
+        found = []
+        if dist[c] == 0:
+            return found
+        tentative[c] = 0
+        touched = [c]
+        pq.push(0, c)
+        while not pq.is_empty():
+            d, u = pq.pop()
+            found.append((u, d))
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i]:
+                    continue
+                v = targets[i]
+                nd = d + energy[i]
+                if nd >= dist[v] or nd >= tentative[v] or nd > limit:
+                    continue
+                if tentative[v] == INF:
+                    touched.append(v)
+                    pq.push(nd, v)
+                else:
+                    pq.decrease_key(v, nd)
+                tentative[v] = nd
+
+        for v in touched:
+            tentative[v] = INF
+        if instrumentation.active is not None:
+            instrumentation.active.settle(offsets, (u for u, _ in found))
+        return found
+
+    def add(self, c):
+        found = self.improvements(c)
+        for v, d in found:
+            self.dist[v] = d
+        return found
+
+
+def _existing_stations(compiled):
+    stations = CustomArray()
+    for i in range(compiled.node_count):
+        if compiled.types[i] == "charging":
+            stations.append(compiled.ids[i])
+    return stations
+
+
+# F5: the corridor-repair greedy of Graph.optimize_charging_station_placement
+# with the same picks, but without a full Dijkstra and edge scan per station.
+# Every corridor endpoint that is still uncovered waits in a max-heap keyed by
+# (distance, first uncovered occurrence in adjacency order); entries are
+# checked lazily when they reach the top, since distances only shrink and
+# corridors only become covered.
+def corridor_greedy(compiled, k, R):
+    n = compiled.node_count
+    offsets, targets, restricted = compiled.offsets, compiled.targets, compiled.restricted
+    sources = compiled.sources
+    charging = _existing_stations(compiled)
+    stations = StationDistances(compiled, charging)
+    dist = stations.dist
+
+    # occurrences of each node as corridor endpoint: 2 * slot (+ 1 on the far end)
+    occurrences = [[] for _ in range(n)]
+    for u in range(n):
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            if restricted[i] or v >= n:
+                continue
+            occurrences[u].append(2 * i)
+            occurrences[v].append(2 * i + 1)
+    first = [0] * n
+
+    def first_uncovered(x):
+        occ = occurrences[x]
+        while first[x] < len(occ):
+            slot = occ[first[x]] >> 1
+            if min(dist[sources[slot]], dist[targets[slot]]) > R:
+                return occ[first[x]]
+            first[x] += 1
+        return None
+
+    uncovered = CustomMinHeap()
+    farthest = CustomMinHeap()
+
+    def track(x):
+        farthest.push((-dist[x], x), x)
+        if dist[x] > R:
+            pos = first_uncovered(x)
+            if pos is not None:
+                uncovered.push((-dist[x], pos), x)
+
+    for x in range(n):
+        track(x)
+
+    stale = 0
+    for _ in range(k):
+        candidate = None
+        while not uncovered.is_empty():
+            (neg, pos), x = uncovered.peek()
+            if -neg != dist[x]:
+                uncovered.pop()
+                stale += 1
+                continue
+            current = first_uncovered(x)
+            if current is None:
+                uncovered.pop()
+                stale += 1
+            elif current != pos:
+                uncovered.pop()
+                stale += 1
+                uncovered.push((neg, current), x)
+            else:
+                candidate = x
+                break
+
+        if candidate is None:
+            # everything covered: the farthest node from any station
+            while not farthest.is_empty():
+                (neg, _), x = farthest.peek()
+                if -neg == dist[x]:
+                    candidate = x
+                    break
+                farthest.pop()
+                stale += 1
+
+        if candidate is None:
+            break
+
+        charging.append(compiled.ids[candidate])
+        for v, _ in stations.add(candidate):
+            if v < n:
+                track(v)
+
+    if instrumentation.active is not None:
+        instrumentation.active.stale_pops += stale
+    return charging
+
+
+# F5: adds up to k stations for an explicit objective over the demand nodes:
+# - "coverage": most demand within R of a station;
+# - "k_median": least total distance from demand to its nearest station, an
+#   unreachable node counting as more than any route;
+# - "k_center": least distance from the worst-served demand node.
+# Coverage and k-median are submodular, so candidates are picked with the
+# lazy greedy (CELF): a gain computed in an earlier round is an upper bound,
+# and only the top of the heap is re-evaluated. k-center is farthest-first
+# and puts stations on demand nodes. Returns existing plus new station ids.
+def place_stations(compiled, k, objective="k_median", R=None, demand=None, candidates=None):
+    n = compiled.node_count
+    if objective == "coverage" and R is None:
+        raise ValueError("the coverage objective needs a radius R")
+    if objective == "k_center" and candidates is not None:
+        raise ValueError("k_center places stations on demand nodes")
+    if objective not in ("coverage", "k_median", "k_center"):
+        raise ValueError(f"unknown objective {objective!r}")
+
+    weight = [0] * compiled.size
+    for node_id in (compiled.ids[:n] if demand is None else demand):
+        i = compiled.node_index(node_id)
+        if i is None:
+            raise KeyError(node_id)
+        weight[i] = 1
+
+    charging = _existing_stations(compiled)
+    stations = StationDistances(compiled, charging)
+    dist = stations.dist
+
+    if objective == "k_center":
+        farthest = CustomMinHeap()
+        for x in range(n):
+            if weight[x]:
+                farthest.push((-dist[x], x), x)
+        for _ in range(k):
+            candidate = None
+            while not farthest.is_empty():
+                (neg, _), x = farthest.pop()
+                if -neg == dist[x]:
+                    candidate = x
+                    break
+            if candidate is None or dist[candidate] == 0:
+                break
+            charging.append(compiled.ids[candidate])
+            for v, d in stations.add(candidate):
+                if weight[v]:
+                    farthest.push((-d, v), v)
+        return charging
+
+    if objective == "coverage":
+        def gain(c):
+            return sum(weight[v] for v, _ in stations.improvements(c, R) if dist[v] > R)
+    else:
+        penalty = 1
+        for i in range(compiled.edge_count):
+            if not compiled.restricted[i]:
+                penalty += compiled.energy[i]
+
+        def gain(c):
+            return sum(weight[v] * (min(dist[v], penalty) - d) for v, d in stations.improvements(c))
+
+    if candidates is None:
+        pool = range(n)
+    else:
+        pool = []
+        for node_id in candidates:
+            i = compiled.node_index(node_id)
+            if i is None:
+                raise KeyError(node_id)
+            pool.append(i)
+
+    # entries are ((-gain, index), (index, round the gain was computed in))
+    pq = CustomMinHeap()
+    for c in pool:
+        pq.push((-gain(c), c), (c, 0))
+
+    for step in range(k):
+        best = None
+        while not pq.is_empty():
+            (neg, _), (c, evaluated) = pq.pop()
+            if evaluated == step:
+                best = c
+                break
+            pq.push((-gain(c), c), (c, step))
+        if best is None or neg >= 0:
+            break
+        charging.append(compiled.ids[best])
+        stations.add(best)
+
+    return charging
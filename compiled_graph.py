@@ -0,0 +1,650 @@
+import hashlib
+import math
+import instrumentation
+from data_structure import CustomHashMap, CustomMinHeap, IndexedMinHeap, combine_hash, custom_hash
+
+
+class CompiledGraph:
+    # Read-only CSR snapshot of a Graph. Node ids are interned to 0..n-1 and the
+    # outgoing edges of node i live in the slots offsets[i] .. offsets[i + 1] - 1
+    # of the targets/energy/capacity/restricted columns.
+
+    # columns that ScenarioView overlays still share with this snapshot; they
+    # are copied before the snapshot patches them (see _writable)
+    _shared = frozenset()
+    _slot_index = None                       # (u, v) → slot, built on first use
+    removed = None                           # slot → 1 once removed, None until the first removal
+    tombstones = 0                           # removed slots still in the columns
+    def __init__(self, graph):
+        self.ids = []                        # index → id
+        self.types = []                      # index → node type
+        self.x = []                          # index → x coordinate or None
+        self.y = []                          # index → y coordinate or None
+        self.index = CustomHashMap()         # id → index
+
+        for node_id, node in graph.nodes.items():
+            self._intern(node_id, node.type, node.x, node.y)
+        self.node_count = len(self.ids)
+
+        rows = [graph.adj.search(self.ids[i]) or [] for i in range(self.node_count)]
+
+        self.offsets = [0]
+        self.targets = []
+        self.energy = []
+        self.capacity = []
+        self.restricted = bytearray()
+
+        # the Edge fields are read from their slots, not through the
+        # properties that route writes back to the graph
+        for edges in rows:
+            for e in edges:
+                v = self.index.search(e.v)
+                if v is None:
+                    # edge into an id that was never added as a node
+                    v = self._intern(e.v, None, None, None)
+                self.targets.append(v)
+                self.energy.append(e._energy)
+                self.capacity.append(e._capacity)
+                self.restricted.append(1 if e._restricted else 0)
+            self.offsets.append(len(self.targets))
+
+        # dangling targets have no outgoing edges
+        for _ in range(self.node_count, len(self.ids)):
+            self.offsets.append(len(self.targets))
+
+        self.size = len(self.ids)
+        self.edge_count = len(self.targets)
+        self._build_reverse()
+        self.energy_per_distance = self._calibrate_heuristic()
+        self._signature = None
+
+    # Reverse CSR: the edges entering v are the forward slots
+    # rev_edges[rev_offsets[v]] .. rev_edges[rev_offsets[v + 1] - 1], so
+    # energy and restricted are read from the same columns in both directions.
+    def _build_reverse(self):
+        self.sources = [0] * self.edge_count
+        self.rev_offsets = [0] * (self.size + 1)
+        for u in range(self.size):
+            for i in range(self.offsets[u], self.offsets[u + 1]):
+                self.sources[i] = u
+                self.rev_offsets[self.targets[i] + 1] += 1
+        for v in range(self.size):
+            self.rev_offsets[v + 1] += self.rev_offsets[v]
+
+        self.rev_edges = [0] * self.edge_count
+        fill = self.rev_offsets[:-1]
+        for i in range(self.edge_count):
+            v = self.targets[i]
+            self.rev_edges[fill[v]] = i
+            fill[v] += 1
+
+    def _intern(self, node_id, node_type, x, y):
+        idx = len(self.ids)
+        self.ids.append(node_id)
+        self.types.append(node_type)
+        self.x.append(x)
+        self.y.append(y)
+        self.index.insert(node_id, idx)
+        return idx
+
+    # Smallest energy / straight-line length over all corridors. Flying from u
+    # to t then costs at least ratio * |ut|, which keeps the A* heuristic
+    # admissible and consistent. Returns 0 (plain Dijkstra) when any node has
+    # no coordinates.
+    def _calibrate_heuristic(self):
+        x, y = self.x, self.y
+        for i in range(self.size):
+            if x[i] is None or y[i] is None:
+                return 0
+
+        ratio = None
+        for u in range(self.size):
+            for i in range(self.offsets[u], self.offsets[u + 1]):
+                v = self.targets[i]
+                length = math.hypot(x[u] - x[v], y[u] - y[v])
+                if length == 0:
+                    continue
+                r = self.energy[i] / length
+                if ratio is None or r < ratio:
+                    ratio = r
+        if ratio is None or ratio <= 0:
+            return 0
+        # shave off float rounding so h(u) <= w(u, v) + h(v) holds exactly
+        return ratio * (1 - 1e-9)
+
+    def node_index(self, node_id):
+        return self.index.search(node_id)
+
+    # Columns of a snapshot read by Graph.load_binary are memoryviews into the
+    # file; they are copied out when the snapshot is sent to worker processes.
+    # The slot index is left behind and rebuilt there if needed.
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name, value in state.items():
+            if isinstance(value, memoryview):
+                state[name] = value.tolist()
+        state.pop("_slot_index", None)
+        return state
+
+    # (u, v) → slot of that corridor, or a tuple of slots when the snapshot
+    # came from a file with parallel corridors. It is never changed once
+    # built (removal only flags the slot), so overlays share it.
+    def _corridor_index(self):
+        index = self._slot_index
+        if index is None:
+            ids, offsets, targets = self.ids, self.offsets, self.targets
+            codes = [custom_hash(node_id) for node_id in ids]
+            index = CustomHashMap(int(self.edge_count / 0.7) + 1)
+            for u in range(self.size):
+                uid, ucode = ids[u], codes[u]
+                for i in range(offsets[u], offsets[u + 1]):
+                    v = targets[i]
+                    key = (uid, ids[v])
+                    code = combine_hash(ucode, codes[v])
+                    slot = index.setdefault(key, i, code)
+                    if slot != i:
+                        index.insert(key, (slot, i) if isinstance(slot, int) else slot + (i,), code)
+            self._slot_index = index
+        return index
+
+    # slots of the corridor u → v that were not removed; code is
+    # custom_hash((u, v)) if the caller already has it
+    def corridor_slots(self, u, v, code=None):
+        slots = self._corridor_index().search((u, v), code)
+        if slots is None:
+            return ()
+        if isinstance(slots, int):
+            slots = (slots,)
+        if self.removed is not None:
+            slots = tuple(i for i in slots if not self.removed[i])
+        return slots
+
+    def set_restricted(self, u, v, restricted=True, code=None):
+        for i in self.corridor_slots(u, v, code):
+            self.restricted[i] = 1 if restricted else 0
+        self._signature = None
+
+    # B3: tombstones the slots of u → v. They stay in the columns, closed like
+    # restricted ones, so every search already skips them; Graph rebuilds the
+    # snapshot once they pile up.
+    def remove_corridor(self, u, v, code=None):
+        slots = self.corridor_slots(u, v, code)
+        if not slots:
+            return False
+        if self.removed is None:
+            self.removed = bytearray(self.edge_count)
+        removed = self._writable("removed")
+        for i in slots:
+            removed[i] = 1
+            self.restricted[i] = 1
+        self.tombstones += len(slots)
+        self._signature = None
+        return True
+
+    def set_energy(self, u, v, energy, code=None):
+        column = self._writable("energy")
+        for i in self.corridor_slots(u, v, code):
+            column[i] = energy
+            # a cheaper corridor can lower the A* ratio; a dearer one leaves
+            # the old ratio a valid lower bound
+            if self.energy_per_distance:
+                ui, vi = self.sources[i], self.targets[i]
+                length = math.hypot(self.x[ui] - self.x[vi], self.y[ui] - self.y[vi])
+                if length and energy / length < self.energy_per_distance:
+                    self.energy_per_distance = max(energy / length * (1 - 1e-9), 0)
+        self._signature = None
+
+    def set_capacity(self, u, v, capacity, code=None):
+        column = self._writable("capacity")
+        for i in self.corridor_slots(u, v, code):
+            column[i] = capacity
+
+    # the named column as a list (or bytearray) this snapshot may change:
+    # load_binary columns are read-only views of the file, and ones a
+    # ScenarioView shares must stay as the view saw them
+    def _writable(self, name):
+        column = getattr(self, name)
+        if name in self._shared or isinstance(column, memoryview):
+            column = bytearray(column) if isinstance(column, bytearray) else list(column)
+            setattr(self, name, column)
+            self._shared = self._shared - {name}
+        return column
+
+    # Fingerprint of everything routing depends on. Data precomputed from a
+    # snapshot (such as a contraction hierarchy) is valid while it matches.
+    def signature(self):
+        if self._signature is None:
+            digest = hashlib.sha1()
+            for column in (self.ids, self.offsets, self.targets, self.energy):
+                digest.update(repr(list(column)).encode())
+            digest.update(bytes(self.restricted))
+            self._signature = digest.hexdigest()
+        return self._signature
+
+    def _path(self, prev, target):
+        path = []
+        cur = target
+        while cur != -1:
+            path.append(self.ids[cur])
+            cur = prev[cur]
+        path.reverse()
+        return path
+
+    # instrumentation: nodes a Dijkstra-style search settled, i.e. reached and
+    # no longer queued; `last` was popped but not scanned
+    def _record_settled(self, dist, pq, last=-1):
+        scanned = (u for u in range(self.size)
+                   if dist[u] is not None and u != last and not pq.contains(u))
+        instrumentation.active.settle(self.offsets, scanned, 1 if last != -1 else 0)
+
+    # instrumentation: battery labels popped, the dominated ones being stale
+    def _record_labels(self, popped, stale):
+        stats = instrumentation.active
+        if stats is not None:
+            stats.nodes_settled += popped - stale
+            stats.stale_pops += stale
+
+    # F1
+    def reachable(self, start):
+        visited = bytearray(self.size)
+        s = self.index.search(start)
+        if s is None:
+            return visited
+
+        offsets, targets, restricted = self.offsets, self.targets, self.restricted
+        stack = [s]
+        while stack:
+            u = stack.pop()
+            if visited[u]:
+                continue
+            visited[u] = 1
+            for i in range(offsets[u], offsets[u + 1]):
+                if not restricted[i] and not visited[targets[i]]:
+                    stack.append(targets[i])
+        if instrumentation.active is not None:
+            instrumentation.active.settle(offsets, (u for u in range(self.size) if visited[u]))
+        return visited
+
+    # F2
+    def dijkstra(self, start, target):
+        s = self.index.search(start)
+        t = self.index.search(target)
+        if s is None or t is None:
+            if start == target:
+                return 0, [start]
+            return float("inf"), []
+
+        offsets, targets = self.offsets, self.targets
+        energy, restricted = self.energy, self.restricted
+        dist = [None] * self.size
+        prev = [-1] * self.size
+        dist[s] = 0
+
+        # each node sits in the heap at most once; popping it settles it
+        pq = IndexedMinHeap(self.size)
+        pq.push(0, s)
+        while not pq.is_empty():
+            cost, u = pq.pop()
+            if u == t:
+                if instrumentation.active is not None:
+                    self._record_settled(dist, pq, t)
+                return cost, self._path(prev, t)
+
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i]:
+                    continue
+                v = targets[i]
+                new_cost = cost + energy[i]
+                if dist[v] is None:
+                    dist[v] = new_cost
+                    prev[v] = u
+                    pq.push(new_cost, v)
+                elif new_cost < dist[v] and pq.contains(v):
+                    dist[v] = new_cost
+                    prev[v] = u
+                    pq.decrease_key(v, new_cost)
+        if instrumentation.active is not None:
+            self._record_settled(dist, pq)
+        return float("inf"), []
+
+    # F2: alternately settles the cheaper of the forward frontier (out of start)
+    # and the backward frontier (into target). best is the cheapest start→target
+    # path seen through any edge joining the two; once the two heap minima add
+    # up to at least best, no undiscovered path can beat it.
+    def bidirectional_dijkstra(self, start, target):
+        s = self.index.search(start)
+        t = self.index.search(target)
+        if s is None or t is None or s == t:
+            return self.dijkstra(start, target)
+
+        offsets, targets, sources = self.offsets, self.targets, self.sources
+        rev_offsets, rev_edges = self.rev_offsets, self.rev_edges
+        energy, restricted = self.energy, self.restricted
+
+        dist_f = [None] * self.size
+        dist_b = [None] * self.size
+        prev = [-1] * self.size              # forward tree, towards start
+        succ = [-1] * self.size              # backward tree, towards target
+        dist_f[s] = 0
+        dist_b[t] = 0
+        pq_f = IndexedMinHeap(self.size)
+        pq_b = IndexedMinHeap(self.size)
+        pq_f.push(0, s)
+        pq_b.push(0, t)
+
+        best = float("inf")
+        meet_u, meet_v = -1, -1              # best path uses edge meet_u → meet_v
+
+        while not pq_f.is_empty() and not pq_b.is_empty():
+            top_f = pq_f.peek()[0]
+            top_b = pq_b.peek()[0]
+            if top_f + top_b >= best:
+                break
+
+            if top_f <= top_b:
+                d, u = pq_f.pop()
+                for i in range(offsets[u], offsets[u + 1]):
+                    if restricted[i]:
+                        continue
+                    v = targets[i]
+                    new_cost = d + energy[i]
+                    if dist_f[v] is None:
+                        dist_f[v] = new_cost
+                        prev[v] = u
+                        pq_f.push(new_cost, v)
+                    elif new_cost < dist_f[v] and pq_f.contains(v):
+                        dist_f[v] = new_cost
+                        prev[v] = u
+                        pq_f.decrease_key(v, new_cost)
+                    if dist_b[v] is not None and new_cost + dist_b[v] < best:
+                        best = new_cost + dist_b[v]
+                        meet_u, meet_v = u, v
+            else:
+                d, v = pq_b.pop()
+                for j in range(rev_offsets[v], rev_offsets[v + 1]):
+                    i = rev_edges[j]
+                    if restricted[i]:
+                        continue
+                    u = sources[i]
+                    new_cost = d + energy[i]
+                    if dist_b[u] is None:
+                        dist_b[u] = new_cost
+                        succ[u] = v
+                        pq_b.push(new_cost, u)
+                    elif new_cost < dist_b[u] and pq_b.contains(u):
+                        dist_b[u] = new_cost
+                        succ[u] = v
+                        pq_b.decrease_key(u, new_cost)
+                    if dist_f[u] is not None and dist_f[u] + new_cost < best:
+                        best = dist_f[u] + new_cost
+                        meet_u, meet_v = u, v
+
+        stats = instrumentation.active
+        if stats is not None:
+            self._record_settled(dist_f, pq_f)
+            stats.settle(rev_offsets, (v for v in range(self.size)
+                                       if dist_b[v] is not None and not pq_b.contains(v)))
+
+        if meet_u == -1:
+            return float("inf"), []
+
+        path = self._path(prev, meet_u)
+        cur = meet_v
+        while cur != -1:
+            path.append(self.ids[cur])
+            cur = succ[cur]
+        return best, path
+
+    # F2: same result as dijkstra, but nodes are popped by cost + heuristic
+    def astar(self, start, target):
+        s = self.index.search(start)
+        t = self.index.search(target)
+        ratio = self.energy_per_distance
+        if s is None or t is None or ratio == 0:
+            return self.dijkstra(start, target)
+
+        offsets, targets = self.offsets, self.targets
+        energy, restricted = self.energy, self.restricted
+        x, y = self.x, self.y
+        tx, ty = x[t], y[t]
+        hypot = math.hypot
+        dist = [None] * self.size
+        prev = [-1] * self.size
+        closed = bytearray(self.size)
+        dist[s] = 0
+
+        pq = IndexedMinHeap(self.size)
+        pq.push(ratio * hypot(x[s] - tx, y[s] - ty), s)
+        while not pq.is_empty():
+            _, u = pq.pop()
+            if u == t:
+                if instrumentation.active is not None:
+                    instrumentation.active.settle(offsets, (v for v in range(self.size) if closed[v]), 1)
+                return dist[t], self._path(prev, t)
+            closed[u] = 1
+
+            cost = dist[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i]:
+                    continue
+                v = targets[i]
+                new_cost = cost + energy[i]
+                if dist[v] is None:
+                    dist[v] = new_cost
+                    prev[v] = u
+                    pq.push(new_cost + ratio * hypot(x[v] - tx, y[v] - ty), v)
+                elif new_cost < dist[v] and not closed[v]:
+                    dist[v] = new_cost
+                    prev[v] = u
+                    pq.decrease_key(v, new_cost + ratio * hypot(x[v] - tx, y[v] - ty))
+        if instrumentation.active is not None:
+            instrumentation.active.settle(offsets, (v for v in range(self.size) if closed[v]))
+        return float("inf"), []
+
+    # F2: cheapest route for a drone that leaves start with a full battery,
+    # spends each corridor's energy from it and recharges to full at every
+    # charging node it reaches. Returns (cost, path, recharge stops).
+    #
+    # States are labels (energy spent, charge left) at a node, popped in order
+    # of energy spent (more charge first on ties). A popped label is dominated
+    # unless it has more charge than every label already settled at its node,
+    # which are all at least as cheap, so one number per node does the pruning.
+    def route_with_battery(self, start, target, battery_capacity):
+        s = self.index.search(start)
+        t = self.index.search(target)
+        if s is None or t is None:
+            if start == target:
+                return 0, [start], []
+            return float("inf"), [], []
+
+        offsets, targets = self.offsets, self.targets
+        energy, restricted, types = self.energy, self.restricted, self.types
+        best = [-1] * self.size              # most charge settled at each node
+
+        # label columns: node, charge after any recharge, parent label, recharged
+        node, charge, parent, recharged = [s], [battery_capacity], [-1], [False]
+        pq = CustomMinHeap()
+        pq.push((0, -battery_capacity), 0)
+        stale = 0
+        while not pq.is_empty():
+            (cost, _), label = pq.pop()
+            u = node[label]
+            q = charge[label]
+            if q <= best[u]:
+                stale += 1
+                continue
+            best[u] = q
+            if u == t:
+                self._record_labels(len(node) - len(pq.data), stale)
+                path = []
+                stops = []
+                while label != -1:
+                    path.append(self.ids[node[label]])
+                    if recharged[label]:
+                        stops.append(self.ids[node[label]])
+                    label = parent[label]
+                path.reverse()
+                stops.reverse()
+                return cost, path, stops
+
+            for i in range(offsets[u], offsets[u + 1]):
+                w = energy[i]
+                if restricted[i] or w > q:
+                    continue
+                v = targets[i]
+                left = q - w
+                stop = False
+                if types[v] == "charging" and v != t and left < battery_capacity:
+                    left = battery_capacity
+                    stop = True
+                if left <= best[v]:
+                    continue
+                node.append(v)
+                charge.append(left)
+                parent.append(label)
+                recharged.append(stop)
+                pq.push((cost + w, -left), len(node) - 1)
+        self._record_labels(len(node), stale)
+        return float("inf"), [], []
+
+    # F2: Dijkstra from start that stops once every target is settled (or runs
+    # to exhaustion without targets). Returns index-based dist and prev lists.
+    def shortest_path_tree(self, start, targets=None):
+        offsets, targets_col = self.offsets, self.targets
+        energy, restricted = self.energy, self.restricted
+        dist = [None] * self.size
+        prev = [-1] * self.size
+
+        s = self.index.search(start)
+        if s is None:
+            return dist, prev
+
+        pending = bytearray(self.size)
+        remaining = 0
+        if targets is not None:
+            for target in targets:
+                t = self.index.search(target)
+                if t is not None and not pending[t]:
+                    pending[t] = 1
+                    remaining += 1
+            if remaining == 0:
+                return dist, prev
+
+        dist[s] = 0
+        pq = IndexedMinHeap(self.size)
+        pq.push(0, s)
+        while not pq.is_empty():
+            cost, u = pq.pop()
+            if pending[u]:
+                remaining -= 1
+                if remaining == 0:
+                    if instrumentation.active is not None:
+                        self._record_settled(dist, pq, u)
+                    return dist, prev
+
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i]:
+                    continue
+                v = targets_col[i]
+                new_cost = cost + energy[i]
+                if dist[v] is None:
+                    dist[v] = new_cost
+                    prev[v] = u
+                    pq.push(new_cost, v)
+                elif new_cost < dist[v] and pq.contains(v):
+                    dist[v] = new_cost
+                    prev[v] = u
+                    pq.decrease_key(v, new_cost)
+        if instrumentation.active is not None:
+            self._record_settled(dist, pq)
+        return dist, prev
+
+    # (cost, path) to target out of a shortest_path_tree result
+    def tree_route(self, tree, start, target):
+        dist, prev = tree
+        t = self.index.search(target)
+        if t is None or dist[t] is None:
+            if start == target:
+                return 0, [start]
+            return float("inf"), []
+        return dist[t], self._path(prev, t)
+
+    # F5
+    def multi_source_dijkstra(self, sources):
+        offsets, targets = self.offsets, self.targets
+        energy, restricted = self.energy, self.restricted
+        INF = float("inf")
+        dist = [INF] * self.size
+
+        pq = IndexedMinHeap(self.size)
+        for source in sources:
+            s = self.index.search(source)
+            if s is None or pq.contains(s):
+                continue
+            dist[s] = 0
+            pq.push(0, s)
+
+        while not pq.is_empty():
+            d, u = pq.pop()
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i]:
+                    continue
+                v = targets[i]
+                nd = d + energy[i]
+                if nd < dist[v]:
+                    if dist[v] == INF:
+                        pq.push(nd, v)
+                    elif pq.contains(v):
+                        pq.decrease_key(v, nd)
+                    else:
+                        continue
+                    dist[v] = nd
+        if instrumentation.active is not None:
+            instrumentation.active.settle(offsets, (u for u in range(self.size) if dist[u] != INF))
+        return dist
+
+    # F6: key[v] is the cheapest corridor from the tree into v
+    def prim(self, start):
+        offsets, targets = self.offsets, self.targets
+        energy, restricted = self.energy, self.restricted
+        ids = self.ids
+        mst = []
+        total_cost = 0
+
+        s = self.index.search(start)
+        if s is None:
+            return mst, total_cost
+
+        in_tree = bytearray(self.size)
+        parent = [-1] * self.size
+        key = [None] * self.size
+        min_heap = IndexedMinHeap(self.size)
+
+        u = s
+        in_tree[u] = 1
+        tree_size = 1
+        while True:
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if restricted[i] or in_tree[v]:
+                    continue
+                if key[v] is None:
+                    key[v] = energy[i]
+                    parent[v] = u
+                    min_heap.push(energy[i], v)
+                elif energy[i] < key[v]:
+                    key[v] = energy[i]
+                    parent[v] = u
+                    min_heap.decrease_key(v, energy[i])
+
+            if min_heap.is_empty() or tree_size >= self.node_count:
+                break
+            cost, u = min_heap.pop()
+            in_tree[u] = 1
+            tree_size += 1
+            mst.append((ids[parent[u]], ids[u], cost))
+            total_cost += cost
+
+        if instrumentation.active is not None:
+            instrumentation.active.settle(offsets, (u for u in range(self.size) if in_tree[u]))
+        return mst, total_cost
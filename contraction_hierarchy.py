@@ -0,0 +1,286 @@
+import json
+from data_structure import CustomHashMap, IndexedMinHeap
+
+FORMAT_VERSION = 1
+
+
+class _WitnessSearch:
+    # Dijkstra restricted to the not-yet-contracted graph, bounded by a cost limit
+    # and a number of settled nodes. Arrays are reused between searches.
+    def __init__(self, n, settle_limit):
+        self.dist = [None] * n
+        self.touched = []
+        self.heap = IndexedMinHeap(n)
+        self.settle_limit = settle_limit
+
+    def run(self, source, skip, limit, out_edges):
+        dist, heap = self.dist, self.heap
+        for node in self.touched:
+            dist[node] = None
+        heap.clear()
+        self.touched = [source]
+        dist[source] = 0
+        heap.push(0, source)
+
+        settled = 0
+        while not heap.is_empty():
+            d, u = heap.pop()
+            if d > limit:
+                break
+            settled += 1
+            if settled > self.settle_limit:
+                break
+            for w, cost in out_edges[u].items():
+                if w == skip:
+                    continue
+                nd = d + cost
+                if dist[w] is None:
+                    dist[w] = nd
+                    self.touched.append(w)
+                    heap.push(nd, w)
+                elif nd < dist[w] and heap.contains(w):
+                    dist[w] = nd
+                    heap.decrease_key(w, nd)
+
+
+class ContractionHierarchy:
+    # Nodes are contracted one by one, least important first (rank 0). Contracting
+    # v adds a shortcut u → w of energy(u, v) + energy(v, w) unless a witness path
+    # that avoids v is no more expensive. A query then only follows edges that go
+    # up in rank, forward from start and backward from target.
+    #
+    # The hierarchy is valid for exactly the topology it was built from: any
+    # add_node, add_edge or set_restricted on the graph invalidates it. This is
+    # checked through CompiledGraph.signature(), which is stored in the file.
+    def __init__(self, ids, rank, up, down, middle, signature):
+        self.ids = ids
+        self.rank = rank
+        self.up_offsets, self.up_targets, self.up_energy = up
+        self.down_offsets, self.down_sources, self.down_energy = down
+        self.middle = middle                  # (u, w) → contracted node of a shortcut
+        self.signature = signature
+
+        self.index = CustomHashMap()
+        for i, node_id in enumerate(ids):
+            self.index.insert(node_id, i)
+
+        n = len(ids)
+        self._dist_f = [None] * n
+        self._dist_b = [None] * n
+        self._prev_f = [-1] * n
+        self._prev_b = [-1] * n
+        self._heap_f = IndexedMinHeap(n)
+        self._heap_b = IndexedMinHeap(n)
+
+    @classmethod
+    def build(cls, compiled, settle_limit=500):
+        n = compiled.size
+        out_edges = [{} for _ in range(n)]    # u → {w: energy} among uncontracted nodes
+        in_edges = [{} for _ in range(n)]     # w → {u: energy}
+        for u in range(n):
+            for i in range(compiled.offsets[u], compiled.offsets[u + 1]):
+                w = compiled.targets[i]
+                if compiled.restricted[i] or w == u:
+                    continue
+                cost = compiled.energy[i]
+                if w not in out_edges[u] or cost < out_edges[u][w]:
+                    out_edges[u][w] = cost
+                    in_edges[w][u] = cost
+
+        witness = _WitnessSearch(n, settle_limit)
+        deleted_neighbours = [0] * n
+        middle = {}
+
+        def shortcuts(v):
+            result = []
+            outs = out_edges[v]
+            if not outs:
+                return result
+            max_out = max(outs.values())
+            for u, cost_uv in in_edges[v].items():
+                witness.run(u, v, cost_uv + max_out, out_edges)
+                for w, cost_vw in outs.items():
+                    if w == u:
+                        continue
+                    cost = cost_uv + cost_vw
+                    d = witness.dist[w]
+                    if d is None or d > cost:
+                        result.append((u, w, cost))
+            return result
+
+        # edge difference, plus a term that spreads contraction over the graph
+        def importance(v):
+            added = len(shortcuts(v))
+            return added - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbours[v]
+
+        queue = IndexedMinHeap(n)
+        for v in range(n):
+            queue.push(importance(v), v)
+
+        rank = [0] * n
+        up = [None] * n
+        down = [None] * n
+        order = 0
+        while not queue.is_empty():
+            _, v = queue.pop()
+            # lazy update: contracting neighbours may have made v more important
+            priority = importance(v)
+            if not queue.is_empty() and priority > queue.peek()[0]:
+                queue.push(priority, v)
+                continue
+
+            rank[v] = order
+            order += 1
+            up[v] = list(out_edges[v].items())
+            down[v] = list(in_edges[v].items())
+
+            for u, w, cost in shortcuts(v):
+                out_edges[u][w] = cost
+                in_edges[w][u] = cost
+                middle[(u, w)] = v
+
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                deleted_neighbours[u] += 1
+            for w in out_edges[v]:
+                del in_edges[w][v]
+                deleted_neighbours[w] += 1
+            out_edges[v] = {}
+            in_edges[v] = {}
+
+        return cls(list(compiled.ids), rank, _to_csr(up), _to_csr(down),
+                   middle, compiled.signature())
+
+    def is_valid_for(self, graph):
+        return self.signature == graph.compile().signature()
+
+    # F2: same (cost, path) as Graph.dijkstra
+    def query(self, start, target):
+        s = self.index.search(start)
+        t = self.index.search(target)
+        if s is None or t is None or s == t:
+            if start == target:
+                return 0, [start]
+            return float("inf"), []
+
+        dist_f, dist_b = self._dist_f, self._dist_b
+        prev_f, prev_b = self._prev_f, self._prev_b
+        heap_f, heap_b = self._heap_f, self._heap_b
+        touched = [s, t]
+        dist_f[s] = 0
+        dist_b[t] = 0
+        heap_f.push(0, s)
+        heap_b.push(0, t)
+
+        best = float("inf")
+        meet = -1
+        INF = float("inf")
+        while True:
+            top_f = heap_f.peek()[0] if not heap_f.is_empty() else INF
+            top_b = heap_b.peek()[0] if not heap_b.is_empty() else INF
+            if min(top_f, top_b) >= best:
+                break
+
+            if top_f <= top_b:
+                d, u = heap_f.pop()
+                if dist_b[u] is not None and d + dist_b[u] < best:
+                    best = d + dist_b[u]
+                    meet = u
+                self._relax(u, d, self.up_offsets, self.up_targets, self.up_energy,
+                            dist_f, prev_f, heap_f, touched)
+            else:
+                d, u = heap_b.pop()
+                if dist_f[u] is not None and d + dist_f[u] < best:
+                    best = d + dist_f[u]
+                    meet = u
+                self._relax(u, d, self.down_offsets, self.down_sources, self.down_energy,
+                            dist_b, prev_b, heap_b, touched)
+
+        path = []
+        if meet != -1:
+            up_path = []
+            cur = meet
+            while cur != -1:
+                up_path.append(cur)
+                cur = prev_f[cur]
+            up_path.reverse()
+            cur = prev_b[meet]
+            while cur != -1:
+                up_path.append(cur)
+                cur = prev_b[cur]
+            path = self._unpack(up_path)
+
+        for node in touched:
+            dist_f[node] = dist_b[node] = None
+            prev_f[node] = prev_b[node] = -1
+        heap_f.clear()
+        heap_b.clear()
+        return best, path
+
+    def _relax(self, u, d, offsets, neighbours, energy, dist, prev, heap, touched):
+        for i in range(offsets[u], offsets[u + 1]):
+            v = neighbours[i]
+            nd = d + energy[i]
+            if dist[v] is None:
+                dist[v] = nd
+                prev[v] = u
+                heap.push(nd, v)
+                touched.append(v)
+            elif nd < dist[v] and heap.contains(v):
+                dist[v] = nd
+                prev[v] = u
+                heap.decrease_key(v, nd)
+
+    # expand shortcuts recursively back into original corridors
+    def _unpack(self, nodes):
+        path = [self.ids[nodes[0]]]
+        for i in range(len(nodes) - 1):
+            stack = [(nodes[i], nodes[i + 1])]
+            while stack:
+                u, w = stack.pop()
+                v = self.middle.get((u, w))
+                if v is None:
+                    path.append(self.ids[w])
+                else:
+                    stack.append((v, w))
+                    stack.append((u, v))
+        return path
+
+    def save(self, filepath):
+        data = {
+            "version": FORMAT_VERSION,
+            "signature": self.signature,
+            "ids": self.ids,
+            "rank": self.rank,
+            "up": [self.up_offsets, self.up_targets, self.up_energy],
+            "down": [self.down_offsets, self.down_sources, self.down_energy],
+            "shortcuts": [[u, w, v] for (u, w), v in self.middle.items()],
+        }
+        with open(filepath, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, filepath, graph=None):
+        with open(filepath, "r") as f:
+            data = json.load(f)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported hierarchy format version {data.get('version')}")
+
+        middle = {(u, w): v for u, w, v in data["shortcuts"]}
+        hierarchy = cls(data["ids"], data["rank"], data["up"], data["down"],
+                        middle, data["signature"])
+        if graph is not None and not hierarchy.is_valid_for(graph):
+            raise ValueError("contraction hierarchy was built for a different topology")
+        return hierarchy
+
+
+def _to_csr(rows):
+    offsets = [0]
+    neighbours = []
+    energy = []
+    for row in rows:
+        for v, cost in row:
+            neighbours.append(v)
+            energy.append(cost)
+        offsets.append(len(neighbours))
+    return offsets, neighbours, energy
@@ -1,20 +1,24 @@
 class Node:
+    __slots__ = ("data", "next")
+
     def __init__(self, data):
         self.data = data
         self.next = None
 
 class LinkedList:
+    __slots__ = ("head", "tail")
+
     def __init__(self):
         self.head = None
+        self.tail = None
     def append(self, data):
         new_node = Node(data)
         if not self.head:
             self.head = new_node
+            self.tail = new_node
             return
-        current = self.head
-        while current.next:
-            current = current.next
-        current.next = new_node
+        self.tail.next = new_node
+        self.tail = new_node
     def find(self, key):
         current = self.head
         while current:
@@ -31,6 +35,8 @@ class LinkedList:
                     prev.next = current.next
                 else:
                     self.head = current.next
+                if current is self.tail:
+                    self.tail = prev
                 return True
             prev = current
             current = current.next
@@ -41,46 +47,112 @@ class LinkedList:
             yield current.data
             current = current.next
 
+# Polynomial rolling hash kept within 32 bits, so long ids never turn into big ints.
+# A tuple such as a (u, v) corridor key combines the hashes of its parts, which
+# skips hashing the quotes and separators of its str().
 def custom_hash(name):
+    if type(name) is tuple:
+        code = 0
+        for part in name:
+            code = combine_hash(code, custom_hash(part))
+        return code
     code = 0
-    for i, c in enumerate(str(name)):
-        code+= ord(c)*(31**i)
+    for c in str(name):
+        code = (code * 31 + ord(c)) & 0xFFFFFFFF
     return code
 
+# custom_hash((a, b)) is combine_hash(custom_hash(a), custom_hash(b)), so a
+# caller that already has the parts' hashes can pass the pair's as code=
+def combine_hash(code, part_code):
+    return (code * 1000003 + part_code) & 0xFFFFFFFF
+
 class CustomHashMap:
-    def __init__(self, bucket_count = 73):
+    # Buckets are created on first use, so the empty ones cost one slot each.
+    def __init__(self, bucket_count = 73, load_factor = 0.7):
         self.bucket_count = bucket_count
-        self.table = [LinkedList() for _ in range(bucket_count)]
-    def _bucket_index(self, key):
-        return custom_hash(key) % self.bucket_count
-    def insert(self, key, value):
-        idx = self._bucket_index(key)
+        self.load_factor = load_factor
+        self.size = 0
+        self.table = [None] * bucket_count
+    def insert(self, key, value, code=None):
+        if code is None:
+            code = custom_hash(key)
+        idx = code % self.bucket_count
         bucket = self.table[idx]
+        if bucket is None:
+            bucket = self.table[idx] = LinkedList()
         node = bucket.find(key)
         if node:
-            node.data[1] = value
+            node.data = (key, value, code)
         else:
-            bucket.append([key, value])
-    def search(self, key):
-        idx = self._bucket_index(key)
+            # the hash is stored with the pair so rehashing never recomputes it
+            bucket.append((key, value, code))
+            self.size += 1
+            if self.size > self.bucket_count * self.load_factor:
+                self._resize(self.bucket_count * 2 + 1)
+    # the value stored under key; when there is none, value is inserted and
+    # returned (one hash instead of a search followed by an insert)
+    def setdefault(self, key, value, code=None):
+        if code is None:
+            code = custom_hash(key)
+        idx = code % self.bucket_count
         bucket = self.table[idx]
+        if bucket is None:
+            bucket = self.table[idx] = LinkedList()
+        node = bucket.find(key)
+        if node:
+            return node.data[1]
+        bucket.append((key, value, code))
+        self.size += 1
+        if self.size > self.bucket_count * self.load_factor:
+            self._resize(self.bucket_count * 2 + 1)
+        return value
+    # code: custom_hash(key), when the caller already has it (one key looked
+    # up in several maps is hashed once)
+    def search(self, key, code=None):
+        if code is None:
+            code = custom_hash(key)
+        bucket = self.table[code % self.bucket_count]
+        if bucket is None:
+            return None
         node = bucket.find(key)
         if node:
             return node.data[1]
         else:
             return None
-    def remove(self, key):
-        idx = self._bucket_index(key)
-        bucket = self.table[idx]
-        return bucket.remove(key)
+    def remove(self, key, code=None):
+        if code is None:
+            code = custom_hash(key)
+        bucket = self.table[code % self.bucket_count]
+        if bucket is not None and bucket.remove(key):
+            self.size -= 1
+            return True
+        return False
+    def _resize(self, new_count):
+        old_table = self.table
+        self.bucket_count = new_count
+        self.table = [None] * new_count
+        for bucket in old_table:
+            if bucket is None:
+                continue
+            for pair in bucket.iter():
+                idx = pair[2] % new_count
+                if self.table[idx] is None:
+                    self.table[idx] = LinkedList()
+                self.table[idx].append(pair)
+    def __len__(self):
+        return self.size
 
 #### Might want to consider use one of them.####
     def values(self):
         for bucket in self.table:
+            if bucket is None:
+                continue
             for pair in bucket.iter():
                 yield pair[1]
     def items(self):
         for bucket in self.table:
+            if bucket is None:
+                continue
             for pair in bucket.iter():
                 yield (pair[0], pair[1])
 
@@ -182,3 +254,126 @@ class CustomMinHeap:
 
     def _swap(self, i, j):
         self.data[i], self.data[j] = self.data[j], self.data[i]
+
+
+class IndexedMinHeap:
+    # Binary min-heap over the integer keys 0..capacity-1. A position map keeps
+    # every key in the heap at most once, so its priority can be lowered in place
+    # instead of pushing a duplicate entry.
+    def __init__(self, capacity):
+        self.keys = []                       # heap slot → key
+        self.pos = [-1] * capacity           # key → heap slot, -1 if absent
+        self.priority = [None] * capacity    # key → priority
+
+    def __len__(self):
+        return len(self.keys)
+
+    def is_empty(self):
+        return len(self.keys) == 0
+
+    def contains(self, key):
+        return self.pos[key] != -1
+
+    def push(self, priority, key):
+        if self.pos[key] != -1:
+            raise KeyError(key)
+        self.priority[key] = priority
+        self.pos[key] = len(self.keys)
+        self.keys.append(key)
+        self._bubble_up(len(self.keys) - 1)
+
+    def decrease_key(self, key, priority):
+        if priority > self.priority[key]:
+            raise ValueError("new priority is larger than the current one")
+        self.priority[key] = priority
+        self._bubble_up(self.pos[key])
+
+    def pop(self):
+        keys = self.keys
+        if not keys:
+            return None
+
+        top = keys[0]
+        last = keys.pop()
+        self.pos[top] = -1
+        if keys:
+            keys[0] = last
+            self.pos[last] = 0
+            self._bubble_down(0)
+        return self.priority[top], top
+
+    def peek(self):
+        if not self.keys:
+            return None
+        top = self.keys[0]
+        return self.priority[top], top
+
+    # empties the heap in O(len) so the position map can be reused
+    def clear(self):
+        for key in self.keys:
+            self.pos[key] = -1
+        self.keys = []
+
+    def _bubble_up(self, index):
+        keys, pos, priority = self.keys, self.pos, self.priority
+        key = keys[index]
+        p = priority[key]
+        while index > 0:
+            parent = (index - 1) // 2
+            parent_key = keys[parent]
+            if not p < priority[parent_key]:
+                break
+            keys[index] = parent_key
+            pos[parent_key] = index
+            index = parent
+        keys[index] = key
+        pos[key] = index
+
+    def _bubble_down(self, index):
+        keys, pos, priority = self.keys, self.pos, self.priority
+        size = len(keys)
+        key = keys[index]
+        p = priority[key]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            right = child + 1
+            if right < size and priority[keys[right]] < priority[keys[child]]:
+                child = right
+            child_key = keys[child]
+            if not priority[child_key] < p:
+                break
+            keys[index] = child_key
+            pos[child_key] = index
+            index = child
+        keys[index] = key
+        pos[key] = index
+
+
+class UnionFind:
+    # Disjoint sets over 0..n-1 with union by size and path halving.
+    def __init__(self, n):
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.count = n                       # number of sets
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # False if a and b were already in the same set
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.count -= 1
+        return True
@@ -0,0 +1,135 @@
+import json
+from batch_routing import worker_pool, worker_state
+from data_structure import CustomHashMap
+
+# NumPy is only needed here, so the rest of the project runs without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Up to this many nodes the whole matrix is solved with vectorized
+# Floyd-Warshall; above it, one Dijkstra per row node.
+DENSE_LIMIT = 400
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("DistanceMatrix needs NumPy: pip install numpy")
+
+
+def _distance_rows(sources, cols, compiled=None):
+    compiled = worker_state(compiled)
+    rows = np.empty((len(sources), len(cols)))
+    for r, source in enumerate(sources):
+        rows[r] = np.asarray(compiled.multi_source_dijkstra([source]))[cols]
+    return rows
+
+
+def _floyd_warshall(compiled):
+    n = compiled.size
+    dist = np.full((n, n), np.inf)
+    np.fill_diagonal(dist, 0)
+
+    open_edges = [i for i in range(compiled.edge_count) if not compiled.restricted[i]]
+    sources = np.asarray([compiled.sources[i] for i in open_edges], dtype=np.intp)
+    targets = np.asarray([compiled.targets[i] for i in open_edges], dtype=np.intp)
+    energy = np.asarray([compiled.energy[i] for i in open_edges], dtype=float)
+    np.minimum.at(dist, (sources, targets), energy)
+
+    for k in range(n):
+        np.minimum(dist, dist[:, k, None] + dist[None, k, :], out=dist)
+    return dist
+
+
+class DistanceMatrix:
+    # Energy cost from every row node to every column node as a float64 array,
+    # inf where there is no route. save() writes a plain .npy next to an id list,
+    # so any number of worker processes can load(..., mmap=True) the same file
+    # and share its pages instead of each holding a copy.
+    def __init__(self, row_ids, col_ids, matrix):
+        self.row_ids = list(row_ids)
+        self.col_ids = list(col_ids)
+        self.matrix = matrix
+
+        self.row_index = CustomHashMap()
+        for i, node_id in enumerate(self.row_ids):
+            self.row_index.insert(node_id, i)
+        self.col_index = CustomHashMap()
+        for j, node_id in enumerate(self.col_ids):
+            self.col_index.insert(node_id, j)
+
+    # sources/targets default to every node. method is "floyd_warshall",
+    # "dijkstra" or None to pick by graph size. workers > 1 spreads the
+    # Dijkstra rows over a process pool.
+    @classmethod
+    def compute(cls, graph, sources=None, targets=None, method=None, workers=1):
+        _require_numpy()
+        compiled = graph.compile()
+        all_ids = compiled.ids[:compiled.node_count]
+        sources = list(all_ids if sources is None else sources)
+        targets = list(all_ids if targets is None else targets)
+
+        rows = [compiled.node_index(node_id) for node_id in sources]
+        cols = [compiled.node_index(node_id) for node_id in targets]
+        for node_id, index in zip(sources + targets, rows + cols):
+            if index is None:
+                raise KeyError(node_id)
+
+        if method is None:
+            method = "floyd_warshall" if compiled.size <= DENSE_LIMIT else "dijkstra"
+
+        if method == "floyd_warshall":
+            matrix = _floyd_warshall(compiled)[np.ix_(rows, cols)]
+        elif method == "dijkstra":
+            matrix = np.empty((len(rows), len(cols)))
+            pool, workers = worker_pool(workers, compiled)
+            if pool is not None:
+                chunk = max(1, len(sources) // (workers * 4))
+                with pool:
+                    starts = range(0, len(sources), chunk)
+                    blocks = pool.map(_distance_rows,
+                                      [sources[i:i + chunk] for i in starts],
+                                      [cols] * len(starts))
+                    for i, block in zip(starts, blocks):
+                        matrix[i:i + len(block)] = block
+            else:
+                matrix[:] = _distance_rows(sources, cols, compiled)
+        else:
+            raise ValueError(f"unknown method {method!r}")
+
+        return cls(sources, targets, matrix)
+
+    # e.g. hub × delivery costs for dispatch
+    @classmethod
+    def by_type(cls, graph, row_type, col_type, **kwargs):
+        compiled = graph.compile()
+        rows = [compiled.ids[i] for i in range(compiled.node_count) if compiled.types[i] == row_type]
+        cols = [compiled.ids[i] for i in range(compiled.node_count) if compiled.types[i] == col_type]
+        return cls.compute(graph, rows, cols, **kwargs)
+
+    def lookup(self, u, v):
+        i = self.row_index.search(u)
+        j = self.col_index.search(v)
+        if i is None or j is None:
+            return float("inf")
+        return float(self.matrix[i, j])
+
+    def save(self, filepath):
+        np.save(filepath, np.ascontiguousarray(self.matrix))
+        with open(_ids_path(filepath), "w") as f:
+            json.dump({"rows": self.row_ids, "cols": self.col_ids}, f)
+
+    @classmethod
+    def load(cls, filepath, mmap=True):
+        _require_numpy()
+        matrix = np.load(filepath, mmap_mode="r" if mmap else None)
+        with open(_ids_path(filepath), "r") as f:
+            ids = json.load(f)
+        return cls(ids["rows"], ids["cols"], matrix)
+
+
+def _ids_path(filepath):
+    if filepath.endswith(".npy"):
+        filepath = filepath[:-4]
+    return filepath + ".ids.json"
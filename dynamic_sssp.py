@@ -0,0 +1,193 @@
+import instrumentation
+from data_structure import CustomMinHeap
+
+INF = float("inf")
+
+
+class DynamicShortestPaths:
+    # Shortest-path tree from a set of sources (the nearest one wins) kept
+    # current across graph changes, after Ramalingam–Reps. It works on the
+    # graph's own adjacency lists, so nothing has to be recompiled:
+    # - a tree corridor u → v getting closed, dearer or removed: only the
+    #   subtree under v can get farther away. Its nodes are detached, seeded
+    #   from their cheapest incoming corridor outside the subtree and settled
+    #   again with a Dijkstra confined to the subtree;
+    # - a corridor opened, added or made cheaper: Dijkstra from v over just the
+    #   nodes it brings closer;
+    # - capacity changes do not matter;
+    # - anything else (bulk loads, unknown events) rebuilds from scratch.
+    # touched counts the nodes the last update visited.
+    def __init__(self, graph, sources):
+        self.graph = graph
+        self.sources = set(sources)
+        self.dist = {}                       # id → energy from the nearest source
+        self.parent = {}                     # id → tree Edge into it (absent for sources)
+        self.children = {}                   # id → ids whose tree edge leaves it
+        self.touched = 0
+        self._rebuild()
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        self.graph.unsubscribe(self._on_change)
+
+    def distance(self, node_id):
+        self._ensure_current()
+        return self.dist.get(node_id, INF)
+
+    # ids from the nearest source to node_id, [] if unreachable
+    def path(self, node_id):
+        self._ensure_current()
+        if node_id not in self.dist:
+            return []
+        path = [node_id]
+        edge = self.parent.get(node_id)
+        while edge is not None:
+            path.append(edge.u)
+            edge = self.parent.get(edge.u)
+        path.reverse()
+        return path
+
+    def _ensure_current(self):
+        if self.version != self.graph.version:
+            self._rebuild()
+
+    def _rebuild(self):
+        self.dist = {}
+        self.parent = {}
+        self.children = {}
+        pq = CustomMinHeap()
+        for s in self.sources:
+            if self.graph.nodes.search(s) is not None:
+                self.dist[s] = 0
+                pq.push(0, s)
+        self.touched = self._settle(pq)
+        self.version = self.graph.version
+
+    # Dijkstra from whatever is in pq, lowering dist wherever it can
+    def _settle(self, pq, allowed=None):
+        dist = self.dist
+        adj = self.graph.adj
+        settled = 0
+        stale = 0
+        while not pq.is_empty():
+            d, u = pq.pop()
+            if d > dist.get(u, INF):
+                stale += 1
+                continue
+            settled += 1
+            for e in adj.search(u) or ():
+                if e.restricted:
+                    continue
+                v = e.v
+                if allowed is not None and v not in allowed:
+                    continue
+                nd = d + e.energy
+                if nd < dist.get(v, INF):
+                    self._attach(v, e, nd)
+                    pq.push(nd, v)
+        stats = instrumentation.active
+        if stats is not None:
+            stats.nodes_settled += settled
+            stats.stale_pops += stale
+        return settled
+
+    def _attach(self, v, edge, d):
+        old = self.parent.get(v)
+        if old is not None:
+            self.children[old.u].discard(v)
+        self.dist[v] = d
+        self.parent[v] = edge
+        self.children.setdefault(edge.u, set()).add(v)
+
+    # u → v got cheaper, was opened or was added
+    def _improved(self, edge):
+        if edge.restricted:
+            return
+        du = self.dist.get(edge.u)
+        if du is None or du + edge.energy >= self.dist.get(edge.v, INF):
+            return
+        self._attach(edge.v, edge, du + edge.energy)
+        pq = CustomMinHeap()
+        pq.push(self.dist[edge.v], edge.v)
+        self.touched = self._settle(pq)
+
+    # u → v got dearer or was closed; only matters if it is a tree edge
+    def _worsened(self, edge):
+        if self.parent.get(edge.v) is not edge:
+            return
+
+        # detach the subtree under v
+        subtree = {edge.v}
+        stack = [edge.v]
+        while stack:
+            x = stack.pop()
+            for child in self.children.pop(x, ()):
+                subtree.add(child)
+                stack.append(child)
+        self.children[edge.u].discard(edge.v)
+        for x in subtree:
+            del self.dist[x]
+            del self.parent[x]
+
+        # best way back in from outside the subtree
+        pq = CustomMinHeap()
+        radj = self.graph.radj
+        for x in subtree:
+            for e in radj.search(x) or ():
+                if e.restricted or e.u in subtree or e.u not in self.dist:
+                    continue
+                nd = self.dist[e.u] + e.energy
+                if nd < self.dist.get(x, INF):
+                    self._attach(x, e, nd)
+            if x in self.dist:
+                pq.push(self.dist[x], x)
+        self.touched = len(subtree) + self._settle(pq, subtree)
+
+    def _on_change(self, kind, *args):
+        self.touched = 0
+        if self.version != self.graph.version - 1:
+            # an earlier change went unseen
+            self._rebuild()
+            return
+
+        if kind == "restricted":
+            u, v, restricted = args
+            e = self.graph.edge(u, v)
+            if e is not None:
+                if restricted:
+                    self._worsened(e)
+                else:
+                    self._improved(e)
+        elif kind == "edge":
+            e = self.graph.edge(*args)
+            if e is not None:
+                self._improved(e)
+        elif kind == "energy":
+            u, v, energy, previous = args
+            e = self.graph.edge(u, v)
+            if e is not None:
+                if energy > previous:
+                    self._worsened(e)
+                else:
+                    self._improved(e)
+        elif kind == "removed":
+            u, v = args
+            e = self.parent.get(v)
+            if e is not None and e.u == u:
+                self._worsened(e)
+        elif kind == "capacity":
+            pass
+        elif kind == "node":
+            node_id = args[0]
+            if node_id in self.sources:
+                # it may already have been reached as the target of a corridor
+                old = self.parent.pop(node_id, None)
+                if old is not None:
+                    self.children[old.u].discard(node_id)
+                self.dist[node_id] = 0
+                pq = CustomMinHeap()
+                pq.push(0, node_id)
+                self.touched = self._settle(pq)
+        else:
+            self._rebuild()
+        self.version = self.graph.version
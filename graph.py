@@ -1,299 +1,634 @@
+import functools
+import inspect
 import json
 import networkx as nx
 import matplotlib.pyplot as plt
-from data_structure import CustomHashMap, LinkedList, CustomArray, CustomMinHeap
-
+from data_structure import CustomHashMap, LinkedList, CustomArray, custom_hash
+from dynamic_sssp import DynamicShortestPaths
+import binary_snapshot
+import instrumentation
+from batch_routing import route_many
+from charging_placement import corridor_greedy, place_stations
+from compiled_graph import CompiledGraph
+from contraction_hierarchy import ContractionHierarchy
+from distance_matrix import DistanceMatrix
+from k_shortest_paths import k_shortest_paths
+from max_flow import HUB_LISTS, DeliveryFlow, ResidualGraph
+from min_cost_flow import MinCostFlow
+from reachability import ReachabilityMatrix
+from route_cache import RouteCache
+from scenario import ScenarioView, run_scenarios
+from spanning_forest import boruvka, kruskal
+from streaming_loader import edge_record, load_stream, node_record
+
+# __slots__ keeps the per-object cost of millions of nodes and corridors down
 class Node:
-    def __init__(self, node_id, node_type):
+    __slots__ = ("id", "type", "x", "y")
+
+    def __init__(self, node_id, node_type, x=None, y=None):
         self.id = node_id
         self.type = node_type
+        self.x = x
+        self.y = y
 
 
+# energy, capacity and restricted are properties: once the Edge is in a
+# graph, assigning one goes through Graph.set_energy / set_capacity /
+# set_restricted, so the compiled snapshot and the subscribers follow writes
+# made directly to the Edge.
 class Edge:
+    __slots__ = ("u", "v", "_energy", "_capacity", "bidirectional", "_restricted", "_graph", "_out", "_in")
+
     def __init__(self, u, v, energy=0, capacity=float("inf"),bidirectional=False, restricted=False):
         self.u = u
         self.v = v
-        self.energy = energy
-        self.capacity = capacity
+        self._energy = energy
+        self._capacity = capacity
         self.bidirectional = bidirectional
-        self.restricted = restricted
+        self._restricted = restricted
+        self._graph = None                   # the Graph it belongs to
+        self._out = -1                       # position in adj[u]
+        self._in = -1                        # position in radj[v]
+
+    @property
+    def energy(self):
+        return self._energy
+
+    @energy.setter
+    def energy(self, energy):
+        if self._graph is None:
+            self._energy = energy
+        else:
+            self._graph.set_energy(self.u, self.v, energy)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @capacity.setter
+    def capacity(self, capacity):
+        if self._graph is None:
+            self._capacity = capacity
+        else:
+            self._graph.set_capacity(self.u, self.v, capacity)
+
+    @property
+    def restricted(self):
+        return self._restricted
+
+    @restricted.setter
+    def restricted(self, restricted):
+        if self._graph is None:
+            self._restricted = restricted
+        else:
+            self._graph.set_restricted(self.u, self.v, restricted)
+
+
+# Runs the method inside an instrumentation scope while the graph's
+# instrumentation is enabled; a call made from inside another counted call
+# just adds to the outer one. For a generator the scope opens at the first
+# next() and closes when it is exhausted or closed, so it spans the
+# iteration (and counts whatever the caller runs in between).
+def _counted(method):
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def iterate(self, *args, **kwargs):
+            if not self._counting or instrumentation.active is not None:
+                yield from method(self, *args, **kwargs)
+                return
+            with instrumentation.collect(method.__name__, self._record_stats):
+                yield from method(self, *args, **kwargs)
+        return iterate
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        if not self._counting or instrumentation.active is not None:
+            return method(self, *args, **kwargs)
+        with instrumentation.collect(method.__name__, self._record_stats):
+            return method(self, *args, **kwargs)
+    return call
 
 
 class Graph:
     def __init__(self):
         self.nodes = CustomHashMap()              # id → Node
         self.adj = CustomHashMap()                # id → list of Edge
+        self.radj = CustomHashMap()               # id → list of incoming Edge
+        self.edge_index = CustomHashMap()         # (u, v) → Edge, one per corridor
         self.node_count = 0
         self.edge_count = 0
+        self._compiled = None                     # cached CSR snapshot
+        self._hierarchy = None                    # cached contraction hierarchy
+        self._subscribers = []                    # callbacks told about changes
+        self._route_cache = None                  # RouteCache used by dijkstra
+        self.version = 0                          # bumped by every topology change
+        self._pending = None                      # load_binary columns not yet turned into objects
+        self._counting = False                    # set by enable_instrumentation
+        self._stats_callback = None
+        self.last_stats = None                    # CallStats of the last counted call
+
+    # Read-only algorithms run on an array-backed snapshot of the graph; it is
+    # rebuilt lazily after the topology changes. remove_edge only tombstones
+    # the corridor's slots; compact=True rebuilds a snapshot that has any,
+    # for callers that need its rows to match adj.
+    @_counted
+    def compile(self, compact=False):
+        if self._compiled is None or (compact and self._compiled.tombstones):
+            self._compiled = CompiledGraph(self)
+        return self._compiled
+
+    # Preprocessed index for fast route queries. Any add_node, add_edge or
+    # set_restricted drops it; it is rebuilt on the next call.
+    def contraction_hierarchy(self):
+        if self._hierarchy is None:
+            self._hierarchy = ContractionHierarchy.build(self.compile())
+        return self._hierarchy
+
+    # Callbacks are called after each change with ("node", node_id),
+    # ("edge", u, v), ("restricted", u, v, restricted), ("energy", u, v,
+    # energy, previous), ("capacity", u, v, capacity, previous),
+    # ("removed", u, v) or, for loads and batches, ("bulk",).
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    # Immutable what-if overlay: the current snapshot with its own no-fly
+    # zones, restricted and released on top of the graph's. Pass it as view=
+    # to check_delivery_reachability, dijkstra, k_shortest_paths,
+    # calculate_delivery_capacity or prim; the graph itself is left alone.
+    # See scenario.py.
+    def view(self, restricted=(), released=()):
+        view = ScenarioView(self.compile())
+        return view.restrict(restricted).release(released)
+
+    # task(view) for every scenario of corridors to close, optionally on a
+    # process pool; see scenario.run_scenarios
+    def run_scenarios(self, scenarios, task, workers=1, view=None):
+        return run_scenarios(self._view(view), scenarios, task, workers)
+
+    def _view(self, view):
+        return ScenarioView(self.compile()) if view is None else view
+
+    # Per-call operation counts (nodes settled, corridors relaxed, heap and
+    # hash-map work, augmenting paths, BFS passes): from now on every load and
+    # F-method call fills an instrumentation.CallStats, kept as last_stats
+    # and passed to callback if given. See instrumentation.py.
+    def enable_instrumentation(self, callback=None):
+        self._counting = True
+        self._stats_callback = callback
+
+    def disable_instrumentation(self):
+        self._counting = False
+        self._stats_callback = None
+
+    def _record_stats(self, stats):
+        self.last_stats = stats
+        if self._stats_callback is not None:
+            self._stats_callback(stats)
+
+    # every change goes through here, which is also where version moves
+    def _notify(self, *event):
+        self.version += 1
+        for callback in self._subscribers:
+            callback(*event)
 
 
     # B1: Load graph from JSON file
+    @_counted
     def load_json(self, filepath):
         with open(filepath, "r") as f:
             data = json.load(f)
+        # every edge is checked before anything is inserted, so a file with
+        # an edge into an unknown node leaves the graph as it was
+        ids = {n["id"] for n in data["nodes"]}
+        for e in data["edges"]:
+            self._check_endpoints(e["from"], e["to"], ids)
+        self._reserve(len(data["nodes"]), len(data["edges"]))
 
         # Read nodes
         for n in data["nodes"]:
-            self.add_node(n["id"], n["type"])
+            self.add_node(*node_record(n))
 
-        # Read edges
+        # Read edges (their endpoints were checked above)
         for e in data["edges"]:
-            self.add_edge(
-                e["from"],
-                e["to"],
-                energy=e.get("energy", 0),
-                capacity=e.get("capacity", float("inf")),
-                bidirectional=e.get("bidirectional", False)
-            )
-
+            self._add_edge(*edge_record(e))
+
+    # B1: same schema (or one node/edge object per line) parsed incrementally
+    # and inserted in batches; see streaming_loader.py
+    @_counted
+    def load_json_stream(self, filepath, batch_size=10000, lines=None, progress=None):
+        load_stream(self, filepath, batch_size, lines, progress)
+
+
+    # B1: compact binary snapshot: interned ids plus the compiled CSR columns
+    # and per-edge bidirectional / restricted flags; see binary_snapshot.py
+    def save_binary(self, filepath):
+        binary_snapshot.save(self, filepath)
+
+    # Replaces the graph with a snapshot. With use_mmap the edge columns stay in
+    # the mapped file and are used as-is by the compiled snapshot, so loading
+    # only decodes the id table; Node and Edge objects are built the first
+    # time nodes, adj or radj is read.
+    @_counted
+    def load_binary(self, filepath, use_mmap=True, verify=True):
+        compiled, bidirectional = binary_snapshot.load(filepath, use_mmap, verify)
+        for name in ("nodes", "adj", "radj", "edge_index"):
+            self.__dict__.pop(name, None)
+        self._pending = bidirectional
+        self._compiled = compiled
+        self._hierarchy = None
+        self.node_count = compiled.node_count
+        self.edge_count = compiled.edge_count
+        self._notify("bulk")
+
+    def __getattr__(self, name):
+        if name in ("nodes", "adj", "radj", "edge_index") and self.__dict__.get("_pending") is not None:
+            self._materialize()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def _materialize(self):
+        compiled = self._compiled
+        bidirectional = self._pending
+        self._pending = None
+        self.nodes = CustomHashMap()
+        self.adj = CustomHashMap()
+        self.radj = CustomHashMap()
+        self.edge_index = CustomHashMap()
+        self.edge_count = 0
 
-    # B2: No-fly zones (restrict edges)
+        ids = compiled.ids
+        for i in range(compiled.node_count):
+            self.nodes.insert(ids[i], Node(ids[i], compiled.types[i], compiled.x[i], compiled.y[i]))
+            self.adj.insert(ids[i], [])
+            self.radj.insert(ids[i], [])
+        for u in range(compiled.node_count):
+            for i in range(compiled.offsets[u], compiled.offsets[u + 1]):
+                self._put_edge(ids[u], ids[compiled.targets[i]], compiled.energy[i], compiled.capacity[i],
+                               bool(bidirectional[i]), bool(compiled.restricted[i]))
+        if self.edge_count != compiled.edge_count:
+            # snapshots written before corridors were deduplicated can hold
+            # parallel ones; rebuild from the merged graph
+            self._compiled = None
+
+    # the Edge for corridor u → v, or None
+    def edge(self, u, v):
+        return self.edge_index.search((u, v))
+
+    # B2: No-fly zones (restrict edges). The corridor is found through
+    # edge_index and its slot in the compiled snapshot through the snapshot's
+    # own (u, v) index, both with the one hash of (u, v), and the slot is
+    # patched in place, so a toggle costs O(1) instead of a rebuild. Returns
+    # whether anything changed; toggling to the current state sends no event.
     def set_restricted(self, u, v, restricted=True):
-        for e in self.adj[u]:
-            if e.v == v:
-                e.restricted = restricted
+        code = custom_hash((u, v))
+        edge = self.edge_index.search((u, v), code)
+        if edge is None or edge.restricted == restricted:
+            return False
+        edge._restricted = restricted
+        if self._compiled is not None:
+            self._compiled.set_restricted(u, v, restricted, code)
+        self._hierarchy = None
+        self._notify("restricted", u, v, restricted)
+        return True
+
+    # B2: the same for many (u, v) corridors at once, such as a no-fly-zone
+    # feed; one event per corridor that changed. Returns how many did.
+    def set_restricted_many(self, corridors, restricted=True):
+        changed = 0
+        for u, v in corridors:
+            if self.set_restricted(u, v, restricted):
+                changed += 1
+        return changed
+
+    # B3: in-place corridor updates, patched into the compiled snapshot like
+    # set_restricted. They return False for an unknown corridor.
+    def set_energy(self, u, v, energy):
+        code = custom_hash((u, v))
+        edge = self.edge_index.search((u, v), code)
+        if edge is None:
+            return False
+        previous = edge.energy
+        if previous != energy:
+            edge._energy = energy
+            if self._compiled is not None:
+                self._compiled.set_energy(u, v, energy, code)
+            self._hierarchy = None
+            self._notify("energy", u, v, energy, previous)
+        return True
+
+    def set_capacity(self, u, v, capacity):
+        code = custom_hash((u, v))
+        edge = self.edge_index.search((u, v), code)
+        if edge is None:
+            return False
+        previous = edge.capacity
+        if previous != capacity:
+            edge._capacity = capacity
+            if self._compiled is not None:
+                self._compiled.set_capacity(u, v, capacity, code)
+            self._notify("capacity", u, v, capacity, previous)
+        return True
+
+    # B3: removes corridor u → v (and v → u with bidirectional) in O(1): the
+    # Edge is found through edge_index, the last Edge of each adjacency list
+    # takes its place there, and its slots in the compiled snapshot are
+    # tombstoned rather than rebuilt. Once a quarter of the snapshot's slots
+    # are tombstones it is dropped and rebuilt by the next query, which
+    # keeps the rebuilds amortized O(1) per removal.
+    def remove_edge(self, u, v, bidirectional=False):
+        code = custom_hash((u, v))
+        edge = self.edge_index.search((u, v), code)
+        if edge is None:
+            return False
+        self.edge_index.remove((u, v), code)
+        edge._graph = None
+        row = self.adj.search(u)
+        last = row.pop()
+        if last is not edge:
+            row[edge._out] = last
+            last._out = edge._out
+        incoming = self.radj.search(v)
+        last = incoming.pop()
+        if last is not edge:
+            incoming[edge._in] = last
+            last._in = edge._in
+        self.edge_count -= 1
+        partner = self.edge_index.search((v, u))
+        if partner is not None:
+            partner.bidirectional = False
+
+        self._hierarchy = None
+        compiled = self._compiled
+        if compiled is not None:
+            compiled.remove_corridor(u, v, code)
+            if 4 * compiled.tombstones > compiled.edge_count:
+                self._compiled = None
+        self._notify("removed", u, v)
+        if bidirectional:
+            self.remove_edge(v, u)
+        return True
 
 
     
     # B3: Modify & extend network
-    def add_node(self, node_id, node_type="unknown"):
-        if self.nodes.search(node_id) is None:
-            self.nodes.insert(node_id, Node(node_id, node_type))
-            self.adj.insert(node_id, [])
-            self.node_count += 1
-
+    def add_node(self, node_id, node_type="unknown", x=None, y=None):
+        if self._insert_node(node_id, node_type, x, y):
+            self._drop_derived()
+            self._notify("node", node_id)
+
+    # There is one corridor per (u, v): adding an existing one updates its
+    # energy and capacity in place (the latest description wins), so loading
+    # the same data twice changes nothing.
     def add_edge(self, u, v, energy=0, capacity=float("inf"), bidirectional=False):
-        adj_u = self.adj.search(u)
-        # if adj_u is None:
-        #     adj_u = []
-        # self.adj.insert(u, adj_u)
-
-        adj_u.append(Edge(u, v, energy, capacity, bidirectional))
-
+        self._check_endpoints(u, v)
+        self._add_edge(u, v, energy, capacity, bidirectional)
+
+    # add_edge once the endpoints are known to exist
+    def _add_edge(self, u, v, energy, capacity, bidirectional):
+        added = []
+        for a, b in ((u, v), (v, u)) if bidirectional else ((u, v),):
+            edge = Edge(a, b, energy, capacity, bidirectional)
+            existing = self.edge_index.setdefault((a, b), edge)
+            if existing is edge:
+                self._link_edge(edge)
+                added.append((a, b))
+            else:
+                existing.bidirectional = existing.bidirectional or bidirectional
+                self.set_energy(a, b, energy)
+                self.set_capacity(a, b, capacity)
+
+        if added:
+            self._drop_derived()
+            for a, b in added:
+                self._notify("edge", a, b)
+
+    # B3: bulk insert for loaders. Subscribers get one ("bulk",) event per
+    # call instead of one event per node or edge.
+    def add_nodes(self, nodes):
+        for node_id, node_type, x, y in nodes:
+            self._insert_node(node_id, node_type, x, y)
+        self._drop_derived()
+        self._notify("bulk")
+
+    def add_edges(self, edges):
+        # the whole batch is checked before any of it goes in
+        for u, v, *_ in edges:
+            self._check_endpoints(u, v)
+        for u, v, energy, capacity, bidirectional in edges:
+            self._insert_edge(u, v, energy, capacity, bidirectional)
+        self._drop_derived()
+        self._notify("bulk")
+
+    # An empty graph about to receive n nodes and m corridor records gets
+    # maps big enough to take them without rehashing (a bidirectional record
+    # takes two edge_index entries).
+    def _reserve(self, n, m):
+        if self.node_count or self.edge_count:
+            return
+        self.nodes = CustomHashMap(2 * n + 1)
+        self.adj = CustomHashMap(2 * n + 1)
+        self.radj = CustomHashMap(2 * n + 1)
+        self.edge_index = CustomHashMap(3 * m + 1)
+
+    def _insert_node(self, node_id, node_type, x, y):
+        if self.nodes.search(node_id) is not None:
+            return False
+        self.nodes.insert(node_id, Node(node_id, node_type, x, y))
+        self.adj.insert(node_id, [])
+        if self.radj.search(node_id) is None:
+            self.radj.insert(node_id, [])
+        self.node_count += 1
+        return True
+
+    def _insert_edge(self, u, v, energy, capacity, bidirectional):
+        self._put_edge(u, v, energy, capacity, bidirectional)
         if bidirectional:
-            adj_v = self.adj.search(v)
-            # if adj_v is None:
-            #     adj_v = []
-            #     self.adj.insert(v, adj_v)
-
-            adj_v.append(Edge(v, u, energy, capacity, bidirectional))
+            self._put_edge(v, u, energy, capacity, bidirectional)
+
+    # both ends of a corridor must be nodes (or in ids, the nodes about to
+    # be loaded) before it goes into edge_index
+    def _check_endpoints(self, u, v, ids=()):
+        if u not in ids and self.adj.search(u) is None:
+            raise ValueError(f"edge from unknown node {u!r}")
+        if v not in ids and self.adj.search(v) is None:
+            raise ValueError(f"edge to unknown node {v!r}")
+
+    # adds corridor u → v, or overwrites the one already there
+    def _put_edge(self, u, v, energy, capacity, bidirectional, restricted=False):
+        edge = Edge(u, v, energy, capacity, bidirectional, restricted)
+        existing = self.edge_index.setdefault((u, v), edge)
+        if existing is not edge:
+            existing._energy = energy
+            existing._capacity = capacity
+            existing.bidirectional = existing.bidirectional or bidirectional
+            return existing
+        self._link_edge(edge)
+        return edge
+
+    # puts a new Edge, already in edge_index, into the adjacency lists
+    def _link_edge(self, edge):
+        edge._graph = self
+        row = self.adj.search(edge.u)
+        edge._out = len(row)
+        row.append(edge)
+        self._add_incoming(edge)
+        self.edge_count += 1
+
+    # snapshots built from the old topology
+    def _drop_derived(self):
+        self._compiled = None
+        self._hierarchy = None
+
+    # radj shares the Edge objects of adj, so set_restricted on one side is
+    # seen from the other.
+    def _add_incoming(self, edge):
+        incoming = self.radj.search(edge.v)
+        if incoming is None:
+            incoming = []
+            self.radj.insert(edge.v, incoming)
+        edge._in = len(incoming)
+        incoming.append(edge)
 
-    
     # F1: Check reachability from a hub
-    def check_delivery_reachability(self, start="HUB"):
-        visited = set()
-        stack = [start]
-
-        while stack:
-            u = stack.pop()
-            if u in visited:
-                continue
-            visited.add(u)
-
-            edges = self.adj.search(u)
-            if edges is None:
-                    continue
-
-            for e in edges:
-                if not e.restricted:
-                    stack.append(e.v)
-
-        all_delivery = LinkedList()
-        for (node_id, node_obj) in self.nodes.items():
-            if node_obj.type == "delivery":
-                all_delivery.append(node_id)
-
-        
-        unreachable_delivery = LinkedList()
-        current = all_delivery.head
-        while current:
-            did = current.data
-            if did not in visited:
-                unreachable_delivery.append(did)
-            current = current.next
-
-        if unreachable_delivery.head is None:
-            return f"All delivery nodes are reachable from {start}."
-        
-        names = []
-        current = unreachable_delivery.head
-        while current:
-            names.append(current.data)
-            current = current.next
-
-        return "Unreachable delivery nodes: " + ", ".join(names)
+    @_counted
+    def check_delivery_reachability(self, start="HUB", view=None):
+        return self._view(view).check_delivery_reachability(start)
+
+    # F1: hub × delivery reachability for every hub at once (or any sources /
+    # targets), as a ReachabilityMatrix; see reachability.py
+    @_counted
+    def reachability_matrix(self, sources=None, targets=None):
+        return ReachabilityMatrix.compute(self.compile(), sources, targets)
+
+    # F1: one matrix per no-fly-zone scenario, a scenario being the (u, v)
+    # corridors closed on top of the current ones
+    @_counted
+    def reachability_scenarios(self, scenarios, sources=None, targets=None, workers=1):
+        return ReachabilityMatrix.scenarios(self.compile(), scenarios, sources, targets, workers)
 
     # F2: Shortest path (Dijkstra using energy)
-    def dijkstra(self, start, target):
-        pq = CustomMinHeap()
-        pq.push(0, start)
-
-        visited = set()
-        prev = CustomHashMap()
-        dist = CustomHashMap()
-        dist.insert(start, 0)
-
-        while not pq.is_empty():
-            cost, u = pq.pop()
-            if u in visited:
-                continue
-            visited.add(u)
-
-            if u == target:
-                path = []
-                cur = target
-                while cur is not None:
-                    path.append(cur)
-                    cur = prev.search(cur)
-                path.reverse()
-                return cost, path
-            
-            edges = self.adj.search(u)
-            if edges is None:
-                continue
-
-            for e in edges:
-                if not e.restricted:
-                    old_cost = dist.search(e.v)
-                    new_cost = cost + e.energy
-                    if old_cost is None or new_cost < old_cost:
-                        dist.insert(e.v, new_cost)
-                        prev.insert(e.v, u)
-                        pq.push(new_cost, e.v)
-        return float("inf"), []
+    @_counted
+    def dijkstra(self, start, target, view=None):
+        if view is not None:
+            return view.dijkstra(start, target)
+        if self._route_cache is not None:
+            return self._route_cache.route(start, target)
+        return self.compile().dijkstra(start, target)
+
+    # Serve dijkstra from an LRU RouteCache; see route_cache.py for how it
+    # follows topology changes. Returns the cache so its stats() can be read.
+    def enable_route_cache(self, max_size=1_000_000, cache_trees=False):
+        self.disable_route_cache()
+        self._route_cache = RouteCache(self, max_size, cache_trees)
+        return self._route_cache
+
+    def disable_route_cache(self):
+        if self._route_cache is not None:
+            self._route_cache.close()
+            self._route_cache = None
+
+    # F2: energy from every source to every target (all nodes by default) as
+    # a NumPy-backed DistanceMatrix that can be saved and memory-mapped by
+    # other processes; needs NumPy. See distance_matrix.py
+    @_counted
+    def distance_matrix(self, sources=None, targets=None, method=None, workers=1):
+        return DistanceMatrix.compute(self, sources, targets, method, workers)
+
+    # F2: many (start, target) pairs at once, see batch_routing.route_many
+    @_counted
+    def route_many(self, pairs, workers=1):
+        yield from route_many(self, pairs, workers)
+
+    # F2: searches forward from start and backward from target until they meet
+    @_counted
+    def bidirectional_dijkstra(self, start, target):
+        return self.compile().bidirectional_dijkstra(start, target)
+
+    # F2: A* guided by the straight-line distance to the target
+    @_counted
+    def astar(self, start, target):
+        return self.compile().astar(start, target)
+
+    # F2: cheapest route a drone with battery_capacity can actually fly,
+    # recharging at charging nodes; returns (cost, path, recharge stops)
+    @_counted
+    def route_with_battery(self, start, target, battery_capacity):
+        return self.compile().route_with_battery(start, target, battery_capacity)
+
+    # F2: the k cheapest loopless routes, cheapest first, as (energy, path)
+    # pairs: backups for when a corridor of the first one closes. See
+    # k_shortest_paths.py
+    @_counted
+    def k_shortest_paths(self, start, target, k, workers=1, view=None):
+        compiled = self.compile() if view is None else view.compiled
+        return k_shortest_paths(compiled, start, target, k, workers)
     
-    # F3: calculate max-flow
-    def _ensure_map(self, cmap, key):
-        existing = cmap.search(key)
-        if existing is None:
-            inner = CustomHashMap()
-            cmap.insert(key, inner)
-            return inner
-        return existing
+    # F3: calculate max-flow. start_hub may be a list, tuple, set or
+    # CustomArray of hubs: they are fed from a SUPER_SOURCE with unlimited
+    # supply, which is also the source to pass to _extract_min_cut.
+    @_counted
+    def calculate_delivery_capacity(self, start_hub, area_nodes, view=None):
+        return self._view(view).calculate_delivery_capacity(start_hub, area_nodes)
+
+    # F3: the most the hubs (every hub by default) can deliver into
+    # area_nodes, routed for the least total energy; returns (flow, energy,
+    # CustomArray of (u, v, flow) per corridor used). See min_cost_flow.py
+    @_counted
+    def min_cost_delivery_flow(self, area_nodes, hubs=None, view=None):
+        if hubs is None:
+            hubs = [node_id for node_id, node in self.nodes.items() if node.type == "hub"]
+        elif not isinstance(hubs, HUB_LISTS):
+            hubs = [hubs]
+        compiled = self.compile() if view is None else view.compiled
+        solver = MinCostFlow(compiled, hubs, area_nodes)
+        flow = solver.solve()
+        return flow, solver.energy(), solver.corridor_flows()
     
-    def _bfs_flow(self, residual, source, sink):
-        visited = CustomHashMap()
-        parent = CustomHashMap()
-
-        queue = CustomArray()
-        queue.append(source)
-        visited.insert(source, True)
-
-        while len(queue) > 0:
-            u = queue.get(0)
-            for i in range(1, len(queue)):
-                queue.set(i-1, queue.get(i))
-            queue.size -= 1
-            queue.set(queue.size, None)
-
-            neighbors = residual.search(u)
-            if neighbors is None:
-                continue
-
-            for v, cap in neighbors.items():
-                if cap > 0 and visited.search(v) is None:
-                    visited.insert(v, True)
-                    parent.insert(v, u)
-                    queue.append(v)
-                    if v == sink:
-                        return parent
-
-        return None
-
-    def calculate_delivery_capacity(self, start_hub, area_nodes):
-        INF = 10**12
-
-        residual = CustomHashMap()
-
-        for u, edges in self.adj.items():
-            inner = self._ensure_map(residual, u)
-            for e in edges:
-                if e.restricted:
-                    continue
-                
-                # existing = inner.search(e.v)
-                # if existing is None:
-                #     inner.insert(e.v, e.capacity)
-                # else:
-                #     inner.insert(e.v, existing + e.capacity)
-                inner.insert(e.v, e.capacity)
-                
-                back = self._ensure_map(residual, e.v)
-                if back.search(u) is None:
-                    back.insert(u, 0)
-
+    # F2: distances and routes from the nearest of `sources` (every hub by
+    # default) that follow add_edge and set_restricted by repairing only the
+    # part of the shortest-path tree that changed; see dynamic_sssp.py
+    def dynamic_shortest_paths(self, sources=None):
+        if sources is None:
+            sources = [node_id for node_id, node in self.nodes.items() if node.type == "hub"]
+        return DynamicShortestPaths(self, sources)
+
+    # F3: max-flow that stays current across set_restricted toggles; like
+    # calculate_delivery_capacity, start_hub may be a HUB_LISTS of hubs
+    def delivery_flow(self, start_hub, area_nodes):
+        return DeliveryFlow(self, start_hub, area_nodes)
 
-        super_sink = "SUPER_SINK"
-        self._ensure_map(residual, super_sink)
-
-        for node in area_nodes:
-            inner = self._ensure_map(residual, node)
-            if inner.search(super_sink) is None:
-                inner.insert(super_sink, INF)
-            back = self._ensure_map(residual, super_sink)
-            if back.search(node) is None:
-                back.insert(node, 0)
-
-        max_flow = 0
-
-
-        while True:
-            parent = self._bfs_flow(residual, start_hub, super_sink)
-            if parent is None:
-                break
-
-
-            flow = INF
-            v = super_sink
-            while parent.search(v) is not None:
-                u = parent.search(v)
-                cap = residual.search(u).search(v)
-                if cap < flow:
-                    flow = cap
-                v = u
-
-            v = super_sink
-            while parent.search(v) is not None:
-                u = parent.search(v)
-                forward_map = residual.search(u)
-                backward_map = residual.search(v)
-
-                forward_cap = forward_map.search(v)
-                backward_cap = backward_map.search(u)
-
-                forward_map.insert(v, forward_cap - flow)
-                backward_map.insert(u, backward_cap + flow)
-
-                v = u
-
-            max_flow += flow
-
-        return max_flow, residual
-    
     # F4: bottle-neck
+    @_counted
     def _extract_min_cut(self, residual, source):
-        # BFS to find reachable nodes in residual graph
-        visited = CustomHashMap()
-        queue = CustomArray()
-        queue.append(source)
-        visited.insert(source, True)
-
-        while len(queue) > 0:
-            u = queue.get(0)
-            # pop front manually
-            for i in range(1, len(queue)):
-                queue.set(i-1, queue.get(i))
-            queue.size -= 1
-            queue.set(queue.size, None)
-
-            neighbors = residual.search(u)
-            if neighbors is None:
-                continue
+        # nodes reachable from source in the residual graph
+        if isinstance(residual, ResidualGraph):
+            reachable = residual.reachable(source)
+            visited = CustomHashMap()
+            for i in range(residual.size):
+                if reachable[i]:
+                    visited.insert(residual.node_id(i), True)
+        else:
+            visited = CustomHashMap()
+            queue = CustomArray()
+            queue.append(source)
+            visited.insert(source, True)
+
+            head = 0
+            while head < len(queue):
+                u = queue[head]
+                head += 1
+
+                neighbors = residual.search(u)
+                if neighbors is None:
+                    continue
 
-            for v, cap in neighbors.items():
-                if cap > 0 and visited.search(v) is None:
-                    visited.insert(v, True)
-                    queue.append(v)
+                for v, cap in neighbors.items():
+                    if cap > 0 and visited.search(v) is None:
+                        visited.insert(v, True)
+                        queue.append(v)
 
         # Build cut set
         cut_edges = CustomArray()
@@ -310,69 +645,38 @@ class Graph:
         return cut_edges
 
     #F6: Using prim's algorithm
-    def prim(self, start):
-        min_heap = CustomMinHeap()
-        visited = set()
-        mst = LinkedList()
-        total_cost = 0
-
-        visited.add(start)
-        edges = self.adj.search(start)
-        
-        for e in edges:
-            if not e.restricted:
-                min_heap.push(e.energy, (start, e.v))
-
-        while (not min_heap.is_empty()) and (len(visited) < self.node_count):
-            energy, (u, v) = min_heap.pop()
-
-            if v in visited:
-                continue
-
-            visited.add(v)
-            mst.append((u,v, energy))
-            total_cost += energy
-
-            edges = self.adj.search(v)
-            for e in edges:
-                if not e.restricted and e.v not in visited:
-                    min_heap.push(e.energy, (v, e.v))
-
-
-        return mst, total_cost
+    @_counted
+    def prim(self, start, view=None):
+        return self._view(view).prim(start)
+
+    # F6: minimum spanning forest over the open corridors taken as undirected
+    # links, one tree per component where prim only covers start's. method is
+    # "kruskal" or "boruvka" (whose rounds can use a process pool). Returns
+    # (LinkedList of (u, v, cost), total cost, [(component node ids, total)]).
+    @_counted
+    def minimum_spanning_forest(self, method="kruskal", workers=1, view=None):
+        compiled = self._view(view).compiled
+        if method == "kruskal":
+            edges, total, components = kruskal(compiled)
+        elif method == "boruvka":
+            edges, total, components = boruvka(compiled, workers)
+        else:
+            raise ValueError(f"unknown method {method!r}")
+
+        forest = LinkedList()
+        for edge in edges:
+            forest.append(edge)
+        return forest, total, components
 
     #F5 Charging station placement for Large-Scale Coverage
+    @_counted
     def multi_source_dijkstra(self, sources):
+        graph = self.compile()
+        distances = graph.multi_source_dijkstra(sources)
 
         dist = CustomHashMap()
-        pq = CustomMinHeap()
-
-        # initialize
-        for node_id, _ in self.nodes.items():
-            dist.insert(node_id, float("inf"))
-
-        for s in sources:
-            dist.insert(s, 0)
-            pq.push(0, s)
-
-        while not pq.is_empty():
-            d, u = pq.pop()
-            if d > dist.search(u):
-                continue
-
-            edges = self.adj.search(u)
-            if edges is None:
-                continue
-
-            for e in edges:
-                if e.restricted:
-                    continue
-                v = e.v
-                nd = d + e.energy
-                if nd < dist.search(v):
-                    dist.insert(v, nd)
-                    pq.push(nd, v)
-
+        for i in range(graph.node_count):
+            dist.insert(graph.ids[i], distances[i])
         return dist
     
     def find_uncovered_corridors(self, dist, R):
@@ -391,47 +695,19 @@ class Graph:
 
         return uncovered
 
+    # Greedy: while some corridor has both ends farther than R from every
+    # station, put the next station on the farthest such endpoint; after that,
+    # on the node farthest from any station. Distances are updated per station
+    # only where it is closer; see charging_placement.py.
+    @_counted
     def optimize_charging_station_placement(self, k, R):
-        # 1. collect existing charging stations
-        charging = CustomArray()
-        for node_id, node in self.nodes.items():
-            if node.type == "charging":
-                charging.append(node_id)
-
-        # 2. greedy placement
-        for _ in range(k):
-            # compute distances
-            dist = self.multi_source_dijkstra(charging)
-
-            # check uncovered corridors
-            uncovered = self.find_uncovered_corridors(dist, R)
-
-            candidate = None
-            max_dist = -1
-
-            if len(uncovered) > 0:
-                # PRIORITY: fix uncovered corridors
-                for (u, v) in uncovered:
-                    if dist.search(u) > max_dist:
-                        max_dist = dist.search(u)
-                        candidate = u
-                    if dist.search(v) > max_dist:
-                        max_dist = dist.search(v)
-                        candidate = v
-            else:
-                # minimize average distance → pick farthest node
-                for node_id, _ in self.nodes.items():
-                    d = dist.search(node_id)
-                    if d > max_dist:
-                        max_dist = d
-                        candidate = node_id
-
-            if candidate is None:
-                break
-
-            charging.append(candidate)
+        return corridor_greedy(self.compile(), k, R)
 
-        return charging
+    # F5: k more stations for an explicit objective over the demand nodes
+    # (all nodes by default): "coverage" within R, "k_median" or "k_center"
+    @_counted
+    def place_charging_stations(self, k, objective="k_median", R=None, demand=None, candidates=None):
+        return place_stations(self.compile(), k, objective, R, demand, candidates)
     
     def visualize_graph(self):
         G = nx.DiGraph()
@@ -0,0 +1,193 @@
+import cProfile
+import json
+import pstats
+import time
+from data_structure import CustomMinHeap, IndexedMinHeap, LinkedList
+
+# Opt-in operation counters for the graph algorithms.
+#
+# Nothing is counted unless a collect() scope is open: heap and hash-map
+# counters come from swapping counting methods onto CustomMinHeap,
+# IndexedMinHeap and LinkedList (the hash map's bucket chains) for the length
+# of the scope, and the algorithms add their own totals (nodes settled,
+# corridors relaxed, augmenting paths...) at the end of a call, only after
+# checking `active`. Outside a scope the classes are untouched and each
+# algorithm pays one attribute check per call.
+#
+# The swap is process-wide: calls made from other threads while a scope is
+# open are counted into it. Process pools are not counted at all.
+
+active = None                                # CallStats being filled, None when off
+
+FIELDS = (
+    "nodes_settled",        # nodes (or battery labels) taken off the queue for good
+    "edges_relaxed",        # corridors looked at from settled nodes
+    "heap_pushes",
+    "heap_pops",
+    "decrease_keys",
+    "stale_pops",           # lazy-heap entries popped and thrown away
+    "augmenting_paths",
+    "bfs_passes",
+    "hash_lookups",         # bucket chain walks in CustomHashMap
+    "hash_probes",          # chain nodes compared over all lookups
+    "max_probe",            # longest single walk
+)
+
+
+class CallStats:
+    def __init__(self, name=""):
+        self.name = name
+        self.started = 0.0                   # time.perf_counter() when the scope opened
+        self.seconds = 0.0
+        for field in FIELDS:
+            setattr(self, field, 0)
+
+    # settled nodes whose corridors were all scanned, plus `unscanned` nodes
+    # settled without a scan (a search target it stopped at)
+    def settle(self, offsets, scanned, unscanned=0):
+        count = unscanned
+        edges = 0
+        for u in scanned:
+            count += 1
+            edges += offsets[u + 1] - offsets[u]
+        self.nodes_settled += count
+        self.edges_relaxed += edges
+
+    def merge(self, other):
+        for field in FIELDS:
+            if field == "max_probe":
+                self.max_probe = max(self.max_probe, other.max_probe)
+            else:
+                setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def as_dict(self):
+        stats = {"name": self.name, "seconds": self.seconds}
+        for field in FIELDS:
+            stats[field] = getattr(self, field)
+        return stats
+
+    def __repr__(self):
+        counts = ", ".join(f"{field}={getattr(self, field)}" for field in FIELDS if getattr(self, field))
+        return f"CallStats({self.name!r}, {self.seconds * 1000:.3f} ms, {counts})"
+
+
+def _counting(cls, name, field):
+    original = getattr(cls, name)
+
+    def method(self, *args):
+        setattr(active, field, getattr(active, field) + 1)
+        return original(self, *args)
+    return original, method
+
+
+def _counting_find(self, key):
+    probes = 0
+    current = self.head
+    while current:
+        probes += 1
+        if current.data[0] == key:
+            break
+        current = current.next
+    active.hash_lookups += 1
+    active.hash_probes += probes
+    if probes > active.max_probe:
+        active.max_probe = probes
+    return current
+
+
+_PATCHES = [
+    (cls, name) + _counting(cls, name, field)
+    for cls, name, field in (
+        (IndexedMinHeap, "push", "heap_pushes"),
+        (IndexedMinHeap, "pop", "heap_pops"),
+        (IndexedMinHeap, "decrease_key", "decrease_keys"),
+        (CustomMinHeap, "push", "heap_pushes"),
+        (CustomMinHeap, "pop", "heap_pops"),
+    )
+] + [(LinkedList, "find", LinkedList.find, _counting_find)]
+
+
+def _install():
+    for cls, name, _, method in _PATCHES:
+        setattr(cls, name, method)
+
+
+def _uninstall():
+    for cls, name, original, _ in _PATCHES:
+        setattr(cls, name, original)
+
+
+class collect:
+    # with collect("dijkstra") as stats: ... counts everything run inside.
+    # Scopes nest: an inner scope gets its own CallStats, which is added to
+    # the outer one when it closes. callback(stats) runs on exit.
+    def __init__(self, name="", callback=None):
+        self.stats = CallStats(name)
+        self.callback = callback
+        self.outer = None
+
+    def __enter__(self):
+        global active
+        self.outer = active
+        if self.outer is None:
+            _install()
+        active = self.stats
+        self.stats.started = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        global active
+        self.stats.seconds = time.perf_counter() - self.stats.started
+        active = self.outer
+        if self.outer is None:
+            _uninstall()
+        else:
+            self.outer.merge(self.stats)
+        if self.callback is not None:
+            self.callback(self.stats)
+        return False
+
+
+class TraceRecorder:
+    # Callback that keeps every CallStats it is given and writes them as a
+    # Chrome trace (chrome://tracing, Perfetto): one complete event per call
+    # with its counters as args.
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, stats):
+        self.calls.append(stats)
+
+    def events(self):
+        origin = min((stats.started for stats in self.calls), default=0.0)
+        events = []
+        for stats in self.calls:
+            args = stats.as_dict()
+            del args["name"], args["seconds"]
+            events.append({
+                "name": stats.name,
+                "ph": "X",
+                "ts": round((stats.started - origin) * 1e6, 3),
+                "dur": round(stats.seconds * 1e6, 3),
+                "pid": 1,
+                "tid": 1,
+                "args": args,
+            })
+        return events
+
+    def write(self, filepath):
+        with open(filepath, "w") as f:
+            json.dump({"traceEvents": self.events(), "displayTimeUnit": "ms"}, f, indent=1)
+
+
+# fn() under cProfile; the raw profile goes to filepath (for snakeviz,
+# pstats or gprof2dot) and the `top` most expensive functions by cumulative
+# time are printed
+def profile(fn, filepath=None, top=20):
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        if filepath is not None:
+            profiler.dump_stats(filepath)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
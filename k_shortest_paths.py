@@ -0,0 +1,210 @@
+import instrumentation
+from batch_routing import worker_pool, worker_state
+from data_structure import CustomMinHeap
+
+
+def _spur_job(job):
+    return worker_state().spur(*job)
+
+
+class SpurSearch:
+    # Everything the spur searches of one k_shortest_paths query share: the
+    # compiled graph and the shortest-path tree into the target (to_target[u]
+    # is the cheapest u → target energy, next_slot[u] the first corridor of
+    # that route). Closing corridors or nodes can only make routes dearer, so
+    # to_target is an exact-where-possible lower bound for A*, and any node
+    # whose tree route avoids everything the spur has to avoid finishes the
+    # search on the spot.
+    def __init__(self, compiled, t):
+        self.compiled = compiled
+        self.t = t
+        self.to_target, self.next_slot = self._reverse_tree(t)
+
+    def _reverse_tree(self, t):
+        c = self.compiled
+        rev_offsets, rev_edges, sources = c.rev_offsets, c.rev_edges, c.sources
+        energy, restricted = c.energy, c.restricted
+        dist = [None] * c.size
+        next_slot = [-1] * c.size
+        dist[t] = 0
+        pq = CustomMinHeap()
+        pq.push(0, t)
+        settled = 0
+        stale = 0
+        relaxed = 0
+        while not pq.is_empty():
+            d, v = pq.pop()
+            if d > dist[v]:
+                stale += 1
+                continue
+            settled += 1
+            relaxed += rev_offsets[v + 1] - rev_offsets[v]
+            for j in range(rev_offsets[v], rev_offsets[v + 1]):
+                i = rev_edges[j]
+                if restricted[i]:
+                    continue
+                u = sources[i]
+                nd = d + energy[i]
+                if dist[u] is None or nd < dist[u]:
+                    dist[u] = nd
+                    next_slot[u] = i
+                    pq.push(nd, u)
+        self._record(settled, stale, relaxed)
+        return dist, next_slot
+
+    def _record(self, settled, stale, relaxed):
+        stats = instrumentation.active
+        if stats is not None:
+            stats.nodes_settled += settled
+            stats.stale_pops += stale
+            stats.edges_relaxed += relaxed
+
+    # slots of the tree route from u to the target
+    def tree_slots(self, u):
+        targets, next_slot = self.compiled.targets, self.next_slot
+        slots = []
+        while u != self.t:
+            i = next_slot[u]
+            slots.append(i)
+            u = targets[i]
+        return slots
+
+    # Cheapest spur → target route that avoids the `blocked` nodes (the root
+    # path before the spur) and leaves the spur through none of the `banned`
+    # slots. Returns (energy, slots) or None.
+    def spur(self, spur, blocked, banned):
+        c = self.compiled
+        offsets, targets, energy, restricted = c.offsets, c.targets, c.energy, c.restricted
+        to_target, next_slot, t = self.to_target, self.next_slot, self.t
+        blocked = set(blocked)
+        banned = set(banned)
+
+        # clean[u]: u's tree route stays clear of blocked nodes and the spur
+        clean = {t: True}
+
+        def is_clean(u):
+            walked = []
+            v = u
+            while v not in clean:
+                if v in blocked or v == spur:
+                    clean[v] = False
+                    break
+                walked.append(v)
+                v = targets[next_slot[v]]
+            result = clean[v]
+            for w in walked:
+                clean[w] = result
+            return result
+
+        g = {spur: 0}
+        prev = {}                            # node → slot it was reached through
+        pq = CustomMinHeap()
+        pq.push(to_target[spur], spur)
+        settled = 0
+        stale = 0
+        relaxed = 0
+        while not pq.is_empty():
+            f, u = pq.pop()
+            d = g[u]
+            if f > d + to_target[u]:
+                stale += 1
+                continue
+            settled += 1
+            if u == spur:
+                finished = next_slot[u] not in banned and is_clean(targets[next_slot[u]])
+            else:
+                finished = is_clean(u)
+            if finished:
+                slots = []
+                v = u
+                while v != spur:
+                    i = prev[v]
+                    slots.append(i)
+                    v = c.sources[i]
+                slots.reverse()
+                self._record(settled, stale, relaxed)
+                return d + to_target[u], slots + self.tree_slots(u)
+
+            relaxed += offsets[u + 1] - offsets[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i] or (u == spur and i in banned):
+                    continue
+                v = targets[i]
+                if v in blocked or v == spur or to_target[v] is None:
+                    continue
+                nd = d + energy[i]
+                if v not in g or nd < g[v]:
+                    g[v] = nd
+                    prev[v] = i
+                    pq.push(nd + to_target[v], v)
+        self._record(settled, stale, relaxed)
+        return None
+
+
+# F2: the k cheapest loopless start → target routes, cheapest first, as
+# (energy, path) pairs (Yen's algorithm). Each new route branches off the
+# previous one at some spur node: the root up to the spur is kept, and the rest
+# is the cheapest route from the spur that avoids the root's nodes and the
+# corridors earlier routes with the same root took out of the spur. Spurs
+# before the point where a route left the one it came from were already tried
+# for that one (Lawler), and the spur searches share one reverse shortest-path
+# tree (see SpurSearch), so most of them end after a few pops. With workers > 1
+# the spurs of each round run in a process pool that receives the graph and
+# the tree once per worker.
+def k_shortest_paths(compiled, start, target, k, workers=1):
+    s = compiled.index.search(start)
+    t = compiled.index.search(target)
+    if s is None or t is None or k <= 0:
+        if start == target and k > 0:
+            return [(0, [start])]
+        return []
+
+    search = SpurSearch(compiled, t)
+    if search.to_target[s] is None:
+        return []
+
+    targets = compiled.targets
+    found = [(search.to_target[s], search.tree_slots(s), 0)]   # (energy, slots, deviation)
+    candidates = CustomMinHeap()
+    seen = {tuple(found[0][1])}
+
+    pool, workers = worker_pool(workers, search)
+    try:
+        while len(found) < k:
+            _, slots, deviation = found[-1]
+            nodes = [s] + [targets[i] for i in slots]
+            jobs = []
+            roots = []
+            root_cost = sum(compiled.energy[i] for i in slots[:deviation])
+            for j in range(deviation, len(slots)):
+                root = slots[:j]
+                banned = [p[j] for _, p, _ in found if len(p) > j and p[:j] == root]
+                jobs.append((nodes[j], nodes[:j], banned))
+                roots.append((j, root_cost, root))
+                root_cost += compiled.energy[slots[j]]
+
+            if pool is None:
+                results = [search.spur(*job) for job in jobs]
+            else:
+                results = pool.map(_spur_job, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+
+            for (j, root_cost, root), result in zip(roots, results):
+                if result is None:
+                    continue
+                cost, spur_slots = result
+                route = root + spur_slots
+                key = tuple(route)
+                if key not in seen:
+                    seen.add(key)
+                    candidates.push((root_cost + cost, len(route)), (route, j))
+
+            if candidates.is_empty():
+                break
+            (cost, _), (route, j) = candidates.pop()
+            found.append((cost, route, j))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    ids = compiled.ids
+    return [(cost, [start] + [ids[targets[i]] for i in route]) for cost, route, _ in found]
@@ -0,0 +1,354 @@
+import instrumentation
+from data_structure import CustomArray, CustomHashMap
+
+# containers that mean "several hubs" where one hub id is also accepted;
+# anything else is taken as a single node id, whatever its type
+HUB_LISTS = (list, tuple, set, frozenset, CustomArray)
+
+
+class ResidualGraph:
+    # Array-backed residual network. Arc a runs from to[a ^ 1] to to[a] with
+    # remaining capacity cap[a]; arc a ^ 1 is its reverse. The arcs leaving node u
+    # are arcs[arc_offsets[u]] .. arcs[arc_offsets[u + 1] - 1]. Nodes are the
+    # CompiledGraph indices plus the super sink and, with several hubs, a super
+    # source right after it.
+    #
+    # Restricted corridors keep their arc pair with no capacity left on either
+    # side; base[a] remembers the corridor capacity so cap[a] + cap[a ^ 1] ==
+    # base[a] holds for every open corridor and 0 for a blocked one.
+    def __init__(self, compiled, sink_id, head, to, cap, base, source_id=None):
+        self.compiled = compiled
+        self.sink_id = sink_id
+        self.sink = compiled.size
+        self.source_id = source_id
+        self.source = None if source_id is None else compiled.size + 1
+        self.size = compiled.size + (1 if source_id is None else 2)
+        self.to = to
+        self.cap = cap
+        self.base = base
+
+        self.arc_offsets = [0] * (self.size + 1)
+        for u in head:
+            self.arc_offsets[u + 1] += 1
+        for u in range(self.size):
+            self.arc_offsets[u + 1] += self.arc_offsets[u]
+        self.arcs = [0] * len(head)
+        fill = self.arc_offsets[:-1]
+        for a, u in enumerate(head):
+            self.arcs[fill[u]] = a
+            fill[u] += 1
+
+    # F3: one forward arc per corridor (parallel corridors collapse onto the
+    # last one) plus an arc from every area node into the super sink and, if
+    # hubs are given, one from the super source into every hub
+    @classmethod
+    def from_compiled(cls, compiled, sinks, sink_id, sink_capacity, hubs=None, source_id="SUPER_SOURCE"):
+        head, to, cap, base = [], [], [], []
+        last_arc = [-1] * (compiled.size + 1)
+        for u in range(compiled.node_count):
+            row = range(compiled.offsets[u], compiled.offsets[u + 1])
+            for i in row:
+                v = compiled.targets[i]
+                a = last_arc[v]
+                if a == -1:
+                    a = last_arc[v] = len(to)
+                    head.extend((u, v))
+                    to.extend((v, u))
+                    cap.extend((0, 0))
+                    base.extend((0, 0))
+                base[a] = compiled.capacity[i]
+                if not compiled.restricted[i]:
+                    cap[a] = compiled.capacity[i]
+            for i in row:
+                last_arc[compiled.targets[i]] = -1
+
+        _link_sinks(compiled, sinks, head, to, cap, base, sink_capacity)
+        if hubs is None:
+            return cls(compiled, sink_id, head, to, cap, base)
+        _link_source(compiled, hubs, head, to, cap, base, sink_capacity)
+        return cls(compiled, sink_id, head, to, cap, base, source_id)
+
+    def node_index(self, node_id):
+        if node_id == self.sink_id:
+            return self.sink
+        if node_id == self.source_id:
+            return self.source
+        return self.compiled.node_index(node_id)
+
+    def node_id(self, index):
+        if index == self.sink:
+            return self.sink_id
+        if index == self.source:
+            return self.source_id
+        return self.compiled.ids[index]
+
+    # forward arc of the corridor u → v, or None
+    def corridor_arc(self, u, v):
+        ui = self.compiled.node_index(u)
+        vi = self.compiled.node_index(v)
+        if ui is None or vi is None:
+            return None
+        for j in range(self.arc_offsets[ui], self.arc_offsets[ui + 1]):
+            a = self.arcs[j]
+            if a % 2 == 0 and self.to[a] == vi:
+                return a
+        return None
+
+    # BFS distances from s over arcs with capacity left, -1 if unreachable.
+    # With a target t the search stops after t's layer.
+    def levels(self, s, t=None):
+        arc_offsets, arcs, to, cap = self.arc_offsets, self.arcs, self.to, self.cap
+        if instrumentation.active is not None:
+            instrumentation.active.bfs_passes += 1
+        level = [-1] * self.size
+        level[s] = 0
+        queue = [s]
+        qi = 0
+        while qi < len(queue):
+            u = queue[qi]
+            qi += 1
+            if t is not None and level[t] != -1 and level[u] >= level[t]:
+                break
+            for j in range(arc_offsets[u], arc_offsets[u + 1]):
+                a = arcs[j]
+                v = to[a]
+                if cap[a] > 0 and level[v] == -1:
+                    level[v] = level[u] + 1
+                    queue.append(v)
+        return level
+
+    # Dinic: build the BFS level graph, push a blocking flow through it with
+    # current-arc pointers, and repeat until the sink is unreachable.
+    def dinic(self, source, sink=None):
+        s = self.node_index(source)
+        t = self.sink if sink is None else self.node_index(sink)
+        if s is None or t is None or s == t:
+            return 0
+        return self.augment(s, t)
+
+    # pushes up to `limit` units (no limit if None) from index s to index t
+    def augment(self, s, t, limit=None):
+        total = 0
+        while limit is None or total < limit:
+            level = self.levels(s, t)
+            if level[t] == -1:
+                break
+            pushed = self._blocking_flow(s, t, level, None if limit is None else limit - total)
+            if pushed == 0:
+                break
+            total += pushed
+        return total
+
+    def _blocking_flow(self, s, t, level, limit):
+        arc_offsets, arcs, to, cap = self.arc_offsets, self.arcs, self.to, self.cap
+        current = arc_offsets[:-1]
+        total = 0
+        paths = 0
+        path = []
+        u = s
+        while True:
+            if u == t:
+                paths += 1
+                flow = cap[path[0]]
+                for a in path:
+                    if cap[a] < flow:
+                        flow = cap[a]
+                if limit is not None and limit - total < flow:
+                    flow = limit - total
+                for a in path:
+                    cap[a] -= flow
+                    cap[a ^ 1] += flow
+                total += flow
+                if limit is not None and total >= limit:
+                    self._record_paths(paths)
+                    return total
+                # retreat to the tail of the first saturated arc
+                for k in range(len(path)):
+                    if cap[path[k]] == 0:
+                        u = to[path[k] ^ 1]
+                        del path[k:]
+                        break
+                continue
+
+            end = arc_offsets[u + 1]
+            while current[u] < end:
+                a = arcs[current[u]]
+                if cap[a] > 0 and level[to[a]] == level[u] + 1:
+                    break
+                current[u] += 1
+
+            if current[u] < end:
+                a = arcs[current[u]]
+                path.append(a)
+                u = to[a]
+            elif u == s:
+                self._record_paths(paths)
+                return total
+            else:
+                # dead end: drop u from the level graph and step back
+                level[u] = -1
+                a = path.pop()
+                u = to[a ^ 1]
+                current[u] += 1
+
+    def _record_paths(self, paths):
+        if instrumentation.active is not None:
+            instrumentation.active.augmenting_paths += paths
+
+    # F4: nodes still reachable from source in the residual network
+    def reachable(self, source):
+        s = self.node_index(source)
+        if s is None:
+            return bytearray(self.size)
+        return bytearray(1 if d != -1 else 0 for d in self.levels(s))
+
+    # id → remaining capacity towards each neighbour, like the old residual map
+    def search(self, node_id):
+        u = self.node_index(node_id)
+        if u is None:
+            return None
+        inner = CustomHashMap()
+        for j in range(self.arc_offsets[u], self.arc_offsets[u + 1]):
+            a = self.arcs[j]
+            v = self.node_id(self.to[a])
+            existing = inner.search(v)
+            inner.insert(v, self.cap[a] if existing is None else existing + self.cap[a])
+        return inner
+
+    def items(self):
+        for u in range(self.size):
+            node_id = self.node_id(u)
+            yield node_id, self.search(node_id)
+
+
+# arcs from every sink node into the super sink (index compiled.size)
+def _link_sinks(compiled, sinks, head, to, cap, base, capacity):
+    sink = compiled.size
+    linked = bytearray(compiled.size)
+    for node in sinks:
+        v = compiled.node_index(node)
+        if v is None or linked[v]:
+            continue
+        linked[v] = 1
+        head.extend((v, sink))
+        to.extend((sink, v))
+        cap.extend((capacity, 0))
+        base.extend((capacity, 0))
+
+
+# arcs from the super source (index compiled.size + 1) into every hub
+def _link_source(compiled, hubs, head, to, cap, base, capacity):
+    source = compiled.size + 1
+    linked = bytearray(compiled.size)
+    for hub in hubs:
+        u = compiled.node_index(hub)
+        if u is None or linked[u]:
+            continue
+        linked[u] = 1
+        head.extend((source, u))
+        to.extend((u, source))
+        cap.extend((capacity, 0))
+        base.extend((capacity, 0))
+
+
+class DeliveryFlow:
+    # Max-flow from start_hub into area_nodes that follows set_restricted and
+    # remove_edge on the graph by repairing the last residual network:
+    # - restricting or removing u → v cancels the f units on that corridor,
+    #   reroutes what it can from u to v, returns the rest to the hub and from
+    #   the sink, then looks for augmenting paths again;
+    # - releasing u → v reopens its capacity and only searches for new paths.
+    # Energy changes do not affect it; add_node, add_edge and capacity changes
+    # make the next call solve from scratch. A HUB_LISTS start_hub is several
+    # hubs fed from a super source, as in calculate_delivery_capacity.
+    def __init__(self, graph, start_hub, area_nodes, sink_id="SUPER_SINK", sink_capacity=10**12,
+                 source_id="SUPER_SOURCE"):
+        self.graph = graph
+        self.start_hub = start_hub
+        if isinstance(start_hub, HUB_LISTS):
+            self.hubs = list(start_hub)
+            self.source = source_id
+        else:
+            self.hubs = None
+            self.source = start_hub
+        self.area_nodes = list(area_nodes)
+        self.sink_id = sink_id
+        self.sink_capacity = sink_capacity
+        self._residual = None
+        self._max_flow = 0
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        self.graph.unsubscribe(self._on_change)
+
+    def max_flow(self):
+        self._ensure_solved()
+        return self._max_flow
+
+    def residual(self):
+        self._ensure_solved()
+        return self._residual
+
+    def min_cut(self):
+        return self.graph._extract_min_cut(self.residual(), self.source)
+
+    def _ensure_solved(self):
+        if self._residual is None:
+            self._residual = ResidualGraph.from_compiled(
+                self.graph.compile(), self.area_nodes, self.sink_id, self.sink_capacity, self.hubs, self.source
+            )
+            self._max_flow = self._residual.dinic(self.source)
+
+    def _on_change(self, kind, *args):
+        if self._residual is None or kind == "energy":
+            return
+        if kind == "removed":
+            # a removed corridor is closed for good: the residual keeps its
+            # arcs blocked, as the tombstoned slot of the snapshot does
+            kind, args = "restricted", args + (True,)
+        if kind != "restricted":
+            self._residual = None
+            return
+
+        u, v, restricted = args
+        residual = self._residual
+        a = residual.corridor_arc(u, v)
+        if a is None:
+            return
+        cap = residual.cap
+        blocked = cap[a] + cap[a ^ 1] == 0
+
+        s = residual.node_index(self.source)
+        if s is None:
+            # nothing can flow from an unknown hub; just keep the arcs in step
+            if restricted:
+                cap[a] = cap[a ^ 1] = 0
+            elif blocked:
+                cap[a] = residual.base[a]
+            return
+
+        if not restricted:
+            if blocked:
+                cap[a] = residual.base[a]
+                self._max_flow += residual.augment(s, residual.sink)
+            return
+
+        if blocked:
+            return
+        flow = cap[a ^ 1]
+        cap[a] = cap[a ^ 1] = 0
+        if flow == 0:
+            return
+
+        ui = residual.to[a ^ 1]
+        vi = residual.to[a]
+        excess = flow - residual.augment(ui, vi, flow)
+        if excess == 0:
+            # rerouted completely: same value, and capacity only went down
+            return
+        if ui != s:
+            residual.augment(ui, s, excess)
+        if vi != s:
+            residual.augment(residual.sink, vi, excess)
+            self._max_flow -= excess
+        self._max_flow += residual.augment(s, residual.sink)
@@ -0,0 +1,132 @@
+import instrumentation
+from data_structure import CustomArray, IndexedMinHeap
+from max_flow import ResidualGraph, _link_sinks, _link_source
+
+
+class MinCostFlow(ResidualGraph):
+    # F3: maximum flow from a set of hubs into a set of area nodes at the least
+    # total energy. It is the ResidualGraph of max_flow.py with a cost per arc
+    # (cost[a ^ 1] == -cost[a], energy for corridors, 0 for the super source
+    # and sink arcs), except that every corridor slot i keeps its own arc pair,
+    # arcs 2 * i and 2 * i + 1, so parallel corridors of different energy stay
+    # apart and the flow on each one is cap[2 * i + 1].
+    #
+    # Successive shortest paths with potentials: each round a Dijkstra over
+    # the reduced costs cost[a] + potential[u] - potential[v] finds the
+    # cheapest augmenting route, stopping as soon as the sink is settled, and
+    # the potentials are moved so that reduced costs stay >= 0 on every arc
+    # with capacity left, reverse arcs included. Corridor energies must not be
+    # negative, as for dijkstra.
+    def __init__(self, compiled, hubs, area_nodes, sink_id="SUPER_SINK", source_id="SUPER_SOURCE",
+                 capacity=10**12):
+        offsets, targets = compiled.offsets, compiled.targets
+        head, to, cap, base, cost = [], [], [], [], []
+        for u in range(compiled.node_count):
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                head.extend((u, v))
+                to.extend((v, u))
+                cap.extend((0 if compiled.restricted[i] else compiled.capacity[i], 0))
+                base.extend((compiled.capacity[i], 0))
+                cost.extend((compiled.energy[i], -compiled.energy[i]))
+
+        _link_sinks(compiled, area_nodes, head, to, cap, base, capacity)
+        _link_source(compiled, hubs, head, to, cap, base, capacity)
+        cost.extend([0] * (len(to) - len(cost)))
+
+        super().__init__(compiled, sink_id, head, to, cap, base, source_id)
+        self.cost = cost
+        self.potential = [0] * self.size
+        self.flow = 0
+
+    # pushes up to `limit` more units (no limit if None) from the hubs into
+    # the area at the least energy; returns the total flow so far
+    def solve(self, limit=None):
+        s, t = self.source, self.sink
+        while limit is None or self.flow < limit:
+            prev = self._reduce_costs(s, t)
+            if prev is None:
+                break
+            self.flow += self._augment_path(s, t, prev, None if limit is None else limit - self.flow)
+        return self.flow
+
+    # Dijkstra from s over reduced costs, stopping once t is settled, then
+    # potential[v] += min(dist[v], dist[t]) for every v. Returns the arc into
+    # each node on its cheapest route (-1 for s), or None when t is out of
+    # reach.
+    def _reduce_costs(self, s, t):
+        arc_offsets, arcs, to, cap, cost = self.arc_offsets, self.arcs, self.to, self.cap, self.cost
+        potential = self.potential
+        dist = [None] * self.size
+        prev = [-1] * self.size
+        dist[s] = 0
+        pq = IndexedMinHeap(self.size)
+        pq.push(0, s)
+        settled = 0
+        relaxed = 0
+        while not pq.is_empty():
+            d, u = pq.pop()
+            settled += 1
+            if u == t:
+                break
+            relaxed += arc_offsets[u + 1] - arc_offsets[u]
+            pu = potential[u]
+            for j in range(arc_offsets[u], arc_offsets[u + 1]):
+                a = arcs[j]
+                if cap[a] <= 0:
+                    continue
+                v = to[a]
+                nd = d + cost[a] + pu - potential[v]
+                if dist[v] is None:
+                    dist[v] = nd
+                    prev[v] = a
+                    pq.push(nd, v)
+                elif nd < dist[v] and pq.contains(v):
+                    dist[v] = nd
+                    prev[v] = a
+                    pq.decrease_key(v, nd)
+        stats = instrumentation.active
+        if stats is not None:
+            stats.nodes_settled += settled
+            stats.edges_relaxed += relaxed
+
+        dt = dist[t]
+        if dt is None:
+            return None
+        for v in range(self.size):
+            d = dist[v]
+            potential[v] += d if d is not None and d < dt else dt
+        return prev
+
+    def _augment_path(self, s, t, prev, limit):
+        cap, to = self.cap, self.to
+        flow = limit
+        v = t
+        while v != s:
+            a = prev[v]
+            if flow is None or cap[a] < flow:
+                flow = cap[a]
+            v = to[a ^ 1]
+        v = t
+        while v != s:
+            a = prev[v]
+            cap[a] -= flow
+            cap[a ^ 1] += flow
+            v = to[a ^ 1]
+        self._record_paths(1)
+        return flow
+
+    # (u, v, flow) for every corridor carrying flow
+    def corridor_flows(self):
+        compiled = self.compiled
+        ids, sources, targets = compiled.ids, compiled.sources, compiled.targets
+        flows = CustomArray()
+        for i in range(compiled.edge_count):
+            if self.cap[2 * i + 1] > 0:
+                flows.append((ids[sources[i]], ids[targets[i]], self.cap[2 * i + 1]))
+        return flows
+
+    # total energy of the current flow
+    def energy(self):
+        energy = self.compiled.energy
+        return sum(self.cap[2 * i + 1] * energy[i] for i in range(self.compiled.edge_count))
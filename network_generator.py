@@ -0,0 +1,146 @@
+import json
+import math
+import random
+import sys
+
+# id prefix and display name per node type, as in drone_testdata_*.json
+PREFIX = {"hub": "HUB", "delivery": "D", "charging": "CH", "relay": "R"}
+NAME = {"hub": "Hub", "delivery": "Delivery Point", "charging": "Charging Station", "relay": "Relay Station"}
+
+KINDS = ("grid", "geometric", "scale_free")
+
+
+# Synthetic drone network of n nodes in the drone_testdata_*.json schema, the
+# same for the same (kind, n, seed). Corridor energy is written as "energy",
+# the key Graph.load_json reads (the test data's "energy_cost" is not read):
+# - "grid": a square lattice, corridors between horizontal and vertical
+#   neighbours;
+# - "geometric": uniform random points, corridors between points closer than
+#   a radius chosen for about six neighbours each, energy = distance;
+# - "scale_free": Barabási–Albert preferential attachment, every new node
+#   linking to m existing ones, so a few nodes end up with most corridors.
+# Types are spread at random: about one hub per 1000 nodes (at least one),
+# a quarter charging stations, an eighth relays and the rest delivery points.
+# Most corridors are bidirectional; `restricted` of them are flagged
+# restricted, as the test data does.
+def generate(kind, n, seed=0, m=2, restricted=0.04):
+    rng = random.Random(seed)
+    if kind == "grid":
+        points, links = _grid(n)
+    elif kind == "geometric":
+        points, links = _geometric(n, rng)
+    elif kind == "scale_free":
+        points, links = _scale_free(n, m, rng)
+    else:
+        raise ValueError(f"unknown kind {kind!r}")
+
+    types = ["delivery"] * n
+    hubs = max(1, n // 1000)
+    charging = n // 4
+    relays = n // 8
+    picked = rng.sample(range(n), min(n, hubs + charging + relays))
+    for i in picked[:hubs]:
+        types[i] = "hub"
+    for i in picked[hubs:hubs + charging]:
+        types[i] = "charging"
+    for i in picked[hubs + charging:]:
+        types[i] = "relay"
+
+    ids = []
+    nodes = []
+    counters = {t: 0 for t in PREFIX}
+    for i in range(n):
+        t = types[i]
+        counters[t] += 1
+        k = counters[t]
+        node_id = PREFIX[t] if t == "hub" and k == 1 else f"{PREFIX[t]}{k}"
+        ids.append(node_id)
+        x, y = points[i]
+        nodes.append({"id": node_id, "name": f"{NAME[t]} {k}", "type": t, "x": x, "y": y})
+
+    edges = []
+    for u, v, energy in links:
+        if rng.random() < 0.5:
+            u, v = v, u
+        dx = points[u][0] - points[v][0]
+        dy = points[u][1] - points[v][1]
+        edges.append({
+            "from": ids[u],
+            "to": ids[v],
+            "energy": energy if energy is not None else rng.randint(5, 20),
+            "capacity": rng.randint(1, 5),
+            "distance": round(math.hypot(dx, dy)),
+            "bidirectional": rng.random() < 0.8,
+            "restricted": rng.random() < restricted,
+        })
+    return {"nodes": nodes, "edges": edges}
+
+
+def _grid(n):
+    side = math.ceil(math.sqrt(n))
+    points = [(10 * (i % side), 10 * (i // side)) for i in range(n)]
+    links = []
+    for i in range(n):
+        if (i + 1) % side and i + 1 < n:
+            links.append((i, i + 1, None))
+        if i + side < n:
+            links.append((i, i + side, None))
+    return points, links
+
+
+def _geometric(n, rng):
+    # one point per 100 square units; pi * r^2 * density = 6
+    size = 10 * math.sqrt(n)
+    r = 10 * math.sqrt(6 / math.pi)
+    points = [(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(n)]
+
+    cells = {}
+    for i, (x, y) in enumerate(points):
+        cells.setdefault((int(x // r), int(y // r)), []).append(i)
+
+    links = []
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in cells.get((cx + dx, cy + dy), ()):
+                    for i in members:
+                        if i >= j:
+                            continue
+                        d = math.hypot(points[i][0] - points[j][0], points[i][1] - points[j][1])
+                        if d <= r:
+                            links.append((i, j, max(1, round(d))))
+    links.sort()
+    points = [(round(x), round(y)) for x, y in points]
+    return points, links
+
+
+def _scale_free(n, m, rng):
+    size = 10 * math.sqrt(n)
+    points = [(rng.randint(0, round(size)), rng.randint(0, round(size))) for _ in range(n)]
+
+    # a small clique to start from; `ends` lists every corridor endpoint, so a
+    # uniform pick from it is proportional to degree
+    seed_nodes = min(n, m + 1)
+    links = [(u, v, None) for u in range(seed_nodes) for v in range(u + 1, seed_nodes)]
+    ends = [x for u, v, _ in links for x in (u, v)]
+    for v in range(seed_nodes, n):
+        targets = set()
+        while len(targets) < min(m, v):
+            targets.add(rng.choice(ends) if ends else rng.randrange(v))
+        for u in sorted(targets):
+            links.append((u, v, None))
+            ends.append(u)
+            ends.append(v)
+    return points, links
+
+
+def write(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+# python network_generator.py <kind> <nodes> <output.json> [seed]
+if __name__ == "__main__":
+    kind, n, path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    write(generate(kind, n, seed), path)
@@ -0,0 +1,188 @@
+from batch_routing import worker_pool, worker_state
+from data_structure import CustomHashMap
+
+
+# Strongly connected components over the open corridors (iterative Tarjan).
+# Returns comp[u] and the number of components; components are numbered in
+# reverse topological order, so every corridor leaving component c enters a
+# component with a smaller number.
+def _components(compiled, restricted):
+    offsets, targets = compiled.offsets, compiled.targets
+    n = compiled.size
+    index = [-1] * n
+    low = [0] * n
+    comp = [-1] * n
+    stack = []
+    count = 0
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        work = [(root, offsets[root])]
+        while work:
+            u, i = work[-1]
+            end = offsets[u + 1]
+            while i < end:
+                v = targets[i]
+                i += 1
+                if restricted[i - 1]:
+                    continue
+                if index[v] == -1:
+                    work[-1] = (u, i)
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    work.append((v, offsets[v]))
+                    break
+                if comp[v] == -1 and index[v] < low[u]:
+                    low[u] = index[v]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[u] < low[parent]:
+                        low[parent] = low[u]
+                if low[u] == index[u]:
+                    while True:
+                        w = stack.pop()
+                        comp[w] = count
+                        if w == u:
+                            break
+                    count += 1
+    return comp, count
+
+
+# F1: all sources in one pass. mask[v] has bit b set when source b reaches v.
+# Nodes of a component reach each other, so they share one mask, and
+# sweeping the components in topological order ORs every corridor's word of
+# sources into its target component exactly once.
+def _reach_masks(compiled, sources, restricted):
+    offsets, targets = compiled.offsets, compiled.targets
+    comp, count = _components(compiled, restricted)
+
+    members = [[] for _ in range(count)]
+    for u in range(compiled.size):
+        members[comp[u]].append(u)
+    comp_mask = [0] * count
+    for bit, s in enumerate(sources):
+        comp_mask[comp[s]] |= 1 << bit
+
+    for c in range(count - 1, -1, -1):
+        m = comp_mask[c]
+        if not m:
+            continue
+        for u in members[c]:
+            for i in range(offsets[u], offsets[u + 1]):
+                if restricted[i]:
+                    continue
+                d = comp[targets[i]]
+                if d != c:
+                    comp_mask[d] |= m
+    return [comp_mask[comp[u]] for u in range(compiled.size)]
+
+
+# one scenario = extra slots to close on top of the snapshot's restrictions
+def _scenario_masks(sources, cols, closed, compiled=None):
+    compiled = worker_state(compiled)
+    restricted = compiled.restricted
+    if closed:
+        restricted = bytearray(restricted)
+        for i in closed:
+            restricted[i] = 1
+    mask = _reach_masks(compiled, sources, restricted)
+    return [mask[j] for j in cols]
+
+
+class ReachabilityMatrix:
+    # source × target reachability. Column j is stored as one int whose bit i
+    # says whether source i reaches target j.
+    def __init__(self, source_ids, target_ids, columns):
+        self.source_ids = list(source_ids)
+        self.target_ids = list(target_ids)
+        self.columns = columns
+
+        self.source_index = CustomHashMap()
+        for i, node_id in enumerate(self.source_ids):
+            self.source_index.insert(node_id, i)
+        self.target_index = CustomHashMap()
+        for j, node_id in enumerate(self.target_ids):
+            self.target_index.insert(node_id, j)
+
+    # sources default to every hub and targets to every delivery node
+    @classmethod
+    def compute(cls, compiled, sources=None, targets=None):
+        source_ids, rows, target_ids, cols = _resolve(compiled, sources, targets)
+        return cls(source_ids, target_ids, _scenario_masks(rows, cols, (), compiled))
+
+    # F1: one matrix per scenario, each scenario being the (u, v) corridors to
+    # close on top of the graph's current no-fly zones. workers > 1 spreads
+    # the scenarios over a process pool that gets the compiled graph once.
+    @classmethod
+    def scenarios(cls, compiled, scenarios, sources=None, targets=None, workers=1):
+        source_ids, rows, target_ids, cols = _resolve(compiled, sources, targets)
+        closed = [[i for u, v in corridors for i in compiled.corridor_slots(u, v)]
+                  for corridors in scenarios]
+
+        pool, workers = worker_pool(workers, compiled)
+        if pool is None:
+            results = [_scenario_masks(rows, cols, slots, compiled) for slots in closed]
+        else:
+            with pool:
+                results = list(pool.map(_scenario_masks, [rows] * len(closed),
+                                        [cols] * len(closed), closed))
+        return [cls(source_ids, target_ids, columns) for columns in results]
+
+    def reachable(self, source, target):
+        i = self.source_index.search(source)
+        j = self.target_index.search(target)
+        if i is None or j is None:
+            return False
+        return bool(self.columns[j] >> i & 1)
+
+    # targets source cannot reach, in target order
+    def unreachable(self, source):
+        i = self.source_index.search(source)
+        if i is None:
+            return list(self.target_ids)
+        return [self.target_ids[j] for j, column in enumerate(self.columns) if not column >> i & 1]
+
+    # targets that no source reaches
+    def uncovered(self):
+        return [self.target_ids[j] for j, column in enumerate(self.columns) if column == 0]
+
+    # rows of booleans, one row per source
+    def to_list(self):
+        return [[bool(column >> i & 1) for column in self.columns] for i in range(len(self.source_ids))]
+
+    def to_numpy(self):
+        import numpy as np
+        return np.array(self.to_list(), dtype=bool).reshape(len(self.source_ids), len(self.target_ids))
+
+
+def _resolve(compiled, sources, targets):
+    n = compiled.node_count
+    if sources is None:
+        sources = [compiled.ids[i] for i in range(n) if compiled.types[i] == "hub"]
+    if targets is None:
+        targets = [compiled.ids[i] for i in range(n) if compiled.types[i] == "delivery"]
+    sources = list(sources)
+    targets = list(targets)
+
+    rows = []
+    for node_id in sources:
+        i = compiled.node_index(node_id)
+        if i is None:
+            raise KeyError(node_id)
+        rows.append(i)
+    cols = []
+    for node_id in targets:
+        j = compiled.node_index(node_id)
+        if j is None:
+            raise KeyError(node_id)
+        cols.append(j)
+    return sources, rows, targets, cols
+
@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+
+class RouteCache:
+    # LRU cache of (start, target) → (cost, path tuple) and, optionally, of whole
+    # shortest-path trees per start. Sizes are counted in path nodes (a tree
+    # counts one per graph node) and the least recently used entries are evicted
+    # once max_size is exceeded.
+    #
+    # The cache follows the graph through Graph.subscribe:
+    # - restricting u → v or making it dearer evicts only the routes and trees
+    #   that use that corridor; removing it does the same for routes but drops
+    #   every tree, as the snapshot they index may be compacted;
+    # - adding edges, lifting a restriction or making a corridor cheaper can
+    #   shorten any route, so everything is dropped;
+    # - capacity changes no route;
+    # - adding a node changes no route, but the snapshot indices trees are
+    #   stored in, so only trees are dropped.
+    # If graph.version moves without an event reaching the cache, it is cleared.
+    def __init__(self, graph, max_size=1_000_000, cache_trees=False):
+        self.graph = graph
+        self.max_size = max_size
+        self.cache_trees = cache_trees
+        self.version = graph.version
+
+        self._routes = OrderedDict()          # (start, target) → (cost, path tuple)
+        self._trees = OrderedDict()           # start → (dist, prev) over snapshot indices
+        self._users = {}                      # (u, v) → keys of cached routes using u → v
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        graph.subscribe(self._on_change)
+
+    def close(self):
+        self.graph.unsubscribe(self._on_change)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "routes": len(self._routes),
+            "trees": len(self._trees),
+            "size": self.size,
+        }
+
+    def route(self, start, target):
+        if self.version != self.graph.version:
+            self.clear()
+
+        key = (start, target)
+        cached = self._routes.get(key)
+        if cached is not None:
+            self._routes.move_to_end(key)
+            self.hits += 1
+            return cached[0], list(cached[1])
+
+        compiled = self.graph.compile()
+        tree = self._trees.get(start)
+        if tree is not None:
+            self._trees.move_to_end(start)
+            self.hits += 1
+            return compiled.tree_route(tree, start, target)
+
+        self.misses += 1
+        if self.cache_trees:
+            tree = compiled.shortest_path_tree(start)
+            self._trees[start] = tree
+            self.size += compiled.size
+            self._shrink()
+            return compiled.tree_route(tree, start, target)
+
+        # the cache keeps its own tuple of the path, so a caller changing the
+        # list it gets back cannot change later hits
+        cost, path = compiled.dijkstra(start, target)
+        result = (cost, tuple(path))
+        self._routes[key] = result
+        self.size += len(path) + 1
+        for i in range(len(path) - 1):
+            self._users.setdefault((path[i], path[i + 1]), set()).add(key)
+        self._shrink()
+        return cost, path
+
+    def clear(self):
+        self.invalidations += len(self._routes) + len(self._trees)
+        self._routes.clear()
+        self._trees.clear()
+        self._users.clear()
+        self.size = 0
+        self.version = self.graph.version
+
+    def _shrink(self):
+        while self.size > self.max_size and (self._routes or self._trees):
+            # trees go first: one tree weighs as much as many routes
+            if self._trees:
+                _, tree = self._trees.popitem(last=False)
+                self.size -= len(tree[0])
+            else:
+                key, result = self._routes.popitem(last=False)
+                self._forget(key, result)
+            self.evictions += 1
+
+    def _forget(self, key, result):
+        path = result[1]
+        self.size -= len(path) + 1
+        for i in range(len(path) - 1):
+            users = self._users.get((path[i], path[i + 1]))
+            if users is not None:
+                users.discard(key)
+                if not users:
+                    del self._users[(path[i], path[i + 1])]
+
+    def _on_change(self, kind, *args):
+        if kind == "restricted" or kind == "energy":
+            u, v = args[0], args[1]
+            shorter = not args[2] if kind == "restricted" else args[2] < args[3]
+            if shorter:
+                self.clear()
+                return
+            self._evict_routes(u, v)
+
+            compiled = self.graph.compile()
+            ui = compiled.node_index(u)
+            vi = compiled.node_index(v)
+            if ui is not None and vi is not None:
+                for start in [s for s, (_, prev) in self._trees.items() if prev[vi] == ui]:
+                    tree = self._trees.pop(start)
+                    self.size -= len(tree[0])
+                    self.invalidations += 1
+        elif kind == "removed":
+            self._evict_routes(*args)
+            self._drop_trees()
+        elif kind == "node":
+            self._drop_trees()
+        elif kind != "capacity":
+            self.clear()
+        self.version = self.graph.version
+
+    def _evict_routes(self, u, v):
+        for key in list(self._users.get((u, v), ())):
+            self._forget(key, self._routes.pop(key))
+            self.invalidations += 1
+
+    def _drop_trees(self):
+        for tree in self._trees.values():
+            self.size -= len(tree[0])
+        self.invalidations += len(self._trees)
+        self._trees.clear()
@@ -1,10 +1,9 @@
+import argparse
+import instrumentation
 from graph import Graph
-if __name__ == "__main__":
-    graph = Graph()
-    graph.load_json("test.json")
 
-    graph.visualize_graph()
 
+def run(graph):
     print("F1: check Reachability")
     result = graph.check_delivery_reachability("S")
     print(result)
@@ -57,4 +56,35 @@ if __name__ == "__main__":
 
 
     
-    
\ No newline at end of file
+    
+
+
+# --profile writes a cProfile dump of the whole pipeline and prints the
+# hottest functions; --trace counts every graph call (see instrumentation.py)
+# and writes them as a Chrome trace.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", metavar="FILE", help="cProfile output, e.g. run.prof")
+    parser.add_argument("--trace", metavar="FILE", help="Chrome trace output, e.g. trace.json")
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args()
+
+    graph = Graph()
+    recorder = None
+    if args.trace:
+        recorder = instrumentation.TraceRecorder()
+        graph.enable_instrumentation(recorder)
+    graph.load_json("test.json")
+
+    if not args.no_plot:
+        graph.visualize_graph()
+
+    if args.profile:
+        instrumentation.profile(lambda: run(graph), args.profile)
+    else:
+        run(graph)
+
+    if recorder is not None:
+        recorder.write(args.trace)
+        for stats in recorder.calls:
+            print(stats)
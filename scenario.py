@@ -0,0 +1,124 @@
+from batch_routing import worker_pool, worker_state
+from compiled_graph import CompiledGraph
+from data_structure import LinkedList
+from max_flow import HUB_LISTS, ResidualGraph
+
+
+class ScenarioView:
+    # What-if overlay on a compiled snapshot: the same topology and columns with
+    # a restricted mask of its own. Views never change; restrict() and release()
+    # return new views that copy only the mask, so any number of scenarios can
+    # be evaluated side by side, in threads or processes, without touching
+    # Edge.restricted. A view stays on the snapshot it was made from even if
+    # the graph changes afterwards.
+    #
+    # Graph.view() makes one; Graph's algorithms take it as view=.
+    def __init__(self, compiled, restricted=None):
+        if restricted is not None:
+            compiled._shared = frozenset(("energy", "capacity", "removed"))
+            overlay = CompiledGraph.__new__(CompiledGraph)
+            overlay.__dict__.update(compiled.__dict__)
+            overlay.restricted = restricted
+            overlay._signature = None
+            compiled = overlay
+        self.compiled = compiled
+
+    # copy of the view with the corridors u → v in `corridors` closed
+    def restrict(self, corridors):
+        return self._with(corridors, 1)
+
+    def release(self, corridors):
+        return self._with(corridors, 0)
+
+    def _with(self, corridors, flag):
+        restricted = bytearray(self.compiled.restricted)
+        for u, v in corridors:
+            for i in self.compiled.corridor_slots(u, v):
+                restricted[i] = flag
+        return ScenarioView(self.compiled, restricted)
+
+    def is_restricted(self, u, v):
+        slots = self.compiled.corridor_slots(u, v)
+        return bool(slots) and all(self.compiled.restricted[i] for i in slots)
+
+    # F1: Check reachability from a hub
+    def check_delivery_reachability(self, start="HUB"):
+        graph = self.compiled
+        visited = graph.reachable(start)
+
+        all_delivery = LinkedList()
+        for i in range(graph.node_count):
+            if graph.types[i] == "delivery":
+                all_delivery.append(i)
+
+        unreachable_delivery = LinkedList()
+        current = all_delivery.head
+        while current:
+            did = current.data
+            if not visited[did]:
+                unreachable_delivery.append(graph.ids[did])
+            current = current.next
+
+        if unreachable_delivery.head is None:
+            return f"All delivery nodes are reachable from {start}."
+
+        names = []
+        current = unreachable_delivery.head
+        while current:
+            names.append(current.data)
+            current = current.next
+
+        return "Unreachable delivery nodes: " + ", ".join(names)
+
+    # F2
+    def dijkstra(self, start, target):
+        return self.compiled.dijkstra(start, target)
+
+    # F3: calculate max-flow; start_hub may also be a list, tuple, set or
+    # CustomArray of hubs, fed from a SUPER_SOURCE
+    def calculate_delivery_capacity(self, start_hub, area_nodes):
+        INF = 10**12
+
+        super_sink = "SUPER_SINK"
+        if isinstance(start_hub, HUB_LISTS):
+            residual = ResidualGraph.from_compiled(self.compiled, area_nodes, super_sink, INF, start_hub)
+            max_flow = residual.dinic(residual.source_id)
+        else:
+            residual = ResidualGraph.from_compiled(self.compiled, area_nodes, super_sink, INF)
+            max_flow = residual.dinic(start_hub)
+
+        return max_flow, residual
+
+    # F6: Using prim's algorithm
+    def prim(self, start):
+        mst = LinkedList()
+        edges, total_cost = self.compiled.prim(start)
+        for edge in edges:
+            mst.append(edge)
+        return mst, total_cost
+
+
+def _run_chunk(task, chunk, compiled=None):
+    base = ScenarioView(worker_state(compiled))
+    return [task(base.restrict(corridors)) for corridors in chunk]
+
+
+# Evaluates task(view) for every scenario, a scenario being the (u, v)
+# corridors closed on top of the base view. Results come back in scenario
+# order. With workers > 1 the scenarios are split into chunks over a process
+# pool that receives the base snapshot once per worker; task must then be a
+# module-level function so it can be pickled.
+def run_scenarios(view, scenarios, task, workers=1, chunk_size=None):
+    scenarios = [list(corridors) for corridors in scenarios]
+    pool, workers = worker_pool(workers, view.compiled)
+    if pool is None:
+        return _run_chunk(task, scenarios, view.compiled)
+
+    if chunk_size is None:
+        chunk_size = max(1, len(scenarios) // (workers * 4))
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+    results = []
+    with pool:
+        for part in pool.map(_run_chunk, [task] * len(chunks), chunks):
+            results.extend(part)
+    return results
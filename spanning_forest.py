@@ -0,0 +1,110 @@
+from batch_routing import worker_pool, worker_state
+from data_structure import UnionFind
+
+
+# F6: corridors usable as links: open and not a self-loop. Direction does not
+# matter for a communication link, so u → v and v → u are the same candidate.
+def _open_slots(compiled):
+    sources, targets, restricted = compiled.sources, compiled.targets, compiled.restricted
+    return [i for i in range(compiled.edge_count) if not restricted[i] and sources[i] != targets[i]]
+
+
+# Kruskal: corridors in order of energy (slot order on ties), kept whenever
+# they join two different trees of the forest.
+def kruskal(compiled):
+    sources, targets, energy = compiled.sources, compiled.targets, compiled.energy
+    slots = _open_slots(compiled)
+    slots.sort(key=energy.__getitem__)
+
+    forest = UnionFind(compiled.size)
+    chosen = []
+    for i in slots:
+        if forest.union(sources[i], targets[i]):
+            chosen.append(i)
+            if forest.count == 1:
+                break
+    return _result(compiled, forest, chosen)
+
+
+# cheapest corridor leaving each component among `slots`, as (component, slot)
+# pairs; ties go to the lower slot so every round picks a consistent forest
+def _cheapest(slots, comp, compiled=None):
+    compiled = worker_state(compiled)
+    sources, targets, energy = compiled.sources, compiled.targets, compiled.energy
+    best = [-1] * compiled.size
+    cost = [0] * compiled.size
+    for i in slots:
+        a = comp[sources[i]]
+        b = comp[targets[i]]
+        if a == b:
+            continue
+        w = energy[i]
+        # slots arrive in increasing order, so only a strictly cheaper one wins
+        if best[a] == -1 or w < cost[a]:
+            best[a] = i
+            cost[a] = w
+        if best[b] == -1 or w < cost[b]:
+            best[b] = i
+            cost[b] = w
+    return [(c, i) for c, i in enumerate(best) if i != -1]
+
+
+# Borůvka: every round, each component adds its cheapest outgoing corridor,
+# which at least halves the number of components. The per-round scan is split
+# over a process pool when workers > 1.
+def boruvka(compiled, workers=1):
+    sources, targets, energy = compiled.sources, compiled.targets, compiled.energy
+    forest = UnionFind(compiled.size)
+    chosen = []
+    slots = _open_slots(compiled)
+
+    pool, workers = worker_pool(workers, compiled)
+    try:
+        while slots:
+            comp = [forest.find(v) for v in range(compiled.size)]
+            slots = [i for i in slots if comp[sources[i]] != comp[targets[i]]]
+            if not slots:
+                break
+
+            if pool is None:
+                pairs = _cheapest(slots, comp, compiled)
+            else:
+                size = -(-len(slots) // workers)
+                chunks = [slots[k:k + size] for k in range(0, len(slots), size)]
+                best = {}
+                for part in pool.map(_cheapest, chunks, [comp] * len(chunks)):
+                    for c, i in part:
+                        j = best.get(c)
+                        if j is None or energy[i] < energy[j] or (energy[i] == energy[j] and i < j):
+                            best[c] = i
+                pairs = list(best.items())
+
+            for _, i in sorted(pairs, key=lambda pair: pair[1]):
+                if forest.union(sources[i], targets[i]):
+                    chosen.append(i)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return _result(compiled, forest, chosen)
+
+
+# (edges, total, components): edges are (u, v, cost) ids in the order they
+# were chosen; components are (node ids, total cost), one per tree including
+# single nodes, ordered by their first node.
+def _result(compiled, forest, chosen):
+    ids, sources, targets, energy = compiled.ids, compiled.sources, compiled.targets, compiled.energy
+    edges = []
+    total = 0
+    component_total = {}
+    for i in chosen:
+        edges.append((ids[sources[i]], ids[targets[i]], energy[i]))
+        total += energy[i]
+        root = forest.find(sources[i])
+        component_total[root] = component_total.get(root, 0) + energy[i]
+
+    members = {}
+    for v in range(compiled.size):
+        members.setdefault(forest.find(v), []).append(ids[v])
+    components = [(nodes, component_total.get(root, 0)) for root, nodes in members.items()]
+    return edges, total, components
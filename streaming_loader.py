@@ -0,0 +1,145 @@
+import json
+import os
+
+
+# B1: argument tuples for Graph.add_node / Graph.add_edge from a JSON record
+def node_record(n):
+    return n["id"], n["type"], n.get("x"), n.get("y")
+
+
+def edge_record(e):
+    return (
+        e["from"],
+        e["to"],
+        e.get("energy", 0),
+        e.get("capacity", float("inf")),
+        e.get("bidirectional", False),
+    )
+
+
+class _Reader:
+    # A read buffer over a text file that only holds the unparsed tail.
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.bytes_read += len(chunk)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    # next non-whitespace character, without consuming it ("" at end of file)
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self.bytes_read - len(self.buf) + self.pos}")
+        self.pos += 1
+
+    # one complete JSON value, reading more input until it parses
+    def value(self, decoder):
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # a number may continue in the next chunk
+            if end == len(self.buf) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+# yields ("nodes", record, bytes_read) and ("edges", record, bytes_read) from {"nodes": [...], "edges": [...]}
+# while holding one chunk and one record in memory; other keys are skipped.
+def iter_records(f, chunk_size=1 << 20):
+    reader = _Reader(f, chunk_size)
+    decoder = json.JSONDecoder()
+    reader.expect("{")
+    while reader.peek() != "}":
+        if reader.peek() == ",":
+            reader.pos += 1
+        key = reader.value(decoder)
+        reader.expect(":")
+        if key not in ("nodes", "edges") or reader.peek() != "[":
+            reader.value(decoder)
+            continue
+
+        reader.expect("[")
+        while reader.peek() != "]":
+            if reader.peek() == ",":
+                reader.pos += 1
+            yield key, reader.value(decoder), reader.bytes_read
+        reader.expect("]")
+
+
+# JSON lines: one node or edge object per line; edges are the ones with "from"
+def iter_lines(f):
+    bytes_read = 0
+    for line in f:
+        bytes_read += len(line)
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        yield ("edges" if "from" in record else "nodes"), record, bytes_read
+
+
+# B1: builds the graph in batches of batch_size through Graph.add_nodes /
+# add_edges. progress(nodes, edges, bytes_read, total_bytes) is called after
+# every batch. Nodes must appear before the edges that use them; an edge
+# with an unknown endpoint raises ValueError, as in Graph.load_json, before
+# its batch is added. The load is not atomic: batches added before the
+# failure stay in the graph.
+def load_stream(graph, filepath, batch_size=10000, lines=None, progress=None):
+    if lines is None:
+        lines = filepath.endswith((".jsonl", ".ndjson"))
+    total_bytes = os.path.getsize(filepath)
+
+    node_batch = []
+    edge_batch = []
+    counts = {"nodes": 0, "edges": 0}
+    bytes_read = 0
+
+    def flush():
+        # nodes first, so edges in the same batch can refer to them
+        if node_batch:
+            graph.add_nodes(node_batch)
+            counts["nodes"] += len(node_batch)
+            node_batch.clear()
+        if edge_batch:
+            graph.add_edges(edge_batch)
+            counts["edges"] += len(edge_batch)
+            edge_batch.clear()
+        if progress is not None:
+            progress(counts["nodes"], counts["edges"], bytes_read, total_bytes)
+
+    with open(filepath, "r") as f:
+        records = iter_lines(f) if lines else iter_records(f)
+        for kind, record, bytes_read in records:
+            if kind == "nodes":
+                node_batch.append(node_record(record))
+            else:
+                edge_batch.append(edge_record(record))
+            if len(node_batch) + len(edge_batch) >= batch_size:
+                flush()
+        flush()
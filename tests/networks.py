@@ -0,0 +1,41 @@
+import os
+from graph import Graph
+from network_generator import generate
+from streaming_loader import edge_record, node_record
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load(name="test.json"):
+    graph = Graph()
+    graph.load_json(os.path.join(ROOT, name))
+    return graph
+
+
+# a seeded synthetic network, small enough to check against brute force; the
+# corridors the generator flags restricted are restricted here too
+def network(kind="geometric", n=60, seed=0):
+    data = generate(kind, n, seed, restricted=0.1)
+    graph = Graph()
+    for record in data["nodes"]:
+        graph.add_node(*node_record(record))
+    for record in data["edges"]:
+        graph.add_edge(*edge_record(record))
+    for record in data["edges"]:
+        if record["restricted"]:
+            graph.set_restricted(record["from"], record["to"])
+    return graph
+
+
+def node_ids(graph):
+    return sorted(node_id for node_id, _ in graph.nodes.items())
+
+
+# energy of a route, which must only use open corridors
+def path_cost(graph, path):
+    total = 0
+    for u, v in zip(path, path[1:]):
+        edge = graph.edge(u, v)
+        assert edge is not None and not edge.restricted, (u, v)
+        total += edge.energy
+    return total
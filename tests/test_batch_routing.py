@@ -0,0 +1,23 @@
+import pytest
+from batch_routing import worker_pool
+from networks import network, node_ids, path_cost
+
+
+# every pair comes back once, in completion order, with Dijkstra's cost and a
+# route over open corridors; repeated sources share one tree
+@pytest.mark.parametrize("workers", [1, 2])
+def test_route_many_matches_dijkstra(workers):
+    graph = network("grid")
+    ids = node_ids(graph)
+    pairs = [(ids[i % 7], ids[(i * 11) % len(ids)]) for i in range(40)]
+    results = list(graph.route_many(pairs, workers))
+    assert sorted((s, t) for s, t, _, _ in results) == sorted(pairs)
+    for s, t, cost, path in results:
+        assert cost == graph.dijkstra(s, t)[0]
+        if cost != float("inf"):
+            assert path[0] == s and path[-1] == t and path_cost(graph, path) == cost
+
+
+def test_serial_calls_start_no_pool():
+    assert worker_pool(1, None) == (None, 1)
+    assert worker_pool(0, None) == (None, 1)
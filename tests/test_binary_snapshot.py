@@ -0,0 +1,38 @@
+import os
+from graph import Graph
+from network_generator import generate
+from streaming_loader import edge_record, node_record
+
+
+def build(n=200, seed=0):
+    data = generate("grid", n, seed)
+    graph = Graph()
+    graph.add_nodes([node_record(node) for node in data["nodes"]])
+    graph.add_edges([edge_record(e) for e in data["edges"]])
+    return graph
+
+
+def test_save_over_mmap_loaded_snapshot(tmp_path):
+    path = str(tmp_path / "network.bin")
+    graph = build()
+    graph.save_binary(path)
+
+    loaded = Graph()
+    loaded.load_binary(path, use_mmap=True)
+    ids = loaded.compile().ids
+    start, target = ids[0], ids[-1]
+    expected = loaded.dijkstra(start, target)
+    assert expected[1]
+
+    # same size with other values, then a much smaller graph
+    for e in list(graph.adj.search(start)):
+        graph.set_energy(e.u, e.v, e.energy + 1000)
+    graph.save_binary(path)
+    assert loaded.dijkstra(start, target) == expected
+    build(20, seed=1).save_binary(path)
+    assert loaded.dijkstra(start, target) == expected
+
+    fresh = Graph()
+    fresh.load_binary(path)
+    assert fresh.node_count == build(20, seed=1).node_count
+    assert os.listdir(str(tmp_path)) == ["network.bin"]
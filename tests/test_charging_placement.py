@@ -0,0 +1,104 @@
+import pytest
+from data_structure import CustomArray
+from networks import network
+
+
+# the placement loop the incremental version replaced: a full multi-source
+# Dijkstra and corridor scan for every station
+def rescan_placement(graph, k, R):
+    charging = CustomArray()
+    for node_id, node in graph.nodes.items():
+        if node.type == "charging":
+            charging.append(node_id)
+    for _ in range(k):
+        dist = graph.multi_source_dijkstra(charging)
+        uncovered = graph.find_uncovered_corridors(dist, R)
+        candidate = None
+        max_dist = -1
+        ends = [end for corridor in uncovered for end in corridor]
+        for node_id in ends or [node_id for node_id, _ in graph.nodes.items()]:
+            if dist.search(node_id) > max_dist:
+                max_dist = dist.search(node_id)
+                candidate = node_id
+        if candidate is None:
+            break
+        charging.append(candidate)
+    return list(charging)
+
+
+# plain greedy: each step tries every candidate with a full multi-source
+# Dijkstra and keeps the best objective value (lowest index on ties)
+def brute_force_greedy(graph, k, objective, R=None, demand=None, candidates=None):
+    compiled = graph.compile()
+    n = compiled.node_count
+    stations = [compiled.ids[i] for i in range(n) if compiled.types[i] == "charging"]
+    demand = range(n) if demand is None else [compiled.node_index(d) for d in demand]
+    pool = range(n) if candidates is None else sorted(compiled.node_index(c) for c in candidates)
+    penalty = 1 + sum(compiled.energy[i] for i in range(compiled.edge_count) if not compiled.restricted[i])
+
+    def value(chosen):
+        dist = compiled.multi_source_dijkstra(chosen)
+        if objective == "coverage":
+            return -sum(1 for v in demand if dist[v] <= R)
+        return sum(min(dist[v], penalty) for v in demand)
+
+    for _ in range(k):
+        current = value(stations)
+        best = min(pool, key=lambda c: (value(stations + [compiled.ids[c]]), c))
+        if value(stations + [compiled.ids[best]]) >= current:
+            break
+        stations.append(compiled.ids[best])
+    return stations
+
+
+@pytest.mark.parametrize("kind", ["grid", "geometric", "scale_free"])
+def test_corridor_greedy_matches_rescan(kind):
+    graph = network(kind, n=80)
+    for k, R in ((5, 10), (12, 25)):
+        assert list(graph.optimize_charging_station_placement(k, R)) == rescan_placement(graph, k, R)
+
+
+# the lazy greedy (CELF) picks what the plain greedy picks
+@pytest.mark.parametrize("kind", ["grid", "geometric", "scale_free"])
+@pytest.mark.parametrize("objective, R", [("k_median", None), ("coverage", 12)])
+def test_lazy_greedy_matches_plain_greedy(kind, objective, R):
+    graph = network(kind, n=40)
+    assert list(graph.place_charging_stations(4, objective, R)) == brute_force_greedy(graph, 4, objective, R)
+
+
+def test_demand_and_candidates():
+    graph = network("geometric", n=40)
+    compiled = graph.compile()
+    demand = [compiled.ids[i] for i in range(0, 40, 3)]
+    candidates = [compiled.ids[i] for i in range(1, 40, 2)]
+    expected = brute_force_greedy(graph, 3, "k_median", demand=demand, candidates=candidates)
+    assert list(graph.place_charging_stations(3, "k_median", demand=demand, candidates=candidates)) == expected
+    assert set(expected[-3:]) <= set(candidates) | {compiled.ids[i] for i in range(40) if compiled.types[i] == "charging"}
+
+
+# farthest-first: every new station goes on the demand node farthest from
+# any station, and the worst distance never grows
+def test_k_center_farthest_first():
+    graph = network("grid", n=40)
+    compiled = graph.compile()
+    stations = list(graph.place_charging_stations(4, "k_center"))
+    existing = [compiled.ids[i] for i in range(40) if compiled.types[i] == "charging"]
+    assert stations[:len(existing)] == existing
+    worst = []
+    for j in range(len(existing), len(stations)):
+        dist = compiled.multi_source_dijkstra(stations[:j])[:40]
+        worst.append(max(dist))
+        assert dist[compiled.node_index(stations[j])] == worst[-1]
+    assert worst == sorted(worst, reverse=True)
+
+
+def test_bad_arguments():
+    graph = network("grid", n=20)
+    with pytest.raises(ValueError):
+        graph.place_charging_stations(2, "coverage")
+    with pytest.raises(ValueError):
+        graph.place_charging_stations(2, "k_center", candidates=["D1"])
+    with pytest.raises(ValueError):
+        graph.place_charging_stations(2, "nearest")
+    with pytest.raises(KeyError):
+        graph.place_charging_stations(2, demand=["MISSING"])
@@ -0,0 +1,105 @@
+import heapq
+import pytest
+from networks import load, network, node_ids, path_cost
+
+KINDS = ["grid", "geometric", "scale_free"]
+
+
+def check_route(graph, start, target, route, expected):
+    cost, path = route
+    assert cost == expected
+    if cost == float("inf"):
+        assert path == []
+    else:
+        assert path[0] == start and path[-1] == target
+        assert path_cost(graph, path) == cost
+
+
+# A* with the straight-line heuristic is exact: it costs what Dijkstra costs
+@pytest.mark.parametrize("kind", KINDS)
+def test_astar_matches_dijkstra(kind):
+    graph = network(kind)
+    ids = node_ids(graph)
+    for s in ids[::6]:
+        for t in ids[::5]:
+            check_route(graph, s, t, graph.astar(s, t), graph.dijkstra(s, t)[0])
+
+
+# without coordinates the heuristic is zero and A* is plain Dijkstra
+def test_astar_without_coordinates():
+    graph = load()
+    for s in node_ids(graph):
+        for t in node_ids(graph):
+            check_route(graph, s, t, graph.astar(s, t), graph.dijkstra(s, t)[0])
+
+
+# the two searches meet on a cheapest route, also after corridors close
+@pytest.mark.parametrize("kind", KINDS)
+def test_bidirectional_matches_dijkstra(kind):
+    graph = network(kind)
+    ids = node_ids(graph)
+    for step in range(2):
+        for s in ids[::6]:
+            for t in ids[::5]:
+                check_route(graph, s, t, graph.bidirectional_dijkstra(s, t), graph.dijkstra(s, t)[0])
+        for s in ids[::4]:
+            for e in list(graph.adj.search(s))[:1]:
+                graph.set_restricted(e.u, e.v)
+
+
+# Dijkstra over explicit (node, charge left) states
+def expanded_battery_cost(graph, start, target, capacity):
+    types = {node_id: node.type for node_id, node in graph.nodes.items()}
+    best = {(start, capacity): 0}
+    heap = [(0, start, capacity)]
+    while heap:
+        cost, u, q = heapq.heappop(heap)
+        if u == target:
+            return cost
+        if best[(u, q)] < cost:
+            continue
+        for e in graph.adj.search(u):
+            if e.restricted or e.energy > q:
+                continue
+            left = capacity if types[e.v] == "charging" else q - e.energy
+            state = (e.v, left)
+            if cost + e.energy < best.get(state, float("inf")):
+                best[state] = cost + e.energy
+                heapq.heappush(heap, (cost + e.energy, e.v, left))
+    return float("inf")
+
+
+# the route flies on the battery it has and recharges at exactly the stops
+def check_battery_route(graph, route, capacity):
+    cost, path, stops = route
+    charge = capacity
+    recharged = []
+    for u, v in zip(path, path[1:]):
+        charge -= graph.edge(u, v).energy
+        assert charge >= 0
+        if v != path[-1] and graph.nodes.search(v).type == "charging" and charge < capacity:
+            charge = capacity
+            recharged.append(v)
+    assert recharged == stops
+    assert path_cost(graph, path) == cost
+
+
+def test_battery_route_hand_example():
+    graph = load()
+    assert graph.route_with_battery("S", "D", 9) == (9, ["S", "B", "D"], [])
+    assert graph.route_with_battery("S", "D", 8)[0] == float("inf")
+    # S → B → A spends 11 of 13, A → CHARGE the rest, then one unit to C
+    assert graph.route_with_battery("S", "C", 13) == (14, ["S", "B", "A", "CHARGE", "C"], ["CHARGE"])
+    assert graph.route_with_battery("S", "C", 12) == (float("inf"), [], [])
+
+
+@pytest.mark.parametrize("kind, capacity", [("grid", 20), ("geometric", 15), ("scale_free", 25)])
+def test_battery_route_matches_expanded_states(kind, capacity):
+    graph = network(kind, n=40)
+    ids = node_ids(graph)
+    for s in ids[::5]:
+        for t in ids[::4]:
+            route = graph.route_with_battery(s, t, capacity)
+            assert route[0] == expanded_battery_cost(graph, s, t, capacity), (s, t)
+            if route[0] != float("inf"):
+                check_battery_route(graph, route, capacity)
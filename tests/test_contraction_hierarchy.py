@@ -0,0 +1,32 @@
+import pytest
+from networks import load, network, node_ids, path_cost
+
+
+def check_queries(graph, ids):
+    hierarchy = graph.contraction_hierarchy()
+    for s in ids:
+        for t in ids:
+            cost, path = hierarchy.query(s, t)
+            assert cost == graph.dijkstra(s, t)[0], (s, t)
+            if cost != float("inf"):
+                # shortcuts are unpacked back into real corridors
+                assert path[0] == s and path[-1] == t and path_cost(graph, path) == cost
+
+
+# queries over the shortcuts cost what Dijkstra costs on the full graph
+@pytest.mark.parametrize("kind", ["grid", "geometric", "scale_free"])
+def test_query_matches_dijkstra(kind):
+    graph = network(kind, n=40)
+    check_queries(graph, node_ids(graph)[::3])
+
+
+# a change to the graph drops the hierarchy, and the rebuilt one follows it
+def test_rebuilt_after_changes():
+    graph = load()
+    ids = node_ids(graph)
+    check_queries(graph, ids)
+    hierarchy = graph.contraction_hierarchy()
+    graph.set_restricted("S", "B")
+    graph.set_energy("A", "D", 1)
+    assert graph.contraction_hierarchy() is not hierarchy
+    check_queries(graph, ids)
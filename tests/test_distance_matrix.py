@@ -0,0 +1,38 @@
+import pytest
+from distance_matrix import DistanceMatrix
+from networks import load, network, node_ids
+
+pytest.importorskip("numpy")
+
+
+def check_matrix(graph, matrix, sources, targets):
+    for s in sources:
+        for t in targets:
+            assert matrix.lookup(s, t) == graph.dijkstra(s, t)[0], (s, t)
+
+
+# Floyd-Warshall and the Dijkstra rows, serial or in a pool, agree with
+# point-to-point Dijkstra, including inf for unreachable pairs
+@pytest.mark.parametrize("method, workers", [("floyd_warshall", 1), ("dijkstra", 1), ("dijkstra", 2)])
+def test_matches_dijkstra(method, workers):
+    graph = network("scale_free")
+    ids = node_ids(graph)
+    sources, targets = ids[::4], ids[::3]
+    matrix = graph.distance_matrix(sources, targets, method, workers)
+    assert matrix.matrix.shape == (len(sources), len(targets))
+    check_matrix(graph, matrix, sources, targets)
+
+
+def test_save_and_mmap_load(tmp_path):
+    graph = load()
+    ids = node_ids(graph)
+    path = str(tmp_path / "matrix.npy")
+    graph.distance_matrix().save(path)
+    loaded = DistanceMatrix.load(path, mmap=True)
+    check_matrix(graph, loaded, ids, ids)
+    assert loaded.lookup("S", "MISSING") == float("inf")
+
+
+def test_unknown_node():
+    with pytest.raises(KeyError):
+        load().distance_matrix(["MISSING"])
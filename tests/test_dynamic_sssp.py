@@ -0,0 +1,51 @@
+import random
+import pytest
+from networks import network, node_ids, path_cost
+
+
+def check_tree(graph, tree, sources):
+    fresh = graph.multi_source_dijkstra(sources)
+    for node_id in node_ids(graph):
+        d = tree.distance(node_id)
+        assert d == fresh.search(node_id), node_id
+        path = tree.path(node_id)
+        if d == float("inf"):
+            assert path == []
+        else:
+            assert path[0] in sources and path[-1] == node_id and path_cost(graph, path) == d
+
+
+# after every kind of change the repaired tree matches a fresh multi-source
+# Dijkstra, distances and routes alike
+@pytest.mark.parametrize("kind, seed", [("grid", 1), ("geometric", 2), ("scale_free", 3)])
+def test_follows_changes(kind, seed):
+    graph = network(kind, seed=seed)
+    rng = random.Random(seed)
+    ids = node_ids(graph)
+    sources = rng.sample(ids, 2)
+    tree = graph.dynamic_shortest_paths(sources)
+    check_tree(graph, tree, sources)
+
+    for step in range(60):
+        corridors = [(e.u, e.v) for _, edges in graph.adj.items() for e in edges]
+        u, v = rng.choice(corridors)
+        op = rng.random()
+        if op < 0.3:
+            graph.set_restricted(u, v, rng.random() < 0.6)
+        elif op < 0.55:
+            graph.set_energy(u, v, rng.randint(1, 25))
+        elif op < 0.6:
+            graph.set_capacity(u, v, rng.randint(1, 9))
+        elif op < 0.75:
+            graph.remove_edge(u, v, rng.random() < 0.3)
+        elif op < 0.9:
+            graph.add_edge(rng.choice(ids), rng.choice(ids), rng.randint(1, 20), 3, rng.random() < 0.3)
+        elif op < 0.95:
+            graph.set_restricted_many(rng.sample(corridors, 4), rng.random() < 0.5)
+        else:
+            node_id = f"NEW{step}"
+            graph.add_node(node_id, "relay")
+            graph.add_edge(rng.choice(ids), node_id, rng.randint(1, 20))
+            ids.append(node_id)
+        check_tree(graph, tree, sources)
+    tree.close()
@@ -0,0 +1,82 @@
+import pytest
+from networks import load
+
+
+# writes made straight to an Edge after a query reach the compiled snapshot
+def test_edge_write_after_query():
+    graph = load()
+    assert graph.dijkstra("S", "D") == (9, ["S", "B", "D"])
+    assert graph.check_delivery_reachability("S").startswith("All")
+
+    graph.edge("S", "B").restricted = True
+    assert graph.dijkstra("S", "D") == (23, ["S", "A", "D"])
+
+    fresh = load()
+    fresh.edge("S", "B").restricted = True
+    assert graph.dijkstra("S", "D") == fresh.dijkstra("S", "D")
+    assert graph.check_delivery_reachability("S") == fresh.check_delivery_reachability("S")
+
+    for e in graph.adj.search("S"):
+        if e.v == "A":
+            e.energy = 1
+    assert graph.dijkstra("S", "D")[0] == 1 + graph.edge("A", "D").energy
+
+
+def test_edge_write_notifies_subscribers():
+    graph = load()
+    events = []
+    graph.subscribe(lambda *event: events.append(event))
+    graph.edge("S", "B").capacity = 1
+    graph.edge("S", "B").restricted = True
+    assert events == [("capacity", "S", "B", 1, 8), ("restricted", "S", "B", True)]
+
+
+# route_many is a generator: its counters cover the routing done while it is
+# iterated, not just the call that created it
+def test_route_many_is_counted_while_iterated():
+    graph = load()
+    graph.enable_instrumentation()
+    routes = graph.route_many([("S", "D"), ("S", "C"), ("A", "D")])
+    assert graph.last_stats is None
+    results = list(routes)
+    assert len(results) == 3
+    stats = graph.last_stats
+    assert stats.name == "route_many"
+    assert stats.nodes_settled > 0 and stats.heap_pops > 0
+
+
+# remove_edge tombstones the corridor in the current snapshot instead of
+# dropping it, and the results match a graph built without the corridor
+def test_remove_edge_keeps_snapshot():
+    graph = load()
+    compiled = graph.compile()
+    assert graph.dijkstra("S", "D") == (9, ["S", "B", "D"])
+    assert graph.remove_edge("S", "B")
+    assert graph.compile() is compiled and compiled.tombstones == 1
+    assert graph.edge("S", "B") is None
+    assert all(e.v != "B" for e in graph.adj.search("S"))
+    assert graph.dijkstra("S", "D") == (23, ["S", "A", "D"])
+    assert not graph.view(released=[("S", "B")]).compiled.corridor_slots("S", "B")
+
+    for _, edges in graph.adj.items():
+        for position, e in enumerate(edges):
+            assert e._out == position
+    for _, edges in graph.radj.items():
+        for position, e in enumerate(edges):
+            assert e._in == position
+
+
+# a corridor from an unknown node is refused without leaving an edge_index
+# entry behind, so a second attempt fails the same way
+@pytest.mark.parametrize("u, v", [("X", "S"), ("S", "X")])
+def test_add_edge_rejects_unknown_endpoint(u, v):
+    graph = load()
+    edges = graph.edge_count
+    for _ in range(2):
+        with pytest.raises(ValueError, match="unknown node 'X'"):
+            graph.add_edge(u, v, 1, 1)
+    with pytest.raises(ValueError, match="unknown node 'X'"):
+        graph.add_edges([("S", "A", 1, 1, False), (u, v, 1, 1, False)])
+    assert graph.edge(u, v) is None and graph.edge_index.search((u, v)) is None
+    assert graph.edge_count == edges == len(graph.edge_index)
+    assert not graph.remove_edge(u, v)
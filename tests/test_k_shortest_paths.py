@@ -0,0 +1,66 @@
+import pytest
+from networks import load, network, node_ids, path_cost
+
+
+# every loopless route from start to target over open corridors, as (energy, path)
+def all_simple_paths(graph, start, target):
+    routes = []
+    path = [start]
+
+    def extend(u, cost):
+        if u == target:
+            routes.append((cost, list(path)))
+            return
+        for e in graph.adj.search(u):
+            if not e.restricted and e.v not in path:
+                path.append(e.v)
+                extend(e.v, cost + e.energy)
+                path.pop()
+
+    extend(start, 0)
+    return sorted(routes)
+
+
+def check_routes(graph, start, target, k, routes):
+    expected = all_simple_paths(graph, start, target)
+    assert [cost for cost, _ in routes] == [cost for cost, _ in expected[:k]]
+    paths = [tuple(path) for _, path in routes]
+    assert len(set(paths)) == len(paths)
+    for cost, path in routes:
+        assert path[0] == start and path[-1] == target
+        assert len(set(path)) == len(path) and path_cost(graph, path) == cost
+
+
+# the k cheapest loopless routes, cheapest first, as enumeration finds them
+@pytest.mark.parametrize("kind", ["grid", "geometric", "scale_free"])
+def test_matches_enumeration(kind):
+    graph = network(kind, n=12)
+    ids = node_ids(graph)
+    for s in ids[::3]:
+        for t in ids[1::4]:
+            if s != t:
+                check_routes(graph, s, t, 8, graph.k_shortest_paths(s, t, 8))
+
+
+def test_hand_example():
+    graph = load()
+    routes = graph.k_shortest_paths("S", "D", 3)
+    assert routes == [(9, ["S", "B", "D"]), (19, ["S", "B", "A", "D"]), (23, ["S", "A", "D"])]
+    # fewer routes than asked for: all of them
+    assert len(graph.k_shortest_paths("S", "D", 50)) == len(all_simple_paths(graph, "S", "D"))
+    assert graph.k_shortest_paths("S", "S", 3) == [(0, ["S"])]
+    assert graph.k_shortest_paths("S", "MISSING", 3) == []
+
+
+# a pool of spur searches, or a view with corridors closed, changes nothing
+# about the answer
+def test_workers_and_views():
+    graph = network("grid", n=12)
+    ids = node_ids(graph)
+    s, t = ids[0], ids[-1]
+    assert graph.k_shortest_paths(s, t, 6, workers=2) == graph.k_shortest_paths(s, t, 6)
+    first = graph.k_shortest_paths(s, t, 1)[0][1]
+    view = graph.view(restricted=[(first[0], first[1])])
+    routes = graph.k_shortest_paths(s, t, 6, view=view)
+    graph.set_restricted(first[0], first[1])
+    check_routes(graph, s, t, 6, routes)
@@ -0,0 +1,50 @@
+from data_structure import CustomArray
+from graph import Graph
+
+
+# node ids need not be strings: one int hub is still one hub
+def int_graph():
+    graph = Graph()
+    for node_id, node_type in ((0, "hub"), (1, "relay"), (2, "delivery"), (3, "delivery"), (4, "hub")):
+        graph.add_node(node_id, node_type)
+    graph.add_edge(0, 1, energy=1, capacity=4)
+    graph.add_edge(0, 3, energy=5, capacity=1)
+    graph.add_edge(1, 2, energy=1, capacity=2)
+    graph.add_edge(1, 3, energy=2, capacity=2)
+    graph.add_edge(4, 2, energy=1, capacity=3)
+    return graph
+
+
+def test_int_ids_single_hub():
+    graph = int_graph()
+    flow, residual = graph.calculate_delivery_capacity(0, [2, 3])
+    assert flow == 5
+    cut = graph._extract_min_cut(residual, 0)
+    assert sorted(cut[i] for i in range(len(cut))) == [(0, 1), (0, 3)]
+    assert graph.min_cost_delivery_flow([2, 3], 0)[:2] == (5, 15)
+
+
+def test_int_ids_hub_containers():
+    graph = int_graph()
+    hubs = CustomArray()
+    hubs.append(0)
+    hubs.append(4)
+    for container in ([0, 4], (0, 4), {0, 4}, hubs):
+        assert graph.calculate_delivery_capacity(container, [2, 3])[0] == 8
+        assert graph.min_cost_delivery_flow([2, 3], container)[0] == 8
+    assert graph.min_cost_delivery_flow([2, 3])[0] == 8
+
+
+# a delivery flow from several hubs is fed from the super source and stays
+# equal to a fresh calculation across restriction toggles
+def test_delivery_flow_from_hub_list():
+    graph = int_graph()
+    flow = graph.delivery_flow([0, 4], [2, 3])
+    assert flow.max_flow() == 8
+    for u, v, restricted in ((4, 2, True), (1, 3, True), (4, 2, False), (0, 1, True), (1, 3, False)):
+        graph.set_restricted(u, v, restricted)
+        assert flow.max_flow() == graph.calculate_delivery_capacity((0, 4), [2, 3])[0]
+    graph.set_restricted(0, 1, False)
+    assert flow.max_flow() == 8
+    cut = flow.min_cut()
+    assert sorted(cut[i] for i in range(len(cut))) == [(0, 1), (0, 3), (4, 2)]
@@ -0,0 +1,106 @@
+import random
+import pytest
+from graph import Graph
+from networks import network, node_ids
+
+INF = float("inf")
+
+
+# Optimality certificate: with (u, v, flow) on every corridor used, the flow
+# is the cheapest of its value exactly when the residual network (super
+# source and sink included) has no negative cycle (Bellman-Ford).
+def has_negative_cycle(graph, hubs, area, flows):
+    used = {(u, v): f for u, v, f in flows}
+    arcs = []
+    for u, edges in graph.adj.items():
+        for e in edges:
+            if e.restricted:
+                continue
+            f = used.get((e.u, e.v), 0)
+            if f < e.capacity:
+                arcs.append((e.u, e.v, e.energy))
+            if f > 0:
+                arcs.append((e.v, e.u, -e.energy))
+    net = {}
+    for u, v, f in flows:
+        net[u] = net.get(u, 0) + f
+        net[v] = net.get(v, 0) - f
+    for hub in hubs:
+        arcs.append(("SOURCE", hub, 0))
+        if net.get(hub, 0) > 0:
+            arcs.append((hub, "SOURCE", 0))
+    for node_id in area:
+        arcs.append((node_id, "SINK", 0))
+        if net.get(node_id, 0) < 0:
+            arcs.append(("SINK", node_id, 0))
+
+    dist = {node_id: 0 for node_id in node_ids(graph) + ["SOURCE", "SINK"]}
+    for _ in range(len(dist)):
+        changed = False
+        for u, v, w in arcs:
+            if dist[u] + w < dist[v]:
+                dist[v] = dist[u] + w
+                changed = True
+        if not changed:
+            return False
+    return True
+
+
+def check_flow(graph, hubs, area, result):
+    flow, energy, corridor_flows = result
+    flows = [corridor_flows[i] for i in range(len(corridor_flows))]
+    assert flow == graph.calculate_delivery_capacity(list(hubs), area)[0]
+    assert energy == sum(f * graph.edge(u, v).energy for u, v, f in flows)
+
+    net = {}
+    for u, v, f in flows:
+        edge = graph.edge(u, v)
+        assert not edge.restricted and 0 < f <= edge.capacity
+        net[u] = net.get(u, 0) + f
+        net[v] = net.get(v, 0) - f
+    for node_id, balance in net.items():
+        if node_id in hubs:
+            assert balance >= 0
+        elif node_id in area:
+            assert balance <= 0
+        else:
+            assert balance == 0, node_id
+    assert sum(net.get(hub, 0) for hub in hubs) == flow
+    assert not has_negative_cycle(graph, hubs, area, flows)
+
+
+# the most the hubs can deliver, at the least energy, for random hub and area
+# choices; corridors the flow uses are then restricted and it must re-solve
+@pytest.mark.parametrize("kind, seed", [("grid", 1), ("geometric", 2), ("scale_free", 3)])
+def test_max_flow_at_least_energy(kind, seed):
+    graph = network(kind, n=40, seed=seed)
+    rng = random.Random(seed)
+    ids = node_ids(graph)
+    for _ in range(4):
+        hubs = rng.sample(ids, 2)
+        area = [node_id for node_id in rng.sample(ids, 8) if node_id not in hubs]
+        result = graph.min_cost_delivery_flow(area, hubs)
+        check_flow(graph, hubs, area, result)
+        flows = result[2]
+        if len(flows):
+            u, v, _ = flows[0]
+            graph.set_restricted(u, v)
+            check_flow(graph, hubs, area, graph.min_cost_delivery_flow(area, hubs))
+
+
+# two routes into a bottleneck of capacity 2: the cheap one carries it all
+def test_prefers_cheaper_route():
+    graph = Graph()
+    for node_id in ("H", "B", "C", "M", "D"):
+        graph.add_node(node_id, "relay")
+    graph.add_edge("H", "B", energy=1, capacity=2)
+    graph.add_edge("B", "M", energy=1, capacity=2)
+    graph.add_edge("H", "C", energy=5, capacity=2)
+    graph.add_edge("C", "M", energy=5, capacity=2)
+    graph.add_edge("M", "D", energy=1, capacity=2)
+    flow, energy, corridor_flows = graph.min_cost_delivery_flow(["D"], "H")
+    assert (flow, energy) == (2, 6)
+    assert sorted(corridor_flows[i] for i in range(len(corridor_flows))) == \
+        [("B", "M", 2), ("H", "B", 2), ("M", "D", 2)]
+    graph.set_restricted("B", "M")
+    assert graph.min_cost_delivery_flow(["D"], "H")[:2] == (2, 22)
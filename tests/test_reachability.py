@@ -0,0 +1,47 @@
+import pytest
+from networks import load, network, node_ids
+
+INF = float("inf")
+
+
+def check_matrix(graph, matrix, sources, targets):
+    for s in sources:
+        for t in targets:
+            assert matrix.reachable(s, t) == (graph.dijkstra(s, t)[0] != INF), (s, t)
+        assert matrix.unreachable(s) == [t for t in targets if graph.dijkstra(s, t)[0] == INF]
+
+
+@pytest.mark.parametrize("kind", ["grid", "geometric", "scale_free"])
+def test_matrix_matches_dijkstra(kind):
+    graph = network(kind)
+    ids = node_ids(graph)
+    sources, targets = ids[::5], ids[::2]
+    check_matrix(graph, graph.reachability_matrix(sources, targets), sources, targets)
+
+
+# hubs × delivery nodes by default
+def test_default_sources_and_targets():
+    graph = network("scale_free")
+    hubs = [node_id for node_id, node in graph.nodes.items() if node.type == "hub"]
+    deliveries = [node_id for node_id, node in graph.nodes.items() if node.type == "delivery"]
+    matrix = graph.reachability_matrix()
+    assert sorted(matrix.source_ids) == sorted(hubs)
+    assert sorted(matrix.target_ids) == sorted(deliveries)
+    check_matrix(graph, matrix, hubs, deliveries)
+
+
+# each scenario matches the graph with its corridors restricted, and leaves
+# the graph itself alone
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scenarios_match_restricted_graph(workers):
+    graph = load()
+    ids = node_ids(graph)
+    scenarios = [[], [("S", "B")], [("S", "B"), ("S", "A")], [("A", "D"), ("B", "D")], [("D", "C"), ("A", "C")]]
+    matrices = graph.reachability_scenarios(scenarios, ids, ids, workers)
+    for corridors, matrix in zip(scenarios, matrices):
+        changed = [(u, v) for u, v in corridors if graph.set_restricted(u, v)]
+        check_matrix(graph, matrix, ids, ids)
+        for u, v in changed:
+            graph.set_restricted(u, v, False)
+    assert graph.reachability_matrix(ids, ids).columns == matrices[0].columns
+    assert not matrices[2].reachable("S", "D") and matrices[1].reachable("S", "D")
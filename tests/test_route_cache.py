@@ -0,0 +1,19 @@
+import os
+from graph import Graph
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# a caller editing the path it got back must not change later cache hits
+def test_returned_path_is_a_copy():
+    graph = Graph()
+    graph.load_json(os.path.join(ROOT, "test.json"))
+    cache = graph.enable_route_cache()
+
+    cost, path = graph.dijkstra("S", "D")
+    path.append("X")
+    cost, path = graph.dijkstra("S", "D")
+    assert (cost, path) == (9, ["S", "B", "D"])
+    path.clear()
+    assert graph.dijkstra("S", "D") == (9, ["S", "B", "D"])
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,85 @@
+from itertools import combinations
+import pytest
+from networks import load, network, node_ids
+
+
+# undirected components over the open corridors, as sorted id lists
+def components(graph):
+    parent = {node_id: node_id for node_id in node_ids(graph)}
+
+    def find(x):
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for u, edges in graph.adj.items():
+        for e in edges:
+            if not e.restricted:
+                parent[find(u)] = find(e.v)
+    groups = {}
+    for node_id in parent:
+        groups.setdefault(find(node_id), []).append(node_id)
+    return sorted(sorted(group) for group in groups.values())
+
+
+def is_forest(edges):
+    parent = {}
+
+    def find(x):
+        while parent.get(x, x) != x:
+            x = parent[x]
+        return x
+
+    for u, v, _ in edges:
+        a, b = find(u), find(v)
+        if a == b:
+            return False
+        parent[a] = b
+    return True
+
+
+# cheapest forest over every subset of open corridors of the right size
+def brute_force_total(graph):
+    corridors = [(e.u, e.v, e.energy) for _, edges in graph.adj.items() for e in edges
+                 if not e.restricted and e.u != e.v]
+    size = graph.node_count - len(components(graph))
+    return min(sum(c for _, _, c in subset) for subset in combinations(corridors, size) if is_forest(subset))
+
+
+def check_forest(graph, result):
+    forest, total, parts = result
+    edges = list(forest.iter())
+    assert is_forest(edges)
+    assert len(edges) == graph.node_count - len(parts)
+    for u, v, cost in edges:
+        edge = graph.edge(u, v)
+        assert not edge.restricted and edge.energy == cost
+    assert sum(cost for _, _, cost in edges) == total == sum(t for _, t in parts)
+    assert sorted(sorted(nodes) for nodes, _ in parts) == components(graph)
+
+
+@pytest.mark.parametrize("method", ["kruskal", "boruvka"])
+def test_minimal_on_small_graph(method):
+    graph = load()
+    graph.add_node("LONE", "relay")
+    graph.set_restricted("S", "A")
+    result = graph.minimum_spanning_forest(method)
+    check_forest(graph, result)
+    assert result[1] == brute_force_total(graph)
+
+
+# Kruskal and Borůvka, serial or in a pool, build forests of the same weight
+@pytest.mark.parametrize("kind", ["grid", "geometric", "scale_free"])
+def test_kruskal_and_boruvka_agree(kind):
+    graph = network(kind, n=80)
+    kruskal = graph.minimum_spanning_forest("kruskal")
+    check_forest(graph, kruskal)
+    for workers in (1, 2):
+        boruvka = graph.minimum_spanning_forest("boruvka", workers)
+        check_forest(graph, boruvka)
+        assert boruvka[1] == kruskal[1]
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        load().minimum_spanning_forest("prim")
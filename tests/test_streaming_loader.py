@@ -0,0 +1,46 @@
+import json
+import pytest
+from graph import Graph
+
+
+def write_lines(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+NODES = [{"id": "A", "type": "hub"}, {"id": "B", "type": "delivery"}]
+
+
+def test_loads_known_endpoints(tmp_path):
+    path = str(tmp_path / "network.jsonl")
+    write_lines(path, NODES + [{"from": "A", "to": "B", "energy": 3, "capacity": 2}])
+    graph = Graph()
+    graph.load_json_stream(path)
+    assert graph.edge("A", "B").energy == 3
+
+
+@pytest.mark.parametrize("edge", [
+    {"from": "A", "to": "MISSING", "energy": 1},
+    {"from": "MISSING", "to": "B", "energy": 1},
+])
+@pytest.mark.parametrize("loader", ["load_json_stream", "load_json"])
+def test_rejects_unknown_endpoint(tmp_path, edge, loader):
+    path = str(tmp_path / "network.json")
+    with open(path, "w") as f:
+        json.dump({"nodes": NODES, "edges": [{"from": "A", "to": "B"}, edge]}, f)
+    graph = Graph()
+    with pytest.raises(ValueError, match="unknown node 'MISSING'"):
+        getattr(graph, loader)(path)
+    assert graph.edge_count == 0
+
+
+# load_json checks every edge first and leaves the graph untouched
+def test_load_json_is_atomic(tmp_path):
+    path = str(tmp_path / "network.json")
+    with open(path, "w") as f:
+        json.dump({"nodes": NODES, "edges": [{"from": "A", "to": "B"}, {"from": "B", "to": "C"}]}, f)
+    graph = Graph()
+    with pytest.raises(ValueError, match="edge to unknown node 'C'"):
+        graph.load_json(path)
+    assert graph.node_count == 0 and graph.edge_count == 0